@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Size breakdown of app.asar archives and dist/*.deb packages, with budgets.
+
+Usage:
+  python .github/scripts/analyze_size.py upstream/dist/*.deb --output size-report.json
+  python .github/scripts/analyze_size.py app.asar --baseline old-report.json \\
+      --budgets .github/size-budgets.json
+
+Archives are read as streams: asar headers are parsed in place and a .deb's
+payload (including any app.asar inside it) is decompressed on the fly, so
+nothing is extracted. Every file gets raw, gzip and brotli sizes (brotli
+needs the optional ``brotli`` package); the report aggregates them per
+directory, per bundle chunk (content hashes stripped so chunks line up across
+builds) and lists the largest files.
+
+A budgets file holds rules such as::
+
+    {"budgets": [
+      {"target": "*.deb", "path": "opt/Feishin/resources/app.asar/out/renderer",
+       "metric": "gzip", "max_increase": 0.1},
+      {"target": "*.deb", "metric": "raw", "max": 120000000}
+    ]}
+
+``path`` names a directory or chunk key of the report (the whole target when
+omitted); ``max`` is an absolute limit in bytes and ``max_increase`` a
+fraction of the baseline value. Any exceeded budget makes the exit status 1.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import importlib.util
+import json
+import posixpath
+import re
+import sys
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import deb_archive
+
+
+# asar.py lives at the repository root, where the AUR package ships it.
+ASAR_MODULE_PATH = Path(__file__).resolve().parents[2] / "asar.py"
+
+
+def _load_asar():
+    if "asar" in sys.modules:
+        return sys.modules["asar"]
+    spec = importlib.util.spec_from_file_location("asar", ASAR_MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before it runs: its dataclasses resolve their module by name.
+    sys.modules["asar"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+asar = _load_asar()
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPORT_VERSION = 1
+CHUNK_SIZE = 1 << 20
+METRICS = ("raw", "gzip", "brotli")
+# Vite/rollup content hashes: index-B4xq9z1_.js -> index.js
+_CHUNK_HASH_RE = re.compile(r"-[A-Za-z0-9_-]{8}(?=\.[A-Za-z0-9]+$)")
+_CHUNK_RE = re.compile(r"(?:^|/)out/.+\.(?:js|mjs|cjs|css)$")
+
+
+@dataclass
+class Sizes:
+    raw: int = 0
+    gzip: int | None = 0
+    brotli: int | None = 0
+
+    def add(self, other: Sizes) -> None:
+        self.raw += other.raw
+        self.gzip = None if self.gzip is None or other.gzip is None else self.gzip + other.gzip
+        self.brotli = None if self.brotli is None or other.brotli is None else self.brotli + other.brotli
+
+
+@dataclass(frozen=True)
+class Settings:
+    gzip_level: int = 6
+    brotli_quality: int = 5
+
+
+def _empty() -> Sizes:
+    return Sizes(brotli=0 if brotli else None)
+
+
+def measure(stream: BinaryIO, size: int, settings: Settings) -> Sizes:
+    """Consume exactly ``size`` bytes of ``stream`` and return their sizes."""
+    gzip = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+    sizes = _empty()
+    compressor = brotli.Compressor(quality=settings.brotli_quality) if brotli else None
+    remaining = size
+    while remaining:
+        chunk = stream.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise ValueError("unexpected end of stream")
+        remaining -= len(chunk)
+        sizes.raw += len(chunk)
+        sizes.gzip += len(gzip.compress(chunk))
+        if compressor:
+            sizes.brotli += len(compressor.process(chunk))
+    sizes.gzip += len(gzip.flush())
+    if compressor:
+        sizes.brotli += len(compressor.finish())
+    return sizes
+
+
+def _skip(stream: BinaryIO, count: int) -> None:
+    while count:
+        chunk = stream.read(min(CHUNK_SIZE, count))
+        if not chunk:
+            raise ValueError("unexpected end of stream")
+        count -= len(chunk)
+
+
+def scan_asar(stream: BinaryIO, prefix: str, files: dict[str, Sizes], settings: Settings) -> None:
+    """Measure every packed entry of the archive ``stream`` reads sequentially."""
+    header, position = asar.read_header(stream, prefix.rstrip("/") or "app.asar")
+    entries = sorted(
+        asar.Archive(Path(), header, position).files(), key=lambda entry: entry.offset
+    )
+    for entry in entries:
+        if entry.offset < position:
+            raise ValueError(f"{prefix}{entry.path}: overlapping asar entries")
+        _skip(stream, entry.offset - position)
+        files[prefix + entry.path] = measure(stream, entry.size, settings)
+        position = entry.offset + entry.size
+
+
+def scan_deb(stream: BinaryIO, files: dict[str, Sizes], settings: Settings) -> None:
+    for info, reader in deb_archive.iter_data_members(stream):
+        if reader is None:
+            continue
+        path = deb_archive.normalize_path(info.name)
+        if path.endswith(".asar"):
+            scan_asar(reader, f"{path}/", files, settings)
+        else:
+            files[path] = measure(reader, info.size, settings)
+
+
+def chunk_key(path: str) -> str:
+    return _CHUNK_HASH_RE.sub("", path)
+
+
+def summarize(files: dict[str, Sizes], depth: int, top: int) -> dict:
+    total = _empty()
+    directories: dict[str, Sizes] = {}
+    chunks: dict[str, Sizes] = {}
+    for path, sizes in files.items():
+        total.add(sizes)
+        parts = posixpath.dirname(path).split("/") if "/" in path else []
+        for level in range(1, min(depth, len(parts)) + 1):
+            directories.setdefault("/".join(parts[:level]), _empty()).add(sizes)
+        if _CHUNK_RE.search(path):
+            chunks.setdefault(chunk_key(path), _empty()).add(sizes)
+    largest = sorted(files.items(), key=lambda item: item[1].raw, reverse=True)[:top]
+    return {
+        "total": asdict(total),
+        "files": len(files),
+        "directories": {key: asdict(value) for key, value in sorted(directories.items())},
+        "chunks": {key: asdict(value) for key, value in sorted(chunks.items())},
+        "largest": [{"path": path, **asdict(sizes)} for path, sizes in largest],
+    }
+
+
+def analyze(path: Path, settings: Settings, depth: int, top: int) -> dict:
+    files: dict[str, Sizes] = {}
+    with open(path, "rb") as handle:
+        if path.suffix == ".deb":
+            scan_deb(handle, files, settings)
+        else:
+            scan_asar(handle, "", files, settings)
+    return {"file_size": path.stat().st_size, **summarize(files, depth, top)}
+
+
+def _lookup(target: dict, key: str | None, metric: str) -> int | None:
+    if not key:
+        return target["total"].get(metric)
+    for section in ("directories", "chunks"):
+        if key in target.get(section, {}):
+            return target[section][key].get(metric)
+    return None
+
+
+def check_budgets(report: dict, baseline: dict | None, budgets: list[dict]) -> tuple[list[str], list[str]]:
+    """Return ``(failures, notes)`` for every budget rule against ``report``."""
+    failures: list[str] = []
+    notes: list[str] = []
+    for rule in budgets:
+        metric = rule.get("metric", "raw")
+        key = rule.get("path")
+        matched = [name for name in report["targets"] if fnmatch.fnmatchcase(name, rule.get("target", "*"))]
+        for name in matched:
+            label = f"{name}:{key or 'total'} ({metric})"
+            value = _lookup(report["targets"][name], key, metric)
+            if value is None:
+                notes.append(f"{label}: not measured, budget skipped")
+                continue
+            if "max" in rule and value > rule["max"]:
+                failures.append(f"{label}: {_human(value)} exceeds budget {_human(rule['max'])}")
+            if "max_increase" in rule:
+                previous = None
+                if baseline and name in baseline.get("targets", {}):
+                    previous = _lookup(baseline["targets"][name], key, metric)
+                if not previous:
+                    notes.append(f"{label}: no baseline value, growth budget skipped")
+                elif value > previous * (1 + rule["max_increase"]):
+                    failures.append(
+                        f"{label}: grew {_delta(value, previous)}, "
+                        f"budget is +{rule['max_increase']:.0%}"
+                    )
+    return failures, notes
+
+
+def _human(size: int | None) -> str:
+    if size is None:
+        return "-"
+    value = float(size)
+    for unit in ("B", "KiB", "MiB"):
+        if abs(value) < 1024 or unit == "MiB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def _delta(value: int, previous: int) -> str:
+    change = value - previous
+    sign = "+" if change >= 0 else "-"
+    return f"{sign}{_human(abs(change))} ({change / previous:+.1%})"
+
+
+def render_text(report: dict, baseline: dict | None, top: int) -> str:
+    lines = []
+    for name, target in report["targets"].items():
+        old = (baseline or {}).get("targets", {}).get(name)
+
+        def row(label: str, sizes: dict, previous: dict | None) -> str:
+            text = f"  {label:<60} " + " ".join(f"{_human(sizes[m]):>11}" for m in METRICS)
+            if previous and previous.get("raw"):
+                text += f"  {_delta(sizes['raw'], previous['raw'])}"
+            return text
+
+        lines.append(f"{name}: {_human(target['file_size'])} on disk, {target['files']} files")
+        lines.append(f"  {'':<60} " + " ".join(f"{m:>11}" for m in METRICS))
+        lines.append(row("total", target["total"], old and old["total"]))
+        for section in ("directories", "chunks"):
+            items = sorted(target[section].items(), key=lambda item: item[1]["raw"], reverse=True)[:top]
+            if items:
+                lines.append(f" {section}:")
+            for key, sizes in items:
+                lines.append(row(key, sizes, old and old.get(section, {}).get(key)))
+        lines.append(" largest files:")
+        for item in target["largest"]:
+            lines.append(row(item["path"], item, None))
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", type=Path, help=".deb packages and/or .asar archives")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous JSON report to compare with")
+    parser.add_argument("--budgets", type=Path, default=None, help="JSON file of size budgets")
+    parser.add_argument("--depth", type=int, default=6, help="Directory levels to aggregate (default: 6)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per section in the summary (default: 20)")
+    parser.add_argument("--gzip-level", type=int, default=Settings.gzip_level)
+    parser.add_argument("--brotli-quality", type=int, default=Settings.brotli_quality)
+    args = parser.parse_args()
+
+    settings = Settings(args.gzip_level, args.brotli_quality)
+    report = {"version": REPORT_VERSION, "settings": asdict(settings), "targets": {}}
+    for path in args.paths:
+        try:
+            report["targets"][path.name] = analyze(path, settings, args.depth, args.top)
+        except (OSError, ValueError) as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            return 2
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    if baseline and baseline.get("settings") != report["settings"]:
+        print("note: baseline was measured with different compression settings", file=sys.stderr)
+    if brotli is None:
+        print("note: brotli module not installed; brotli sizes are not measured", file=sys.stderr)
+
+    sys.stdout.write(render_text(report, baseline, args.top))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if not args.budgets:
+        return 0
+    budgets = json.loads(args.budgets.read_text(encoding="utf-8")).get("budgets", [])
+    failures, notes = check_budgets(report, baseline, budgets)
+    for note in notes:
+        print(f"note: {note}")
+    for failure in failures:
+        print(f"budget exceeded: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+"""Declarative rules for rewriting barrel-package imports into deep imports.
+
+A rule names a module ``source`` pattern, whose ``{placeholders}`` match one
+path segment each, and a ``target`` template filled from those placeholders
+plus ``{name}``, the imported binding. For example the built-in react-icons
+rule turns ``import { FaPlay } from "react-icons/fa"`` into
+``import { FaPlay } from "@react-icons/all-files/fa/FaPlay"``.
+
+Extra rules are loaded from a JSON file holding a list of objects with the
+same fields as BarrelRule; a rule with the name of a built-in replaces it::
+
+    [
+      {
+        "name": "lodash",
+        "source": "lodash",
+        "target": "lodash/{name}",
+        "style": "default",
+        "remove_dependencies": ["lodash"],
+        "dev_dependencies": {"lodash": "{version:lodash}"}
+      }
+    ]
+
+``dev_dependencies`` values are version templates: ``{version:pkg}`` is the
+range currently declared for ``pkg`` and ``{semver:pkg}`` the x.y.z part of
+it. A package listed there is moved from ``dependencies`` to
+``devDependencies``; packages in ``remove_dependencies`` are dropped from
+every dependency section after that.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+
+_PLACEHOLDER_RE = re.compile(r"\{(?P<name>[A-Za-z_]\w*)\}")
+_VERSION_REF_RE = re.compile(r"\{(?P<kind>version|semver):(?P<package>[^{}]+)\}")
+STYLES = ("named", "default")
+
+
+@dataclass(frozen=True)
+class BarrelRule:
+    name: str
+    source: str
+    target: str
+    # "named" keeps ``import { X }``, "default" emits ``import X`` for deep
+    # modules that only have a default export (lodash, date-fns/esm, ...).
+    style: str = "named"
+    # Regular expression the imported name must match; others stay on the barrel.
+    names: str | None = None
+    remove_dependencies: tuple[str, ...] = ()
+    dev_dependencies: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def needle(self) -> bytes:
+        return self.source.split("{", 1)[0].encode()
+
+    def match(self, source: str) -> dict[str, str] | None:
+        match = _source_pattern(self.source).fullmatch(source)
+        return match.groupdict() if match else None
+
+    def accepts(self, imported: str) -> bool:
+        return self.names is None or re.fullmatch(self.names, imported) is not None
+
+    def render_target(self, groups: dict[str, str], imported: str) -> str:
+        return self.target.format(**groups, name=imported)
+
+
+DEFAULT_RULES: tuple[BarrelRule, ...] = (
+    BarrelRule(
+        name="react-icons",
+        source="react-icons/{pack}",
+        target="@react-icons/all-files/{pack}/{name}",
+        remove_dependencies=("react-icons",),
+        dev_dependencies=(
+            (
+                "@react-icons/all-files",
+                "https://github.com/react-icons/react-icons/releases/download/"
+                "v{semver:react-icons}/react-icons-all-files-{semver:react-icons}.tgz",
+            ),
+        ),
+    ),
+)
+
+
+@lru_cache(maxsize=None)
+def _source_pattern(source: str) -> re.Pattern[str]:
+    parts = []
+    last = 0
+    for match in _PLACEHOLDER_RE.finditer(source):
+        parts.append(re.escape(source[last : match.start()]))
+        parts.append(f"(?P<{match.group('name')}>[^/]+)")
+        last = match.end()
+    parts.append(re.escape(source[last:]))
+    return re.compile("".join(parts))
+
+
+def render_version(template: str, versions: dict[str, str]) -> str | None:
+    """Fill ``{version:pkg}``/``{semver:pkg}`` from declared ranges, or None."""
+    missing = False
+
+    def substitute(match: re.Match[str]) -> str:
+        nonlocal missing
+        version = versions.get(match.group("package"))
+        if version is not None and match.group("kind") == "semver":
+            semver = re.search(r"\d+\.\d+\.\d+", version)
+            version = semver.group(0) if semver else None
+        if version is None:
+            missing = True
+            return ""
+        return version
+
+    rendered = _VERSION_REF_RE.sub(substitute, template)
+    return None if missing else rendered
+
+
+def _rule_from_json(data: object, origin: str) -> BarrelRule:
+    if not isinstance(data, dict):
+        raise ValueError(f"{origin}: rule must be an object")
+    known = {item.name for item in fields(BarrelRule)}
+    unknown = sorted(set(data) - known)
+    if unknown:
+        raise ValueError(f"{origin}: unknown rule field(s) {', '.join(unknown)}")
+    for key in ("name", "source", "target"):
+        if not isinstance(data.get(key), str) or not data[key]:
+            raise ValueError(f"{origin}: rule field {key!r} must be a non-empty string")
+    style = data.get("style", "named")
+    if style not in STYLES:
+        raise ValueError(f"{origin}: rule {data['name']!r} has unknown style {style!r}")
+    names = data.get("names")
+    if names is not None:
+        re.compile(names)
+    target_fields = {match.group("name") for match in _PLACEHOLDER_RE.finditer(data["target"])}
+    source_fields = {match.group("name") for match in _PLACEHOLDER_RE.finditer(data["source"])}
+    undefined = sorted(target_fields - source_fields - {"name"})
+    if undefined:
+        raise ValueError(f"{origin}: rule {data['name']!r} target uses undefined {', '.join(undefined)}")
+    return BarrelRule(
+        name=data["name"],
+        source=data["source"],
+        target=data["target"],
+        style=style,
+        names=names,
+        remove_dependencies=tuple(data.get("remove_dependencies", ())),
+        dev_dependencies=tuple(dict(data.get("dev_dependencies", {})).items()),
+    )
+
+
+def load_rules(path: Path, base: tuple[BarrelRule, ...] = DEFAULT_RULES) -> tuple[BarrelRule, ...]:
+    """Return ``base`` extended (or overridden by name) with the rules in ``path``."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    rules = {rule.name: rule for rule in base}
+    for idx, item in enumerate(data):
+        rule = _rule_from_json(item, f"{path}[{idx}]")
+        rules[rule.name] = rule
+    return tuple(rules.values())
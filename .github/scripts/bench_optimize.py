@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""Benchmark feishin_optimize.py against a synthetic Feishin-shaped source tree.
+
+Usage:
+  python .github/scripts/bench_optimize.py --files 10000 --output bench.json
+  python .github/scripts/bench_optimize.py --files 10000 --compare bench.json
+  python .github/scripts/bench_optimize.py --generate-only /tmp/feishin-synth --files 1000
+
+Each entry point runs in its own interpreter on a fresh copy of the tree, so
+its peak RSS is measured in isolation. The figure is the peak of the largest
+single process (the optimizer or one pool worker), not the pool's combined
+footprint: with --jobs N the total can be up to N + 1 times as large. npm
+metadata is served from a fixture in offline mode; no network access is
+needed.
+
+The exit status is 1 when an entry point exceeds its budget in
+TIME_BUDGETS, or, with --compare and --max-slowdown, when it is slower than
+the baseline by more than that percentage.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+ENTRY_POINTS = (
+    "update_react_icon_imports",
+    "update_ipc_idempotency",
+    "update_package_json",
+    "update_electron_vite",
+    "run_transforms",
+    "png_optimize",
+)
+
+# Seconds an entry point may take before the run fails. The full PNG filter
+# search took over a minute on the 1024x1024 icon; the limited one about 7 s.
+TIME_BUDGETS = {"png_optimize": 15.0}
+ICON_SIZE = 1024
+
+ICON_PACKS = {
+    "fa": ["FaPlay", "FaPause", "FaStepForward", "FaStepBackward", "FaHeart", "FaRandom"],
+    "ri": ["RiHeartFill", "RiHeartLine", "RiPlayListLine", "RiSettings2Line", "RiSearchLine"],
+    "lu": ["LuListMusic", "LuDisc3", "LuMic2", "LuRepeat", "LuShuffle", "LuVolume2"],
+    "md": ["MdOutlineQueueMusic", "MdLibraryMusic", "MdExpandMore", "MdClose"],
+}
+
+IPC_CHANNELS = [
+    "settings-get",
+    "password-get",
+    "password-set",
+    "open-file-selector",
+    "player-play",
+    "player-pause",
+    "window-maximize",
+    "lyrics-fetch",
+]
+
+ELECTRON_VITE_CONFIG = """import { resolve } from 'path';
+import { defineConfig, externalizeDepsPlugin } from 'electron-vite';
+import react from '@vitejs/plugin-react';
+
+export default defineConfig({
+    main: {
+        build: {
+            rollupOptions: {
+                external: ['source-map-support'],
+            },
+            sourcemap: true,
+        },
+        plugins: [externalizeDepsPlugin()],
+        resolve: {
+            alias: {
+                '/@/main': resolve('src/main'),
+                '/@/shared': resolve('src/shared'),
+            },
+        },
+    },
+    preload: {
+        build: {
+            sourcemap: true,
+        },
+        plugins: [externalizeDepsPlugin()],
+    },
+    renderer: {
+        build: {
+            minify: 'esbuild',
+            rollupOptions: {
+                input: {
+                    index: resolve('src/renderer/index.html'),
+                },
+            },
+            sourcemap: true,
+        },
+        css: {
+            modules: {
+                generateScopedName: '[name]__[local]__[hash:base64:5]',
+            },
+        },
+        plugins: [react()],
+        resolve: {
+            alias: {
+                '/@/renderer': resolve('src/renderer'),
+                '/@/shared': resolve('src/shared'),
+            },
+        },
+    },
+});
+"""
+
+REMOTE_VITE_CONFIG = """import { resolve } from 'path';
+import react from '@vitejs/plugin-react';
+import { defineConfig } from 'vite';
+
+export default defineConfig({
+    build: {
+        emptyOutDir: true,
+        outDir: resolve(__dirname, './out/remote'),
+        rollupOptions: {
+            input: {
+                favicon: resolve(__dirname, './assets/icons/favicon.ico'),
+                index: resolve(__dirname, './src/remote/index.html'),
+            },
+        },
+        sourcemap: true,
+    },
+    plugins: [react()],
+});
+"""
+
+ELECTRON_BUILDER_YML = """appId: org.jeffvli.feishin
+productName: Feishin
+asarUnpack:
+    - resources/**
+linux:
+    target:
+        - AppImage
+        - deb
+        - tar.xz
+    category: AudioVideo;Audio;Player
+"""
+
+FILLER = """
+export function helper{n}(values: number[]): number {{
+    let total = 0;
+    for (const value of values) {{
+        total += value * {n};
+    }}
+    return total / Math.max(values.length, 1);
+}}
+"""
+
+
+def _icon_import(rng: random.Random) -> str:
+    pack = rng.choice(sorted(ICON_PACKS))
+    names = rng.sample(ICON_PACKS[pack], rng.randint(1, 4))
+    if rng.random() < 0.2:
+        names[0] = f"{names[0]} as {names[0]}Icon"
+    if len(names) > 2 and rng.random() < 0.5:
+        body = "".join(f"    {name},\n" for name in names)
+        return f"import {{\n{body}}} from 'react-icons/{pack}';\n"
+    return f"import {{ {', '.join(names)} }} from 'react-icons/{pack}';\n"
+
+
+def _renderer_file(rng: random.Random, index: int) -> str:
+    parts = ["import { useCallback, useState } from 'react';\n"]
+    if rng.random() < 0.35:
+        for _ in range(rng.randint(1, 2)):
+            parts.append(_icon_import(rng))
+    if rng.random() < 0.05:
+        parts.append("import type { IconType } from 'react-icons';\n")
+    parts.append("import styles from './component.module.css';\n\n")
+    parts.append(
+        f"export const Component{index} = () => {{\n"
+        "    const [state, setState] = useState(0);\n"
+        "    const onClick = useCallback(() => setState((value) => value + 1), []);\n"
+        f"    return <div className={{styles.root}} onClick={{onClick}}>{{state}} {index}</div>;\n"
+        "}};\n"
+    )
+    for n in range(rng.randint(1, 6)):
+        parts.append(FILLER.format(n=n))
+    return "".join(parts)
+
+
+def _main_file(rng: random.Random, index: int) -> str:
+    parts = ["import { ipcMain } from 'electron';\n\n"]
+    for channel in rng.sample(IPC_CHANNELS, rng.randint(1, 4)):
+        method = "handle" if rng.random() < 0.7 else "on"
+        parts.append(f"ipcMain.{method}('{channel}', async (_event, value) => {{\n")
+        parts.append(f"    return value ?? {index};\n")
+        parts.append("});\n\n")
+    parts.append(FILLER.format(n=index))
+    return "".join(parts)
+
+
+def _package_json(rng: random.Random, dependencies: int) -> str:
+    deps = {f"synthetic-dep-{idx:05d}": f"^{rng.randint(0, 20)}.{rng.randint(0, 9)}.0" for idx in range(dependencies)}
+    deps["@react-icons/all-files"] = "^4.1.0"
+    deps["react-icons"] = "^5.4.0"
+    dev_deps = {f"synthetic-dev-{idx:05d}": f"^{rng.randint(0, 20)}.0.0" for idx in range(dependencies // 3)}
+    dev_deps["electron"] = "^39.2.0"
+    dev_deps["vite"] = "^7.1.0"
+    manifest = {
+        "name": "feishin",
+        "version": "0.0.0-synthetic",
+        "main": "./out/main/index.js",
+        "scripts": {"build": "electron-vite build", "package:linux:pr": "electron-builder --linux"},
+        "dependencies": dict(sorted(deps.items())),
+        "devDependencies": dict(sorted(dev_deps.items())),
+    }
+    return json.dumps(manifest, indent=4) + "\n"
+
+
+def _icon_png(size: int, seed: int) -> bytes:
+    """An RGBA gradient with light noise: too many colours for a palette, like an app icon."""
+    rng = random.Random(seed)
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return len(body).to_bytes(4, "big") + kind + body + zlib.crc32(kind + body).to_bytes(4, "big")
+
+    raw = bytearray()
+    for y in range(size):
+        raw.append(0)
+        noise = rng.randbytes(size)
+        raw += bytes(
+            channel
+            for x in range(size)
+            for channel in (x * 255 // size, y * 255 // size, (x + y + (noise[x] & 7)) & 0xFF, 255)
+        )
+    ihdr = size.to_bytes(4, "big") * 2 + bytes((8, 6, 0, 0, 0))
+    return b"".join(
+        (b"\x89PNG\r\n\x1a\n", chunk(b"IHDR", ihdr), chunk(b"IDAT", zlib.compress(bytes(raw), 1)), chunk(b"IEND", b""))
+    )
+
+
+def generate_tree(root: Path, files: int, seed: int = 0) -> dict:
+    """Write a reproducible synthetic Feishin checkout with ``files`` sources under src/."""
+    rng = random.Random(seed)
+    main_files = max(1, files // 20)
+    preload_files = max(1, files // 50)
+    renderer_files = max(1, files - main_files - preload_files)
+    module_files = max(1, files // 4)
+
+    def write(relpath: str, content: str) -> None:
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    for idx in range(main_files):
+        write(f"src/main/features/f{idx // 50}/handler{idx}.ts", _main_file(rng, idx))
+    for idx in range(preload_files):
+        write(f"src/preload/api{idx}.ts", f"export const api{idx} = {{ value: {idx} }};\n")
+    for idx in range(renderer_files):
+        suffix = ".tsx" if rng.random() < 0.8 else ".ts"
+        write(f"src/renderer/features/f{idx // 100}/components/c{idx}{suffix}", _renderer_file(rng, idx))
+    for idx in range(module_files):
+        write(f"node_modules/synthetic-dep-{idx // 40:05d}/src/m{idx}.ts", _renderer_file(rng, idx))
+
+    write("package.json", _package_json(rng, dependencies=max(200, files // 5)))
+    write("electron.vite.config.ts", ELECTRON_VITE_CONFIG)
+    write("remote.vite.config.ts", REMOTE_VITE_CONFIG)
+    write("electron-builder.yml", ELECTRON_BUILDER_YML)
+    icon = root / "assets/icons/icon.png"
+    icon.parent.mkdir(parents=True, exist_ok=True)
+    icon.write_bytes(_icon_png(ICON_SIZE, seed))
+    return {
+        "files": files,
+        "seed": seed,
+        "main_files": main_files,
+        "preload_files": preload_files,
+        "renderer_files": renderer_files,
+        "node_modules_files": module_files,
+        "icon_pixels": ICON_SIZE * ICON_SIZE,
+    }
+
+
+def _write_npm_fixture(cache_dir: Path) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    versions = {f"7.{minor}.{patch}": {} for minor in range(4) for patch in range(12)}
+    (cache_dir / "rolldown-vite.json").write_text(
+        json.dumps({"name": "rolldown-vite", "versions": versions}), encoding="utf-8"
+    )
+
+
+def _measure(entry: str, root: Path, jobs: int | None) -> dict:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import feishin_optimize
+    import png_optimize
+
+    started = time.perf_counter()
+    if entry == "png_optimize":
+        png_optimize.process_file(str(root / "assets/icons/icon.png"))
+    elif entry == "update_react_icon_imports":
+        feishin_optimize.update_react_icon_imports(root, jobs=jobs)
+    elif entry == "update_ipc_idempotency":
+        feishin_optimize.update_ipc_idempotency(root, jobs=jobs)
+    elif entry == "update_package_json":
+        feishin_optimize.update_package_json(root / "package.json")
+    elif entry == "update_electron_vite":
+        feishin_optimize.update_electron_vite(root / "electron.vite.config.ts")
+    else:
+        feishin_optimize.run_transforms(root, jobs=jobs)
+    seconds = time.perf_counter() - started
+    # ru_maxrss of RUSAGE_CHILDREN is the largest single worker, not a sum.
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {"seconds": seconds, "peak_rss_kb": peak_kb}
+
+
+def _count_candidates(entry: str, layout: dict) -> int:
+    if entry in ("update_package_json", "update_electron_vite", "png_optimize"):
+        return 1
+    if entry == "update_ipc_idempotency":
+        return layout["main_files"]
+    return layout["main_files"] + layout["preload_files"] + layout["renderer_files"]
+
+
+def run_benchmark(
+    files: int, seed: int, repeat: int, jobs: int | None, workdir: Path, entries: list[str]
+) -> dict:
+    template = workdir / "template"
+    layout = generate_tree(template, files, seed)
+    npm_cache = workdir / "npm"
+    _write_npm_fixture(npm_cache)
+    env = dict(os.environ, FEISHIN_NPM_OFFLINE="1", FEISHIN_NPM_CACHE=str(npm_cache))
+
+    results = {}
+    for entry in entries:
+        runs = []
+        for attempt in range(repeat):
+            tree = workdir / f"run-{entry}-{attempt}"
+            shutil.copytree(template, tree, symlinks=True)
+            command = [sys.executable, __file__, "--measure", entry, str(tree)]
+            if jobs:
+                command += ["--jobs", str(jobs)]
+            output = subprocess.run(command, check=True, capture_output=True, text=True, env=env)
+            runs.append(json.loads(output.stdout))
+            shutil.rmtree(tree)
+        best = min(runs, key=lambda run: run["seconds"])
+        candidates = _count_candidates(entry, layout)
+        results[entry] = {
+            "seconds": best["seconds"],
+            "files": candidates,
+            "files_per_second": candidates / best["seconds"] if best["seconds"] else None,
+            "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+            "runs": [run["seconds"] for run in runs],
+        }
+    return {
+        "tree": layout,
+        "repeat": repeat,
+        "jobs": jobs or os.cpu_count(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def check_budgets(data: dict, baseline: dict | None, max_slowdown: float | None) -> list[str]:
+    """Entry points over their TIME_BUDGETS budget or slower than ``baseline`` by over ``max_slowdown`` %."""
+    failures = []
+    for entry, result in data["results"].items():
+        budget = TIME_BUDGETS.get(entry)
+        if budget is not None and result["seconds"] > budget:
+            failures.append(f"{entry}: {result['seconds']:.2f} s exceeds the {budget:.0f} s budget")
+        previous = (baseline or {}).get("results", {}).get(entry)
+        if max_slowdown is not None and previous and previous.get("seconds"):
+            change = (result["seconds"] - previous["seconds"]) / previous["seconds"] * 100
+            if change > max_slowdown:
+                failures.append(f"{entry}: {change:+.1f}% vs baseline exceeds --max-slowdown {max_slowdown:g}%")
+    return failures
+
+
+def _print_results(data: dict, baseline: dict | None) -> None:
+    for entry, result in data["results"].items():
+        line = (
+            f"{entry:28} {result['seconds'] * 1000:10.1f} ms "
+            f"{result['files_per_second'] or 0:12.0f} files/s "
+            f"{result['peak_rss_kb'] / 1024:8.1f} MiB peak (largest process)"
+        )
+        previous = (baseline or {}).get("results", {}).get(entry)
+        if previous and previous.get("seconds"):
+            change = (result["seconds"] - previous["seconds"]) / previous["seconds"] * 100
+            line += f"  {change:+6.1f}% vs baseline"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1000, help="Source files to generate under src/")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point; the fastest is kept")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes passed to the optimizer")
+    parser.add_argument("--entry", action="append", choices=ENTRY_POINTS, help="Entry point(s) to time")
+    parser.add_argument("--workdir", type=Path, default=None, help="Scratch directory (default: temp dir)")
+    parser.add_argument("--output", type=Path, default=None, help="Write results JSON here")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare with")
+    parser.add_argument(
+        "--max-slowdown", type=float, default=None, metavar="PCT", help="Fail if an entry is PCT%% slower than --compare"
+    )
+    parser.add_argument("--generate-only", type=Path, default=None, metavar="DIR", help="Only generate a tree")
+    parser.add_argument("--measure", nargs=2, metavar=("ENTRY", "ROOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        entry, root = args.measure
+        print(json.dumps(_measure(entry, Path(root), args.jobs)))
+        return 0
+    if args.generate_only:
+        print(json.dumps(generate_tree(args.generate_only, args.files, args.seed), indent=2))
+        return 0
+
+    entries = args.entry or list(ENTRY_POINTS)
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+        data = run_benchmark(args.files, args.seed, args.repeat, args.jobs, args.workdir, entries)
+    else:
+        with tempfile.TemporaryDirectory(prefix="feishin-bench-") as workdir:
+            data = run_benchmark(args.files, args.seed, args.repeat, args.jobs, Path(workdir), entries)
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    _print_results(data, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    failures = check_budgets(data, baseline, args.max_slowdown)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Describe a finished build in a small build-manifest.json release asset.
+
+Usage:
+  python .github/scripts/build_manifest.py upstream upstream/dist/*.deb \\
+      --output upstream/dist/build-manifest.json
+
+The manifest records the Electron version the app was built against and the
+name, size and sha256 of every release asset, so update_pkgbuild.py can fill
+in the PKGBUILD from a few KB of JSON instead of downloading the .deb::
+
+    {"version": 1, "upstream": {"repo": ..., "tag": ...},
+     "electron": {"version": "39.2.3", "major": "39", "source": "node_modules"},
+     "assets": [{"name": ..., "size": ..., "sha256": ...}]}
+
+The Electron version is read from the installed ``node_modules/electron``
+when present, then from the pnpm lockfile, then from the range declared in
+package.json.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "build-manifest.json"
+CHUNK_SIZE = 1 << 20
+_SEMVER_RE = re.compile(r"\d+\.\d+\.\d+")
+# pnpm v9 "packages:" keys, e.g. "  electron@39.2.3:" (optionally quoted).
+_LOCK_ELECTRON_RE = re.compile(r"^\s+'?/?electron@(\d+\.\d+\.\d+)[(:']", re.MULTILINE)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def electron_version(root: Path) -> tuple[str, str]:
+    """Return ``(version, source)`` for the Electron used by the upstream tree."""
+    try:
+        installed = json.loads((root / "node_modules" / "electron" / "package.json").read_text(encoding="utf-8"))
+        if _SEMVER_RE.fullmatch(installed.get("version", "")):
+            return installed["version"], "node_modules"
+    except (OSError, ValueError):
+        pass
+    try:
+        versions = _LOCK_ELECTRON_RE.findall((root / "pnpm-lock.yaml").read_text(encoding="utf-8"))
+    except OSError:
+        versions = []
+    if len(set(versions)) == 1:
+        return versions[0], "pnpm-lock.yaml"
+    package = json.loads((root / "package.json").read_text(encoding="utf-8"))
+    for section in ("devDependencies", "dependencies"):
+        declared = package.get(section, {}).get("electron")
+        match = _SEMVER_RE.search(declared or "")
+        if match:
+            return match.group(0), "package.json"
+    raise RuntimeError(f"{root}: unable to determine the Electron version")
+
+
+def build_manifest(root: Path, assets: list[Path]) -> dict:
+    version, source = electron_version(root)
+    return {
+        "version": MANIFEST_VERSION,
+        "upstream": {
+            "repo": os.environ.get("UPSTREAM_REPO"),
+            "tag": os.environ.get("UPSTREAM_TAG"),
+        },
+        "electron": {"version": version, "major": version.split(".", 1)[0], "source": source},
+        "assets": [
+            {"name": path.name, "size": path.stat().st_size, "sha256": sha256_file(path)}
+            for path in sorted(assets, key=lambda item: item.name)
+            if path.name != MANIFEST_NAME
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("root", type=Path, help="Upstream checkout the assets were built from")
+    parser.add_argument("assets", nargs="*", type=Path, help="Release asset files")
+    parser.add_argument("--output", type=Path, required=True, help=f"Where to write {MANIFEST_NAME}")
+    args = parser.parse_args()
+
+    try:
+        manifest = build_manifest(args.root, args.assets)
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    args.output.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    print(
+        f"Electron {manifest['electron']['version']} (from {manifest['electron']['source']}), "
+        f"{len(manifest['assets'])} assets"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Chunk graph of a built renderer: what loads on first paint and what is lazy.
+
+Usage:
+  python .github/scripts/chunk_graph.py upstream/out/renderer --output chunk-graph.json
+  python .github/scripts/chunk_graph.py upstream/out/renderer --baseline old-chunk-graph.json
+
+The HTML pages are the entry points. Their scripts, module preloads and
+stylesheets, plus everything those chunks import statically, form the
+initial load. Chunks reached only through dynamic ``import()`` are lazy, and
+chunks nothing refers to are listed as unreferenced. Imports are read from
+the emitted JavaScript (``import ... from "./x.js"``, ``import "./x.js"``,
+``export ... from``, ``import("./x.js")``), so no bundler manifest is
+needed. Sizes are raw and gzip; chunk names have their content hash
+stripped so a baseline from an earlier build lines up.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import posixpath
+import re
+import sys
+import zlib
+from pathlib import Path
+
+from analyze_size import chunk_key
+
+REPORT_VERSION = 1
+_HTML_REF_RE = re.compile(
+    r"<(?:script\b[^>]*?\bsrc|link\b[^>]*?\bhref)\s*=\s*[\"']([^\"']+\.(?:m?js|css))[\"']", re.IGNORECASE
+)
+_STATIC_IMPORT_RE = re.compile(
+    r"""(?:\bimport|\bexport)\s*(?:[\w$*{}\s,]*?\bfrom\s*)?["'](\.{1,2}/[^"'\s]+\.(?:m?js|css))["']"""
+)
+_DYNAMIC_IMPORT_RE = re.compile(r"""\bimport\s*\(\s*["'](\.{1,2}/[^"'\s]+\.m?js)["']\s*\)""")
+_CSS_IMPORT_RE = re.compile(r"""@import\s+(?:url\()?["']?(\.{1,2}/[^"')\s]+\.css)""")
+# Vite's preload list for dynamic imports: paths relative to the build root.
+_MAP_DEPS_RE = re.compile(r"__vite__mapDeps\b[^\[]*?\[([^\]]*)\]")
+_STRING_RE = re.compile(r"""["']([^"']+)["']""")
+
+
+def _gzip_size(data: bytes) -> int:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return len(compressor.compress(data)) + len(compressor.flush())
+
+
+def _resolve(base: str, reference: str) -> str:
+    reference = reference.split("?", 1)[0].split("#", 1)[0]
+    if reference.startswith("/"):
+        return posixpath.normpath(reference.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), reference))
+
+
+def scan(root: Path) -> tuple[list[str], dict[str, dict]]:
+    """Return the entry chunks and, per chunk, its sizes and import edges."""
+    entries: list[str] = []
+    chunks: dict[str, dict] = {}
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix not in (".html", ".js", ".mjs", ".css"):
+            continue
+        relpath = path.relative_to(root).as_posix()
+        data = path.read_bytes()
+        text = data.decode("utf-8", "replace")
+        if path.suffix == ".html":
+            entries.extend(_resolve(relpath, ref) for ref in _HTML_REF_RE.findall(text))
+            continue
+        if path.suffix == ".css":
+            static = _CSS_IMPORT_RE.findall(text)
+            dynamic = []
+        else:
+            static = _STATIC_IMPORT_RE.findall(text)
+            dynamic = _DYNAMIC_IMPORT_RE.findall(text)
+        preloads = [
+            posixpath.normpath(ref.removeprefix("./").lstrip("/"))
+            for deps in _MAP_DEPS_RE.findall(text)
+            for ref in _STRING_RE.findall(deps)
+        ]
+        chunks[relpath] = {
+            "raw": len(data),
+            "gzip": _gzip_size(data),
+            "imports": sorted({_resolve(relpath, ref) for ref in static}),
+            "dynamic_imports": sorted({_resolve(relpath, ref) for ref in dynamic} | set(preloads)),
+        }
+    return list(dict.fromkeys(entries)), chunks
+
+
+def _closure(start: list[str], chunks: dict[str, dict], edges: tuple[str, ...]) -> set[str]:
+    seen: set[str] = set()
+    stack = [chunk for chunk in start if chunk in chunks]
+    while stack:
+        chunk = stack.pop()
+        if chunk in seen:
+            continue
+        seen.add(chunk)
+        for edge in edges:
+            stack.extend(target for target in chunks[chunk][edge] if target in chunks)
+    return seen
+
+
+def build_report(root: Path) -> dict:
+    entries, chunks = scan(root)
+    initial = _closure(entries, chunks, ("imports",))
+    reachable = _closure(entries, chunks, ("imports", "dynamic_imports"))
+    totals = {"initial": {"raw": 0, "gzip": 0}, "lazy": {"raw": 0, "gzip": 0}, "unreferenced": {"raw": 0, "gzip": 0}}
+    for name, chunk in chunks.items():
+        chunk["load"] = "initial" if name in initial else "lazy" if name in reachable else "unreferenced"
+        for metric in ("raw", "gzip"):
+            totals[chunk["load"]][metric] += chunk[metric]
+    return {"version": REPORT_VERSION, "entries": entries, "totals": totals, "chunks": chunks}
+
+
+def _group(report: dict, load: str) -> dict[str, dict[str, int]]:
+    grouped: dict[str, dict[str, int]] = {}
+    for name, chunk in report["chunks"].items():
+        if chunk["load"] == load:
+            sizes = grouped.setdefault(chunk_key(name), {"raw": 0, "gzip": 0})
+            sizes["raw"] += chunk["raw"]
+            sizes["gzip"] += chunk["gzip"]
+    return grouped
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
+
+
+def _change(value: int, previous: int | None) -> str:
+    if not previous:
+        return ""
+    return f"  {value - previous:+,d} B ({(value - previous) / previous:+.1%})"
+
+
+def render_text(report: dict, baseline: dict | None) -> str:
+    lines = [f"entries: {', '.join(report['entries']) or '-'}"]
+    for load in ("initial", "lazy", "unreferenced"):
+        total = report["totals"][load]
+        previous = (baseline or {}).get("totals", {}).get(load, {})
+        lines.append(
+            f"{load}: {_kib(total['raw'])} raw, {_kib(total['gzip'])} gzip"
+            f"{_change(total['gzip'], previous.get('gzip'))}"
+        )
+        grouped = sorted(_group(report, load).items(), key=lambda item: item[1]["raw"], reverse=True)
+        for name, sizes in grouped:
+            lines.append(f"  {name:<60} {_kib(sizes['raw']):>12} {_kib(sizes['gzip']):>12}")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("root", type=Path, help="Renderer build output (out/renderer)")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier JSON report to compare with")
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        print(f"{args.root}: not a directory", file=sys.stderr)
+        return 2
+    report = build_report(args.root)
+    if not report["entries"]:
+        print(f"{args.root}: no HTML entry points found", file=sys.stderr)
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    sys.stdout.write(render_text(report, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""Streaming access to Debian packages without ``ar``, ``tar`` or a scratch dir.
+
+A .deb is an ``ar`` archive whose ``data.tar.*`` member holds the payload.
+``iter_data_members`` walks that tarball in stream mode straight out of the
+ar container, decompressing on the fly, so each payload file is seen once,
+in archive order, and nothing is written to disk. gzip, xz and bzip2 use the
+standard library; zstd needs the optional ``zstandard`` package.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import tarfile
+from typing import BinaryIO, Iterator
+
+AR_MAGIC = b"!<arch>\n"
+AR_HEADER_SIZE = 60
+
+
+class DebError(ValueError):
+    pass
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read at most ``size`` bytes of ``handle`` from its current position."""
+
+    def __init__(self, handle: BinaryIO, size: int) -> None:
+        self._handle = handle
+        self.remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        if not self.remaining:
+            return 0
+        view = memoryview(buffer)[: self.remaining]
+        count = self._handle.readinto(view) or 0
+        self.remaining -= count
+        return count
+
+    def skip(self) -> None:
+        if not self.remaining:
+            return
+        if self._handle.seekable():
+            self._handle.seek(self.remaining, io.SEEK_CUR)
+        else:
+            while self.read(1 << 20):
+                pass
+        self.remaining = 0
+
+
+def iter_ar_members(handle: BinaryIO) -> Iterator[tuple[str, int, BinaryIO]]:
+    """Yield ``(name, size, stream)`` for each member; streams are valid until the next one."""
+    if handle.read(len(AR_MAGIC)) != AR_MAGIC:
+        raise DebError("not an ar archive")
+    while True:
+        header = handle.read(AR_HEADER_SIZE)
+        if not header:
+            return
+        if len(header) != AR_HEADER_SIZE or header[58:60] != b"`\n":
+            raise DebError("corrupt ar member header")
+        name = header[:16].decode("ascii", "replace").strip().rstrip("/")
+        size = int(header[48:58].decode("ascii").strip())
+        member = _BoundedReader(handle, size)
+        yield name, size, io.BufferedReader(member, 1 << 16)
+        member.skip()
+        if size % 2:
+            handle.read(1)
+
+
+def _decompressed(name: str, stream: BinaryIO) -> tuple[BinaryIO, str]:
+    if name.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise DebError(f"{name} needs the 'zstandard' package") from exc
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True), "r|"
+    modes = {".gz": "r|gz", ".xz": "r|xz", ".bz2": "r|bz2", ".tar": "r|"}
+    for suffix, mode in modes.items():
+        if name.endswith(suffix):
+            return stream, mode
+    raise DebError(f"unsupported data member {name}")
+
+
+@contextlib.contextmanager
+def open_data_tar(handle: BinaryIO) -> Iterator[tarfile.TarFile]:
+    """Open the package payload as a forward-only TarFile."""
+    for name, _, stream in iter_ar_members(handle):
+        if name.startswith("data.tar"):
+            fileobj, mode = _decompressed(name, stream)
+            with tarfile.open(fileobj=fileobj, mode=mode) as archive:
+                yield archive
+            return
+    raise DebError("no data.tar.* member")
+
+
+def iter_data_members(handle: BinaryIO) -> Iterator[tuple[tarfile.TarInfo, BinaryIO | None]]:
+    """Yield each payload entry with a reader for regular files (None otherwise).
+
+    A reader is only valid until the next entry is requested.
+    """
+    with open_data_tar(handle) as archive:
+        for info in archive:
+            yield info, archive.extractfile(info) if info.isfile() else None
+
+
+def normalize_path(name: str) -> str:
+    return name[2:] if name.startswith("./") else name.lstrip("/")
@@ -0,0 +1,146 @@
+"""Streaming, sha256-verified downloads with resume and a digest-keyed cache.
+
+Files are written in fixed-size chunks while their sha256 is computed, so a
+release .deb never sits in memory. An interrupted transfer leaves a
+``.part`` file that the next attempt resumes with a ``Range`` request; a
+server that ignores the range simply restarts the file. Completed files are
+stored under their digest, so asking again for the same digest is served
+from disk without any network I/O.
+
+Environment overrides:
+  FEISHIN_DOWNLOAD_CACHE  cache directory
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import re
+import time
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_RETRIES = 4
+DEFAULT_TIMEOUT = 30
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-\d+/(?:\d+|\*)")
+# Client errors worth another attempt; any other 4xx is final.
+_RETRY_STATUS = {408, 425, 429}
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get("FEISHIN_DOWNLOAD_CACHE")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, "feishin-optimize", "downloads")
+
+
+def parse_digest(digest: str) -> str:
+    """Return the hex sha256 of a GitHub ``sha256:<hex>`` digest (or bare hex)."""
+    value = digest.split("sha256:", 1)[-1].strip().lower()
+    if not re.fullmatch(r"[0-9a-f]{64}", value):
+        raise DownloadError(f"not a sha256 digest: {digest!r}")
+    return value
+
+
+def _hash_file(path: Path, hasher: hashlib._Hash) -> int:
+    size = 0
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def _resume_offset(resp: http.client.HTTPResponse, offset: int) -> int:
+    """Where the response body starts: ``offset`` for a matching 206, else 0."""
+    if resp.status != 206:
+        return 0
+    match = _CONTENT_RANGE_RE.fullmatch(resp.headers.get("Content-Range", "").strip())
+    if not match or int(match.group(1)) != offset:
+        raise DownloadError(f"unexpected Content-Range {resp.headers.get('Content-Range')!r}")
+    return offset
+
+
+def _transfer(url: str, partial: Path, timeout: float, headers: dict[str, str]) -> str:
+    """Append the rest of ``url`` to ``partial`` and return the file's sha256."""
+    hasher = hashlib.sha256()
+    offset = _hash_file(partial, hasher) if partial.exists() else 0
+    request_headers = dict(headers)
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+    try:
+        resp = urlopen(Request(url, headers=request_headers), timeout=timeout)
+    except HTTPError as exc:
+        if exc.code == 416 and offset:
+            # Nothing left to fetch: the partial file may already be complete.
+            return hasher.hexdigest()
+        raise
+    with resp:
+        start = _resume_offset(resp, offset)
+        if start != offset:
+            hasher = hashlib.sha256()
+        with open(partial, "r+b" if start else "wb") as handle:
+            handle.seek(start)
+            handle.truncate()
+            while chunk := resp.read(CHUNK_SIZE):
+                handle.write(chunk)
+                hasher.update(chunk)
+            expected = resp.headers.get("Content-Length")
+            if expected is not None and handle.tell() != start + int(expected):
+                raise http.client.IncompleteRead(b"", start + int(expected) - handle.tell())
+    return hasher.hexdigest()
+
+
+def download(
+    url: str,
+    digest: str,
+    cache_dir: Path | None = None,
+    retries: int = DEFAULT_RETRIES,
+    timeout: float = DEFAULT_TIMEOUT,
+    headers: dict[str, str] | None = None,
+) -> Path:
+    """Return a local path holding the content of ``url`` whose sha256 is ``digest``.
+
+    Network and short-read failures are retried with exponential backoff,
+    resuming from what was already written. A digest mismatch discards the
+    partial file; it is retried once from scratch if the bad bytes may have
+    come from an earlier attempt.
+    """
+    sha256 = parse_digest(digest)
+    cache_dir = cache_dir or default_cache_dir()
+    target = cache_dir / f"sha256-{sha256}"
+    if target.is_file():
+        return target
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".part")
+
+    attempt = 0
+    while True:
+        resumed = partial.exists() and partial.stat().st_size > 0
+        try:
+            actual = _transfer(url, partial, timeout, headers or {})
+        except HTTPError as exc:
+            if exc.code < 500 and exc.code not in _RETRY_STATUS:
+                raise DownloadError(f"{url}: HTTP {exc.code}") from exc
+            error: Exception = exc
+        except (URLError, OSError, http.client.HTTPException) as exc:
+            error = exc
+        else:
+            if actual == sha256:
+                os.replace(partial, target)
+                return target
+            partial.unlink()
+            if not resumed:
+                raise DownloadError(f"{url}: sha256 {actual} does not match expected {sha256}")
+            error = DownloadError(f"{url}: sha256 mismatch after resuming, restarting")
+        attempt += 1
+        if attempt > retries:
+            raise DownloadError(f"{url}: giving up after {attempt} attempts: {error}") from error
+        time.sleep(min(2 ** attempt, 30))
@@ -7,365 +7,927 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import contextlib
+import difflib
+import hashlib
 import json
+import os
+import posixpath
 import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from pathlib import Path
-from urllib.request import urlopen
-
-REACT_ICON_IMPORT_RE = re.compile(
-    r"^import\s+(?:type\s+)?{\s*(?P<names>[^}]+)\s*}\s*from\s*['\"]react-icons/(?P<pack>[^'\"/]+)['\"];?\s*(?:\/\/.*)?$",
-    re.MULTILINE,
-)
+from typing import Callable, Iterator
+
+import barrel_rules
+import import_graph
+import json_cst
+import npm_registry
+import pkgbuild
+import ts_config
+import ts_imports
+import yaml_config
+
+# Directories that never contain sources we rewrite; pruned at any depth.
+DEFAULT_PRUNE_DIRS = frozenset({".git", ".vite", "dist", "node_modules", "out"})
+
+# Run manifest location relative to the source root; node_modules is pruned
+# from the walk and never packed from its .cache directory.
+MANIFEST_PATH = Path("node_modules", ".cache", "feishin-optimize", "manifest.json")
+MANIFEST_VERSION = 1
+
+# Below this many candidate files the process pool costs more than it saves.
+POOL_MIN_FILES = 64
+
+
+@dataclass
+class PassStats:
+    """Counters for one transform, summed over the files it was offered.
+
+    ``files_visited`` counts every file matching the transform's globs;
+    ``files_opened`` and ``bytes_read`` only the files its rewrite ran on.
+    The run-level totals in RunReport charge each file's read once.
+    ``bytes_written`` only counts files actually written; under --dry-run
+    the size they would have had goes to ``bytes_would_write`` instead.
+    """
+
+    wall_time: float = 0.0
+    files_visited: int = 0
+    files_opened: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    bytes_would_write: int = 0
+    matches: int = 0
+    files_changed: int = 0
+    # Per-rule match counts for passes driven by a rules table.
+    details: dict[str, int] = field(default_factory=dict)
+    # Edits that could not be applied, e.g. a config path that does not exist.
+    warnings: list[str] = field(default_factory=list)
+
+    def merge(self, other: PassStats) -> None:
+        for name, value in vars(other).items():
+            if isinstance(value, dict):
+                totals = getattr(self, name)
+                for key, count in value.items():
+                    totals[key] = totals.get(key, 0) + count
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def count(self, key: str, amount: int = 1) -> None:
+        self.matches += amount
+        self.details[key] = self.details.get(key, 0) + amount
+
+
+@dataclass(frozen=True)
+class SourceTransform:
+    """An in-memory rewrite applied to every file matching one of ``globs``.
+
+    ``rewrite`` receives the file text and the file's PassStats, counts its
+    pattern matches there, and returns the new text. ``needles`` is a cheap
+    bytes prefilter: when set, the transform only runs on files containing at
+    least one of them, so other files are never decoded.
+    """
+
+    name: str
+    globs: tuple[str, ...]
+    rewrite: Callable[[str, PassStats], str]
+    needles: tuple[bytes, ...] = ()
+
+    def applies_to(self, relpath: str) -> bool:
+        return any(_compile_glob(pattern).match(relpath) for pattern in self.globs)
+
+
+TRANSFORMS: dict[str, SourceTransform] = {}
+# Passes that only run when asked for with --enable.
+OPTIONAL_TRANSFORMS: dict[str, SourceTransform] = {}
+
+
+def register_transform(
+    name: str, globs: tuple[str, ...], needles: tuple[bytes, ...] = (), optional: bool = False
+) -> Callable[[Callable[[str, PassStats], str]], Callable[[str, PassStats], str]]:
+    def decorator(func: Callable[[str, PassStats], str]) -> Callable[[str, PassStats], str]:
+        registry = OPTIONAL_TRANSFORMS if optional else TRANSFORMS
+        registry[name] = SourceTransform(name, globs, func, needles)
+        return func
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def _compile_glob(pattern: str) -> re.Pattern[str]:
+    parts = []
+    for token in re.split(r"(\*\*/|\*|\?)", pattern):
+        if token == "**/":
+            parts.append("(?:.*/)?")
+        elif token == "*":
+            parts.append("[^/]*")
+        elif token == "?":
+            parts.append("[^/]")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts) + r"\Z")
+
+
+def iter_source_files(
+    root: Path, prune_dirs: frozenset[str] = DEFAULT_PRUNE_DIRS
+) -> Iterator[tuple[Path, str]]:
+    root_prefix = len(str(root)) + 1
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in prune_dirs]
+        reldir = dirpath[root_prefix:].replace(os.sep, "/")
+        for filename in filenames:
+            relpath = f"{reldir}/{filename}" if reldir else filename
+            yield Path(dirpath, filename), relpath
+
+
+# (size, mtime_ns, sha256) of a file as the optimizer last left it.
+ManifestEntry = tuple[int, int, str]
+
+
+@dataclass
+class FileResult:
+    relpath: str
+    changed: list[str]
+    entry: ManifestEntry
+    stats: dict[str, PassStats]
+    bytes_read: int
+    diff: str = ""
+
+
+def _apply_transforms(
+    path: Path,
+    relpath: str,
+    transforms: tuple[SourceTransform, ...],
+    known_hash: str | None = None,
+    dry_run: bool = False,
+) -> FileResult:
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    bytes_read = len(data)
+    stats = {transform.name: PassStats(files_visited=1) for transform in transforms}
+    changed: list[str] = []
+    diff = ""
+    if digest != known_hash:
+        selected = [
+            transform
+            for transform in transforms
+            if not transform.needles or any(needle in data for needle in transform.needles)
+        ]
+        if selected:
+            original = data.decode("utf-8")
+            content = original
+            for transform in selected:
+                transform_stats = stats[transform.name]
+                transform_stats.files_opened = 1
+                transform_stats.bytes_read = bytes_read
+                started = time.perf_counter()
+                updated = transform.rewrite(content, transform_stats)
+                transform_stats.wall_time += time.perf_counter() - started
+                if updated != content:
+                    changed.append(transform.name)
+                    content = updated
+            if content != original:
+                data = content.encode("utf-8")
+                digest = hashlib.sha256(data).hexdigest()
+                for name in changed:
+                    stats[name].files_changed = 1
+                    if dry_run:
+                        stats[name].bytes_would_write = len(data)
+                    else:
+                        stats[name].bytes_written = len(data)
+                if dry_run:
+                    diff = "".join(
+                        difflib.unified_diff(
+                            original.splitlines(keepends=True),
+                            content.splitlines(keepends=True),
+                            f"a/{relpath}",
+                            f"b/{relpath}",
+                        )
+                    )
+                else:
+                    _write_atomic(path, data)
+    stat = path.stat()
+    return FileResult(relpath, changed, (stat.st_size, stat.st_mtime_ns, digest), stats, bytes_read, diff)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+@dataclass
+class RunManifest:
+    """Record of the files a previous run produced, keyed by path relative to the root.
+
+    The manifest is only trusted when ``rules`` matches the hash of the
+    transforms about to run; otherwise every file is treated as unseen.
+    """
+
+    path: Path
+    rules: str
+    files: dict[str, ManifestEntry] = field(default_factory=dict)
+    previous_rules: str | None = None
+
+    @classmethod
+    def load(cls, path: Path, rules: str) -> RunManifest:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(path, rules)
+        previous_rules = data.get("rules")
+        if data.get("version") != MANIFEST_VERSION or previous_rules != rules:
+            return cls(path, rules, previous_rules=previous_rules)
+        files = {relpath: tuple(entry) for relpath, entry in data.get("files", {}).items()}
+        return cls(path, rules, files, previous_rules)
+
+    def lookup(self, relpath: str, stat: os.stat_result) -> tuple[bool, str | None]:
+        entry = self.files.get(relpath)
+        if entry is None:
+            return False, None
+        return entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns, entry[2]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "rules": self.rules, "files": self.files}
+        _write_atomic(self.path, json.dumps(payload, sort_keys=True).encode("utf-8"))
+
+
+def rules_version(transforms: list[SourceTransform]) -> str:
+    digest = hashlib.sha256(str(MANIFEST_VERSION).encode())
+    for transform in sorted(transforms, key=lambda item: item.name):
+        digest.update(repr((transform.name, transform.globs, transform.needles)).encode())
+        # Rules bound with functools.partial (barrel rules) are part of the output.
+        digest.update(repr(getattr(transform.rewrite, "keywords", None)).encode())
+    # Any edit to this script or a helper module it imports changes what the
+    # transforms produce, so hash their sources too.
+    script_dir = Path(__file__).resolve().parent
+    sources = {
+        Path(module.__file__).resolve()
+        for module in list(sys.modules.values())
+        if getattr(module, "__file__", None)
+    }
+    for source in sorted(path for path in sources if path.parent == script_dir):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+@dataclass
+class RunReport:
+    passes: dict[str, PassStats]
+    wall_time: float = 0.0
+    walk_time: float = 0.0
+    files_visited: int = 0
+    files_opened: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    bytes_would_write: int = 0
+    cache_hits: int = 0
+    diffs: list[str] = field(default_factory=list)
+    dependency_pruning: dict | None = None
+    profile: str | None = None
+    targets: list[str] | None = None
+
+    def files_changed(self, name: str) -> int:
+        return self.passes[name].files_changed
+
+    def to_json(self) -> dict:
+        payload = {key: value for key, value in vars(self).items() if key != "passes"}
+        payload["passes"] = {name: vars(stats) for name, stats in self.passes.items()}
+        return payload
+
+
+def _collect_tasks(
+    root: Path,
+    transforms: list[SourceTransform],
+    prune_dirs: frozenset[str],
+    manifest: RunManifest | None,
+    report: RunReport,
+) -> tuple[list[tuple[Path, str, tuple[SourceTransform, ...], str | None]], dict[str, ManifestEntry]]:
+    tasks = []
+    cached: dict[str, ManifestEntry] = {}
+    for path, relpath in iter_source_files(root, prune_dirs):
+        matching = tuple(transform for transform in transforms if transform.applies_to(relpath))
+        if not matching:
+            continue
+        report.files_visited += 1
+        known_hash = None
+        if manifest is not None:
+            fresh, known_hash = manifest.lookup(relpath, path.stat())
+            if fresh:
+                cached[relpath] = manifest.files[relpath]
+                for transform in matching:
+                    report.passes[transform.name].files_visited += 1
+                continue
+        tasks.append((path, relpath, matching, known_hash))
+    return tasks, cached
+
+
+def run_transforms(
+    root: Path,
+    transforms: list[SourceTransform] | None = None,
+    prune_dirs: frozenset[str] = DEFAULT_PRUNE_DIRS,
+    jobs: int | None = None,
+    verbose: bool = False,
+    manifest: RunManifest | None = None,
+    dry_run: bool = False,
+) -> RunReport:
+    if transforms is None:
+        transforms = list(TRANSFORMS.values())
+    started = time.perf_counter()
+    report = RunReport({transform.name: PassStats() for transform in transforms})
+    tasks, cached = _collect_tasks(root, transforms, prune_dirs, manifest, report)
+    report.walk_time = time.perf_counter() - started
+    report.cache_hits = len(cached)
+
+    entries = dict(cached)
+    jobs = jobs or os.cpu_count() or 1
+    columns = list(zip(*tasks)) or [[], [], [], []]
+    flags = [dry_run] * len(tasks)
+    if jobs <= 1 or len(tasks) < POOL_MIN_FILES:
+        for result in map(_apply_transforms, *columns, flags):
+            _record_result(report, root, result, verbose)
+            entries[result.relpath] = result.entry
+    else:
+        chunksize = max(1, len(tasks) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for result in executor.map(_apply_transforms, *columns, flags, chunksize=chunksize):
+                _record_result(report, root, result, verbose)
+                entries[result.relpath] = result.entry
+
+    if manifest is not None and not dry_run:
+        manifest.files = entries
+        manifest.save()
+    report.wall_time = time.perf_counter() - started
+    return report
+
+
+def check_transforms(
+    root: Path,
+    manifest: RunManifest,
+    transforms: list[SourceTransform] | None = None,
+    prune_dirs: frozenset[str] = DEFAULT_PRUNE_DIRS,
+) -> list[str]:
+    """Return the paths a run would have to open, using only stat calls."""
+    if transforms is None:
+        transforms = list(TRANSFORMS.values())
+    report = RunReport({transform.name: PassStats() for transform in transforms})
+    tasks, _ = _collect_tasks(root, transforms, prune_dirs, manifest, report)
+    return [relpath for _, relpath, _, _ in tasks]
+
+
+def _record_result(report: RunReport, root: Path, result: FileResult, verbose: bool) -> None:
+    report.files_opened += 1
+    report.bytes_read += result.bytes_read
+    if result.changed:
+        # Every pass that changed the file records the same final size.
+        first = result.stats[result.changed[0]]
+        report.bytes_written += first.bytes_written
+        report.bytes_would_write += first.bytes_would_write
+    if result.diff:
+        report.diffs.append(result.diff)
+    for name, stats in result.stats.items():
+        report.passes[name].merge(stats)
+    if verbose:
+        for name in result.changed:
+            print(f"{name}: {root / result.relpath}")
+
+
+def _update_file(path: Path, name: str) -> bool:
+    result = _apply_transforms(path, path.name, (TRANSFORMS[name],))
+    return bool(result.changed)
 
 
 def update_electron_builder(path: Path) -> bool:
-    content = path.read_text(encoding="utf-8")
-    original = content
-    content = content.replace(
-        "asarUnpack:\n    - resources/**\n",
-        "asarUnpack:\n    - resources/**/*.node\n    - resources/**/*.dll\n    - resources/**/*.so\n    - resources/**/*.dylib\n    - node_modules/abstract-socket/**\n",
+    return _update_file(path, "electron-builder.yml")
+
+
+ASAR_UNPACK = [
+    "resources/**/*.node",
+    "resources/**/*.dll",
+    "resources/**/*.so",
+    "resources/**/*.dylib",
+    "node_modules/abstract-socket/**",
+]
+# electron-builder.yml settings per --profile. "fast" builds only the deb the
+# PKGBUILD consumes, uncompressed; blockmaps come from the AppImage target,
+# so none are written. "release" builds RELEASE_TARGETS at maximum compression.
+BUILD_PROFILES = {
+    "fast": {"compression": "store", "targets": ("deb",)},
+    "release": {"compression": "maximum", "targets": None},
+}
+RELEASE_TARGETS = ("AppImage", "deb", "tar.xz")
+APPIMAGE_NOTE = "# consider dropping AppImage when size is a priority"
+
+
+def _edit_yaml(
+    name: str, content: str, stats: PassStats, edit: Callable[[yaml_config.YamlEditor], None]
+) -> str:
+    try:
+        editor = yaml_config.YamlEditor(content)
+    except yaml_config.YamlConfigError as exc:
+        stats.warnings.append(f"{name}: {exc}")
+        return content
+    edit(editor)
+    stats.matches += editor.changes
+    stats.warnings.extend(f"{name}: missing {path}" for path in editor.missing)
+    return editor.text
+
+
+@register_transform("electron-builder.yml", ("electron-builder.yml",))
+def _rewrite_electron_builder(
+    content: str, stats: PassStats, profile: str | None = None, targets: tuple[str, ...] = RELEASE_TARGETS
+) -> str:
+    def edit(config: yaml_config.YamlEditor) -> None:
+        config.replace_item("asarUnpack", "resources/**", ASAR_UNPACK)
+        if profile is not None:
+            settings = BUILD_PROFILES[profile]
+            config.set_items("linux.target", list(settings["targets"] or targets), create_parents=True)
+            config.set("compression", settings["compression"])
+
+    content = _edit_yaml("electron-builder.yml", content, stats, edit)
+    if profile is None and APPIMAGE_NOTE not in content:
+        stats.matches += content.count("- tar.xz\n")
+        content = content.replace("- tar.xz\n", f"- tar.xz\n    {APPIMAGE_NOTE}\n")
+    return content
+
+
+def use_build_profile(profile: str, targets: tuple[str, ...] = RELEASE_TARGETS) -> None:
+    transform = TRANSFORMS["electron-builder.yml"]
+    TRANSFORMS[transform.name] = SourceTransform(
+        transform.name,
+        transform.globs,
+        partial(_rewrite_electron_builder, profile=profile, targets=targets),
+        transform.needles,
     )
-    if "# consider dropping AppImage" not in content:
-        content = content.replace(
-            "- tar.xz\n",
-            "- tar.xz\n    # consider dropping AppImage when size is a priority\n",
-        )
-    if content != original:
-        path.write_text(content, encoding="utf-8")
-        return True
-    return False
+
+
+def build_targets(root: Path) -> list[str] | None:
+    """The Linux targets electron-builder.yml under ``root`` ends up with after the registered pass."""
+    try:
+        content = (root / "electron-builder.yml").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    content = TRANSFORMS["electron-builder.yml"].rewrite(content, PassStats())
+    try:
+        return yaml_config.YamlEditor(content).items("linux.target")
+    except yaml_config.YamlConfigError:
+        return None
 
 
 def update_electron_vite(path: Path) -> bool:
-    content = path.read_text(encoding="utf-8")
-    original = content
-    content = re.sub(r"sourcemap: true", "sourcemap: false", content)
-
-    # Switch to rolldownOptions and ensure renderer input + treeshake exist.
-    content = re.sub(r"rollupOptions", "rolldownOptions", content)
-    if "renderer:" in content and "rolldownOptions:" in content:
-        content = re.sub(
-            r"(renderer:\s*{[\s\S]*?build:\s*{[\s\S]*?minify: 'esbuild',)\s*\n\s*rolldownOptions:\s*{[\s\S]*?}\s*,",
-            r"\1\n            rolldownOptions: {\n                input: {\n                    index: resolve('src/renderer/index.html'),\n                },\n                treeshake: true,\n            },",
-            content,
-            count=1,
-        )
-    if "treeshake:" not in content and "renderer:" in content:
-        content = re.sub(
-            r"(renderer:\s*{[\s\S]*?build:\s*{[\s\S]*?minify: 'esbuild',)",
-            r"\1\n            rolldownOptions: {\n                input: {\n                    index: resolve('src/renderer/index.html'),\n                },\n                treeshake: true,\n            },",
-            content,
-            count=1,
-        )
+    return _update_file(path, "electron.vite.config.ts")
 
-    # Ensure main external includes electron, source-map-support, and x11.
-    content = re.sub(
-        r"external:\s*\[(.*?)\]",
-        lambda m: _ensure_external_list(m.group(0), ["electron", "source-map-support", "x11"]),
-        content,
-        count=1,
-    )
 
-    if content != original:
-        path.write_text(content, encoding="utf-8")
-        return True
-    return False
+ELECTRON_VITE_SECTIONS = ("main", "preload", "renderer")
+ELECTRON_VITE_EXTERNALS = ["electron", "source-map-support", "x11"]
 
 
-def _ensure_external_list(external_line: str, required: list[str]) -> str:
-    if not external_line.endswith("]"):
-        return external_line
-    for name in required:
-        if name not in external_line:
-            external_line = external_line[:-1] + f", '{name}']"
-    return external_line
+def _edit_config(
+    name: str, content: str, stats: PassStats, edit: Callable[[ts_config.ConfigEditor], None]
+) -> str:
+    try:
+        editor = ts_config.ConfigEditor(content)
+    except ts_config.ConfigParseError as exc:
+        stats.warnings.append(f"{name}: {exc}")
+        return content
+    edit(editor)
+    stats.matches += editor.changes
+    stats.warnings.extend(f"{name}: missing {path}" for path in editor.missing)
+    return editor.text
+
+
+@register_transform("electron.vite.config.ts", ("electron.vite.config.ts",))
+def _rewrite_electron_vite(content: str, stats: PassStats) -> str:
+    def edit(config: ts_config.ConfigEditor) -> None:
+        for section in ELECTRON_VITE_SECTIONS:
+            config.rename(f"{section}.build.rollupOptions", "rolldownOptions")
+            config.set(f"{section}.build.sourcemap", "false")
+        config.setdefault(
+            "renderer.build.rolldownOptions.input.index",
+            "resolve('src/renderer/index.html')",
+            create_parents=True,
+        )
+        config.set("renderer.build.rolldownOptions.treeshake", "true", create_parents=True)
+        config.ensure_items("main.build.rolldownOptions.external", ELECTRON_VITE_EXTERNALS)
 
+    return _edit_config("electron.vite.config.ts", content, stats, edit)
 
-def update_remote_vite(path: Path) -> bool:
-    content = path.read_text(encoding="utf-8")
-    original = content
-    content = re.sub(r"sourcemap: true", "sourcemap: false", content)
 
-    # Switch to rolldownOptions for Vite 7.x usage.
-    content = re.sub(r"rollupOptions", "rolldownOptions", content)
+# Folded into the main and preload bundles at build time; the launcher
+# (iipython-feishin-electron.sh) exports the same values, so development-only
+# branches are dropped without changing what runs. Existing entries win.
+MAIN_DEFINES = {"process.env.NODE_ENV": "production", "process.env.ELECTRON_IS_DEV": "0"}
+MAIN_SECTIONS = ("main", "preload")
+# Node builtins an external list may name besides electron.
+NODE_BUILTINS = frozenset(
+    {"child_process", "crypto", "dns", "events", "fs", "http", "https", "module", "net", "os", "path",
+     "stream", "tls", "url", "util", "worker_threads", "zlib"}
+)
 
-    if content != original:
-        path.write_text(content, encoding="utf-8")
-        return True
-    return False
 
+@register_transform("main minify", ("electron.vite.config.ts",))
+def _rewrite_main_minify(content: str, stats: PassStats) -> str:
+    """Minify, constant-fold and tree-shake the main and preload bundles."""
 
-def _resolve_react_icons_version(data: dict) -> str | None:
-    for section in ("dependencies", "devDependencies"):
-        deps = data.get(section, {})
-        if "react-icons" in deps:
-            return deps["react-icons"]
-    return None
+    def edit(config: ts_config.ConfigEditor) -> None:
+        for section in MAIN_SECTIONS:
+            config.setdefault(f"{section}.build.minify", "true", create_parents=True)
+            config.set(f"{section}.build.rolldownOptions.treeshake", "true", create_parents=True)
+            for key, value in MAIN_DEFINES.items():
+                config.set_key(
+                    f"{section}.define", key, f"JSON.stringify({_js_string(value)})", create_parents=True, overwrite=False
+                )
+
+    return _edit_config("electron.vite.config.ts", content, stats, edit)
 
 
-def _extract_semver(version: str) -> str | None:
-    match = re.search(r"\d+\.\d+\.\d+", version)
-    if match:
-        return match.group(0)
+def main_externals(root: Path) -> list[str] | None:
+    """The string entries of the main build's ``external`` list, or None when it has none."""
+    try:
+        config = ts_config.ConfigEditor((root / "electron.vite.config.ts").read_text(encoding="utf-8"))
+    except (OSError, ts_config.ConfigParseError):
+        return None
+    for options in ("rolldownOptions", "rollupOptions"):
+        elements = config.elements(f"main.build.{options}.external")
+        if elements is not None:
+            return [element[1:-1] for element in elements if element[:1] in ("'", '"') and element[-1:] == element[0]]
     return None
 
 
-def _find_object_end(text: str, start: int) -> int | None:
-    depth = 0
-    in_string = False
-    escape = False
-    for idx in range(start, len(text)):
-        char = text[idx]
-        if in_string:
-            if escape:
-                escape = False
-            elif char == "\\":
-                escape = True
-            elif char == "\"":
-                in_string = False
+def check_externals(root: Path) -> list[str]:
+    """Problems with the main ``external`` list: entries app.asar will not be able to require."""
+    externals = main_externals(root)
+    if externals is None:
+        return ["electron.vite.config.ts: main build has no external list"]
+    try:
+        manifest = json.loads((root / "package.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        return [f"package.json: {exc}"]
+    shipped = set(manifest.get("dependencies", {})) | set(manifest.get("optionalDependencies", {}))
+    problems = []
+    for external in externals:
+        name = import_graph.package_name(external)
+        if name is None or name == "electron" or name in NODE_BUILTINS:
             continue
-        if char == "\"":
-            in_string = True
+        # Undeclared but installed: shipped as another dependency's dependency.
+        if name in shipped or (name not in manifest.get("devDependencies", {}) and (root / "node_modules" / name).is_dir()):
             continue
-        if char == "{":
-            depth += 1
-        elif char == "}":
-            depth -= 1
-            if depth == 0:
-                return idx
-    return None
+        where = "only a devDependency" if name in manifest.get("devDependencies", {}) else "not a dependency"
+        problems.append(f"electron.vite.config.ts: external {external!r} is {where}, so app.asar cannot require it")
+    return problems
+
+
+# Heavy renderer vendor packages that can be split out of the entry chunk,
+# package -> chunk name. A group chunk loads as soon as any of its members is
+# needed, so only packages the renderer reaches through dynamic import()
+# alone get a group (see lazy_renderer_chunks); splitting first-paint
+# packages such as react or @mantine/core only adds requests to the initial
+# load. Packages sharing a chunk name land in the same chunk.
+RENDERER_CHUNKS = {
+    "ag-grid-community": "ag-grid",
+    "ag-grid-react": "ag-grid",
+    "@mantine/dates": "mantine-dates",
+    "framer-motion": "motion",
+    "lodash": "lodash",
+}
+RENDERER_ENTRY_HTML = "src/renderer/index.html"
+_HTML_SCRIPT_RE = re.compile(r"""<script\b[^>]*?\bsrc\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+RENDERER_CHUNK_GROUPS_PATH = "renderer.build.rolldownOptions.output.advancedChunks.groups"
+
+
+def load_renderer_chunks(path: Path) -> dict[str, str]:
+    """Read a ``{"package": "chunk name"}`` JSON mapping."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not all(
+        isinstance(key, str) and isinstance(value, str) and key and value for key, value in data.items()
+    ):
+        raise ValueError(f"{path}: expected an object mapping package names to chunk names")
+    return data
+
+
+def _package_pattern(package: str) -> str:
+    return "[\\\\/]".join(re.sub(r"[.*+?^${}()|[\]\\]", r"\\\g<0>", part) for part in package.split("/"))
+
+
+def _chunk_groups(chunks: dict[str, str]) -> list[tuple[str, str]]:
+    """``(name, group object source)`` per chunk, in first-mention order."""
+    packages: dict[str, list[str]] = {}
+    for package, chunk in chunks.items():
+        packages.setdefault(chunk, []).append(package)
+    groups = []
+    for chunk, members in packages.items():
+        alternatives = "|".join(_package_pattern(package) for package in sorted(members))
+        test = f"/[\\\\/]node_modules[\\\\/](?:{alternatives})[\\\\/]/"
+        groups.append((chunk, f"{{ name: {_js_string(chunk)}, test: {test} }}"))
+    return groups
+
+
+@register_transform("renderer chunks", ("electron.vite.config.ts",))
+def _rewrite_renderer_chunks(
+    content: str, stats: PassStats, chunks: tuple[tuple[str, str], ...] = tuple(RENDERER_CHUNKS.items())
+) -> str:
+    """Split heavy renderer vendor packages into named chunks (rolldown advancedChunks)."""
+
+    def edit(config: ts_config.ConfigEditor) -> None:
+        if config.exists("renderer.build.rolldownOptions.output.manualChunks"):
+            stats.warnings.append("electron.vite.config.ts: renderer already sets manualChunks, groups not added")
+            return
+        present = set()
+        for element in config.elements(RENDERER_CHUNK_GROUPS_PATH) or []:
+            match = re.search(r"\bname\s*:\s*(['\"])(.*?)\1", element)
+            if match:
+                present.add(match.group(2))
+        groups = [source for name, source in _chunk_groups(dict(chunks)) if name not in present]
+        if not groups:
+            return
+        config.setdefault(RENDERER_CHUNK_GROUPS_PATH, "[]", create_parents=True)
+        config.append(RENDERER_CHUNK_GROUPS_PATH, groups)
+
+    return _edit_config("electron.vite.config.ts", content, stats, edit)
+
+
+def lazy_renderer_chunks(
+    root: Path, chunks: dict[str, str], jobs: int | None = None, use_cache: bool = True
+) -> tuple[dict[str, str], list[str]]:
+    """The entries of ``chunks`` whose package the renderer only imports lazily.
+
+    The renderer's entry scripts come from RENDERER_ENTRY_HTML. A package
+    imported statically from anything they load is on the first-paint path
+    and is dropped with a note, as are packages the renderer never imports.
+    Without entry scripts nothing can be classified and no group is kept.
+    """
+    html_path = root / RENDERER_ENTRY_HTML
+    try:
+        html = html_path.read_text(encoding="utf-8")
+    except OSError:
+        return {}, [f"{RENDERER_ENTRY_HTML} not found; no renderer chunk groups added"]
+    graph = import_graph.build_graph(
+        root,
+        RUNTIME_SOURCE_DIRS + BUNDLED_SOURCE_DIRS,
+        aliases=import_graph.load_vite_aliases(root / "electron.vite.config.ts"),
+        jobs=jobs,
+        cache_path=root / IMPORT_GRAPH_CACHE_PATH if use_cache else None,
+    )
+    base = posixpath.dirname(RENDERER_ENTRY_HTML)
+    entries = [
+        posixpath.normpath(posixpath.join(base, src.split("?", 1)[0].lstrip("/")))
+        for src in _HTML_SCRIPT_RE.findall(html)
+    ]
+    entries = [entry for entry in entries if entry in graph.modules]
+    if not entries:
+        return {}, [f"{RENDERER_ENTRY_HTML} loads no renderer source; no renderer chunk groups added"]
+    eager = graph.packages(entries, eager_only=True)
+    lazy = graph.packages(entries, runtime_only=True)
+    kept: dict[str, str] = {}
+    notes = []
+    for package, chunk in chunks.items():
+        if package in eager:
+            example = sorted(eager[package])[0]
+            notes.append(f"renderer chunks: {package} is loaded on first paint ({example}); not split out")
+        elif package in lazy:
+            kept[package] = chunk
+    return kept, notes
+
+
+def use_renderer_chunks(chunks: dict[str, str]) -> None:
+    transform = TRANSFORMS["renderer chunks"]
+    TRANSFORMS[transform.name] = SourceTransform(
+        transform.name,
+        transform.globs,
+        partial(_rewrite_renderer_chunks, chunks=tuple(chunks.items())),
+        transform.needles,
+    )
 
 
-def _insert_dependency(text: str, name: str, version: str) -> tuple[str, bool]:
-    match = re.search(r"\"dependencies\"\s*:\s*{", text)
-    if not match:
-        return text, False
-    object_start = text.find("{", match.end() - 1)
-    if object_start == -1:
-        return text, False
-    object_end = _find_object_end(text, object_start)
-    if object_end is None:
-        return text, False
-
-    before = text[:object_start + 1]
-    body = text[object_start + 1 : object_end]
-    after = text[object_end:]
-
-    dep_line_match = re.search(r"\n(\s*)\"dependencies\"", text[:object_start])
-    base_indent = dep_line_match.group(1) if dep_line_match else ""
-    entry_indent_match = re.search(r"\n(\s*)\"[^\"]+\"\s*:", body)
-    if entry_indent_match:
-        item_indent = entry_indent_match.group(1)
-    else:
-        item_indent = base_indent + "  "
-
-    body_stripped = body.strip()
-    if body_stripped:
-        needs_comma = not body_stripped.rstrip().endswith(",")
-        separator = "," if needs_comma else ""
-        insertion = f"{separator}\n{item_indent}\"{name}\": \"{version}\""
-        new_body = body.rstrip() + insertion + "\n" + base_indent
-    else:
-        new_body = f"\n{item_indent}\"{name}\": \"{version}\"\n{base_indent}"
-    return before + new_body + after, True
+# Strings electron-vite's bytecodePlugin keeps out of the compiled bytecode's
+# plain-text constant pool (its ``protectedStrings`` option).
+BYTECODE_PROTECTED_STRINGS: list[str] = []
+BYTECODE_SECTIONS = ("main", "preload")
+# Arch's electronNN packages record their full version here.
+SYSTEM_ELECTRON_VERSION_FILE = "/usr/lib/electron{major}/version"
+EXACT_VERSION_RE = re.compile(r"\d+\.\d+\.\d+(?:-[\w.]+)?")
 
 
-def _remove_dependency(text: str, section: str, name: str) -> tuple[str, bool]:
-    pattern = rf"(\"{re.escape(section)}\"\\s*:\\s*{{)(?P<body>.*?)(\\s*}})"
-    match = re.search(pattern, text, flags=re.DOTALL)
-    if not match:
-        return text, False
+def _js_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
-    body = match.group("body")
-    lines = body.splitlines()
-    removed = False
-    new_lines = []
-    entry_pattern = re.compile(rf"\\s*\"{re.escape(name)}\"\\s*:")
 
-    for line in lines:
-        if entry_pattern.match(line):
-            removed = True
-            continue
-        new_lines.append(line)
-
-    if removed:
-        for i in range(len(new_lines) - 1, -1, -1):
-            if new_lines[i].strip():
-                new_lines[i] = re.sub(r",\\s*$", "", new_lines[i])
-                break
-        new_body = "\n".join(new_lines)
-        updated = text[: match.start("body")] + new_body + text[match.end("body") :]
-        return updated, True
+@register_transform("bytecode", ("electron.vite.config.ts",), optional=True)
+def _rewrite_electron_vite_bytecode(
+    content: str, stats: PassStats, protected_strings: tuple[str, ...] = tuple(BYTECODE_PROTECTED_STRINGS)
+) -> str:
+    """Compile the main and preload bundles to V8 bytecode at build time.
 
-    return text, False
-
-
-def _force_remove_dependency(text: str, section: str, name: str) -> tuple[str, bool]:
-    pattern = rf"(\"{re.escape(section)}\"\\s*:\\s*{{)(?P<body>.*?)(\\s*}})"
-    match = re.search(pattern, text, flags=re.DOTALL)
-    if not match:
-        return text, False
+    V8 rejects bytecode cached by any other V8 build, and Electron patch
+    releases change the V8 build, so main() refuses to enable this pass
+    unless the system Electron version matches the one the upstream tree
+    builds with exactly, and unless the PKGBUILD's ``depends`` pins that
+    version (``electron39=39.2.3``), so pacman never upgrades the system
+    Electron under the cached bytecode. The package must be rebuilt for every
+    Electron update, including patch updates of the same major.
+    """
+    if protected_strings:
+        plugin = f"bytecodePlugin({{ protectedStrings: [{', '.join(map(_js_string, protected_strings))}] }})"
+    else:
+        plugin = "bytecodePlugin()"
+
+    def edit(config: ts_config.ConfigEditor) -> None:
+        for section in BYTECODE_SECTIONS:
+            config.ensure_calls(f"{section}.plugins", [plugin])
+
+    content = _edit_config("electron.vite.config.ts", content, stats, edit)
+    if "bytecodePlugin(" in content:
+        updated = ts_imports.ensure_named_import(content, "electron-vite", "bytecodePlugin")
+        stats.matches += updated != content
+        content = updated
+    return content
+
+
+def use_bytecode_protected_strings(strings: tuple[str, ...]) -> None:
+    transform = OPTIONAL_TRANSFORMS["bytecode"]
+    OPTIONAL_TRANSFORMS[transform.name] = SourceTransform(
+        transform.name,
+        transform.globs,
+        partial(_rewrite_electron_vite_bytecode, protected_strings=strings),
+        transform.needles,
+    )
 
-    body = match.group("body")
-    lines = body.splitlines()
-    removed = False
-    new_lines = []
-    entry_pattern = re.compile(rf"\\s*\"{re.escape(name)}\"\\s*:")
 
-    for line in lines:
-        if entry_pattern.match(line):
-            removed = True
-            continue
-        new_lines.append(line)
+def _electron_version(root: Path) -> str | None:
+    """The exact Electron version the upstream tree builds with (installed, else pinned)."""
+    installed = root / "node_modules" / "electron" / "package.json"
+    try:
+        version = json.loads(installed.read_text(encoding="utf-8")).get("version")
+    except (OSError, ValueError, AttributeError):
+        version = None
+    if isinstance(version, str) and EXACT_VERSION_RE.fullmatch(version):
+        return version
+    try:
+        manifest = json.loads((root / "package.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    for section in ("devDependencies", "dependencies"):
+        declared = manifest.get(section, {}).get("electron") if isinstance(manifest, dict) else None
+        # A range such as ^39.2.0 does not say which build pnpm will install.
+        if isinstance(declared, str) and EXACT_VERSION_RE.fullmatch(declared.strip()):
+            return declared.strip()
+    return None
 
-    if not removed:
-        return text, False
 
-    for i in range(len(new_lines) - 1, -1, -1):
-        if new_lines[i].strip():
-            new_lines[i] = re.sub(r",\\s*$", "", new_lines[i])
-            break
+def _system_electron_version(pkgbuild_path: Path) -> tuple[str | None, str]:
+    """The exact version of the Electron the package runs on, and where it came from."""
+    try:
+        config = pkgbuild.Pkgbuild.load(pkgbuild_path)
+    except (OSError, pkgbuild.PkgbuildError) as exc:
+        return None, f"cannot read {pkgbuild_path}: {exc}"
+    major = config.get("_electronversion")
+    if not isinstance(major, str) or not major:
+        return None, f"{pkgbuild_path} does not set _electronversion"
+    pinned = config.get("_electronpkgver")
+    if isinstance(pinned, str) and pinned:
+        return pinned.split("-")[0], f"_electronpkgver in {pkgbuild_path}"
+    version_file = Path(SYSTEM_ELECTRON_VERSION_FILE.format(major=major))
+    try:
+        return version_file.read_text(encoding="utf-8").strip().lstrip("v"), str(version_file)
+    except OSError:
+        return None, f"{version_file} not found and {pkgbuild_path} does not set _electronpkgver"
+
+
+def _electron_dependency_pin(pkgbuild_path: Path) -> tuple[str, str | None]:
+    """The PKGBUILD's Electron dependency and the exact version ``depends`` pins it to, if any."""
+    config = pkgbuild.Pkgbuild.load(pkgbuild_path)
+    name = f"electron{config.get('_electronversion')}"
+    depends = config.get("depends") or []
+    for dependency in [depends] if isinstance(depends, str) else depends:
+        match = re.fullmatch(r"(?P<name>[^<>=]+)(?P<op>[<>]?=|[<>])?(?P<version>.*)", dependency)
+        if match and match.group("name") == name:
+            # pacman's ``=`` without a pkgrel matches every pkgrel of that version.
+            pinned = match.group("version").split("-")[0] if match.group("op") == "=" else None
+            return name, pinned
+    return name, None
+
+
+def bytecode_electron_mismatch(root: Path, pkgbuild_path: Path) -> str | None:
+    """Why bytecode built from ``root`` would not load on the packaged Electron, or None."""
+    built_with = _electron_version(root)
+    if built_with is None:
+        return f"cannot tell which exact Electron version {root} builds with"
+    system, source = _system_electron_version(pkgbuild_path)
+    if system is None:
+        return source
+    if built_with != system:
+        return f"upstream builds with Electron {built_with} but the package runs on Electron {system} ({source})"
+    name, pinned = _electron_dependency_pin(pkgbuild_path)
+    if pinned != system:
+        return (
+            f"{pkgbuild_path} must pin depends to {name}={system} (found {f'{name}={pinned}' if pinned else name}); "
+            "an Electron update would otherwise make the cached bytecode fail to load"
+        )
+    return None
 
-    new_body = "\n".join(new_lines)
-    updated = text[: match.start("body")] + new_body + text[match.end("body") :]
-    return updated, True
 
+def update_remote_vite(path: Path) -> bool:
+    return _update_file(path, "remote.vite.config.ts")
 
-def _remove_dependency_line(text: str, name: str) -> tuple[str, bool]:
-    pattern = rf"^\s*\"{re.escape(name)}\"\s*:\s*\"[^\"]+\"\s*,?\s*\n"
-    updated, count = re.subn(pattern, "", text, flags=re.MULTILINE)
-    return updated, count > 0
 
+@register_transform("remote.vite.config.ts", ("remote.vite.config.ts",))
+def _rewrite_remote_vite(content: str, stats: PassStats) -> str:
+    def edit(config: ts_config.ConfigEditor) -> None:
+        config.rename("build.rollupOptions", "rolldownOptions")
+        config.set("build.sourcemap", "false")
 
-def _fix_section_last_comma(text: str, section: str) -> str:
-    pattern = rf"(\"{re.escape(section)}\"\s*:\s*{{)(?P<body>.*?)(\n\s*}})"
-    match = re.search(pattern, text, flags=re.DOTALL)
-    if not match:
-        return text
-    body_lines = match.group("body").splitlines()
-    for i in range(len(body_lines) - 1, -1, -1):
-        if body_lines[i].strip():
-            body_lines[i] = re.sub(r",\s*$", "", body_lines[i])
-            break
-    new_body = "\n".join(body_lines)
-    return text[: match.start("body")] + new_body + text[match.end("body") :]
+    return _edit_config("remote.vite.config.ts", content, stats, edit)
 
 
-def update_package_json(path: Path) -> bool:
-    raw = path.read_text(encoding="utf-8")
-    data = json.loads(raw)
-    deps = data.get("dependencies", {})
-    dev_deps = data.get("devDependencies", {})
-    has_all_files_dep = "@react-icons/all-files" in deps
-    has_all_files_dev = "@react-icons/all-files" in dev_deps
-    react_icons_version = _resolve_react_icons_version(data)
-    desired_version = None
-    if react_icons_version:
-        semver = _extract_semver(react_icons_version)
-        if semver:
-            desired_version = (
-                "https://github.com/react-icons/react-icons/releases/download/"
-                f"v{semver}/react-icons-all-files-{semver}.tgz"
-            )
+# Sections barrel packages are dropped from; electron-builder packs
+# dependencies, and those packages must never reach the runtime bundle.
+DEPENDENCY_SECTIONS = ("dependencies", "devDependencies", "optionalDependencies", "peerDependencies")
 
-    updated = raw
-    changed = False
 
-    # Move @react-icons/all-files to devDependencies.
-    if has_all_files_dep:
-        updated, removed_dep = _remove_dependency(updated, "dependencies", "@react-icons/all-files")
-        changed = changed or removed_dep
-    if not has_all_files_dev and desired_version:
-        updated, inserted = _insert_dev_dependency(
-            updated, "@react-icons/all-files", desired_version
-        )
-        changed = changed or inserted
-
-    # Remove react-icons from both dependencies and devDependencies.
-    updated, removed_deps = _remove_dependency(updated, "dependencies", "react-icons")
-    changed = changed or removed_deps
-    updated, removed_dev = _remove_dependency(updated, "devDependencies", "react-icons")
-    changed = changed or removed_dev
-    updated, forced_deps = _force_remove_dependency(updated, "dependencies", "react-icons")
-    changed = changed or forced_deps
-    updated, forced_dev = _force_remove_dependency(updated, "devDependencies", "react-icons")
-    changed = changed or forced_dev
-    updated, removed_anywhere = _remove_dependency_line(updated, "react-icons")
-    changed = changed or removed_anywhere
-    if removed_anywhere:
-        updated = _fix_section_last_comma(updated, "dependencies")
-        updated = _fix_section_last_comma(updated, "devDependencies")
+def _dependency_section(manifest: json_cst.JsonObject, section: str) -> json_cst.JsonObject | None:
+    deps = manifest.get(section)
+    return deps if isinstance(deps, json_cst.JsonObject) else None
 
-    # Switch to rolldown-vite when vite is 7.x.
-    updated, switched_vite = _switch_vite_to_rolldown(updated)
-    changed = changed or switched_vite
 
-    if changed:
-        path.write_text(updated, encoding="utf-8")
-    return changed
-
-
-def _insert_dev_dependency(text: str, name: str, version: str | None = None) -> tuple[str, bool]:
-    match = re.search(r"\"devDependencies\"\s*:\s*{", text)
-    if not match:
-        return text, False
-    object_start = text.find("{", match.end() - 1)
-    if object_start == -1:
-        return text, False
-    object_end = _find_object_end(text, object_start)
-    if object_end is None:
-        return text, False
-
-    before = text[:object_start + 1]
-    body = text[object_start + 1 : object_end]
-    after = text[object_end:]
-
-    dep_line_match = re.search(r"\n(\s*)\"devDependencies\"", text[:object_start])
-    base_indent = dep_line_match.group(1) if dep_line_match else ""
-    entry_indent_match = re.search(r"\n(\s*)\"[^\"]+\"\s*:", body)
-    if entry_indent_match:
-        item_indent = entry_indent_match.group(1)
-    else:
-        item_indent = base_indent + "  "
+def _declared_versions(manifest: json_cst.JsonObject) -> dict[str, str]:
+    versions: dict[str, str] = {}
+    for section in ("devDependencies", "dependencies"):
+        deps = _dependency_section(manifest, section)
+        for member in deps.members if deps else ():
+            if isinstance(member.value, json_cst.Scalar) and isinstance(member.value.value, str):
+                versions[member.key] = member.value.value
+    return versions
 
-    if version is None:
-        version = "*"
 
-    body_stripped = body.strip()
-    if body_stripped:
-        needs_comma = not body_stripped.rstrip().endswith(",")
-        separator = "," if needs_comma else ""
-        insertion = f"{separator}\n{item_indent}\"{name}\": \"{version}\""
-        new_body = body.rstrip() + insertion + "\n" + base_indent
-    else:
-        new_body = f"\n{item_indent}\"{name}\": \"{version}\"\n{base_indent}"
-    return before + new_body + after, True
+def update_package_json(path: Path) -> bool:
+    return _update_file(path, "package.json")
+
+
+@register_transform("package.json", ("package.json",))
+def _rewrite_package_json(
+    raw: str, stats: PassStats, rules: tuple[barrel_rules.BarrelRule, ...] = barrel_rules.DEFAULT_RULES
+) -> str:
+    document = json_cst.parse(raw)
+    manifest = document.root
+    if not isinstance(manifest, json_cst.JsonObject):
+        return raw
+    indent = document.indent_unit()
+    newline = document.newline()
+    deps = _dependency_section(manifest, "dependencies")
+    dev_deps = _dependency_section(manifest, "devDependencies")
+    # Version templates refer to ranges as declared before any rule ran.
+    versions = _declared_versions(manifest)
+
+    for rule in rules:
+        # Move deep-import packages to devDependencies; the bundler inlines them.
+        for name, template in rule.dev_dependencies:
+            moved = deps.remove(name) if deps else None
+            stats.matches += moved is not None
+            if dev_deps is not None and name not in dev_deps:
+                version = barrel_rules.render_version(template, versions)
+                value = json_cst.Scalar.from_value(version) if version else moved
+                if value is not None:
+                    dev_deps.set(name, value, indent=indent, sort=True, newline=newline)
+                    stats.matches += 1
+        for name in rule.remove_dependencies:
+            for section in DEPENDENCY_SECTIONS:
+                section_deps = _dependency_section(manifest, section)
+                if section_deps is not None:
+                    stats.matches += section_deps.remove(name) is not None
 
+    # Switch to rolldown-vite when vite is 7.x.
+    vite = dev_deps.get("vite") if dev_deps else None
+    if (
+        isinstance(vite, json_cst.Scalar)
+        and isinstance(vite.value, str)
+        and re.match(r"^\^?7\.", vite.value)
+    ):
+        target_version = _resolve_rolldown_vite_7x() or "7"
+        dev_deps.set("vite", json_cst.Scalar.from_value(f"npm:rolldown-vite@{target_version}"))
+        stats.matches += 1
 
-def _switch_vite_to_rolldown(text: str) -> tuple[str, bool]:
-    match = re.search(
-        r"\"devDependencies\"\s*:\s*{[\s\S]*?\"vite\"\s*:\s*\"(?P<version>[^\"]+)\"",
-        text,
-    )
-    if not match:
-        return text, False
-    if not re.match(r"^\^?7\.", match.group("version")):
-        return text, False
-    target_version = _resolve_rolldown_vite_7x() or "7"
-    updated = re.sub(
-        r"\"vite\"\s*:\s*\"[^\"]+\"",
-        f'"vite": "npm:rolldown-vite@{target_version}"',
-        text,
-        count=1,
-    )
-    return updated, updated != text
+    return document.dumps()
 
 
+@lru_cache(maxsize=None)
 def _resolve_rolldown_vite_7x() -> str | None:
-    try:
-        with urlopen("https://registry.npmjs.org/rolldown-vite", timeout=10) as resp:
-            data = json.load(resp)
-    except Exception:
+    data = npm_registry.fetch_packument("rolldown-vite")
+    if not data:
         return None
 
     versions = data.get("versions", {})
@@ -388,13 +950,236 @@ def _resolve_rolldown_vite_7x() -> str | None:
     return best[3]
 
 
-def update_react_icon_imports(root: Path, verbose: bool = False) -> int:
-    count = 0
-    for path in root.rglob("*.ts"):
-        count += _update_react_icon_file(path, verbose=verbose)
-    for path in root.rglob("*.tsx"):
-        count += _update_react_icon_file(path, verbose=verbose)
-    return count
+# electron-vite keeps ``dependencies`` external in the main and preload
+# bundles, so whatever they import must ship in app.asar. The renderer and
+# the remote web UI bundle every package they import.
+RUNTIME_SOURCE_DIRS = ("src/main", "src/preload")
+BUNDLED_SOURCE_DIRS = ("src/renderer", "src/remote")
+# Dependencies loaded by name rather than through a literal import; the
+# main build's external list is kept as well.
+KEEP_DEPENDENCIES = frozenset({"abstract-socket"})
+IMPORT_GRAPH_CACHE_PATH = Path("node_modules", ".cache", "feishin-optimize", "import-graph.json")
+_BUILDER_PACKAGE_RE = re.compile(r"node_modules/((?:@[\w.-]+/)?[\w.-]+)")
+
+
+@dataclass
+class DependencyMove:
+    name: str
+    # "renderer only", "types only" or "unused".
+    reason: str
+    # Bytes the package itself takes in app.asar, without its own dependencies.
+    size: int | None
+    # "node_modules" when measured, "registry" for npm's unpackedSize.
+    size_source: str | None
+
+
+@dataclass
+class DependencyPruning:
+    moved: list[DependencyMove] = field(default_factory=list)
+    kept: int = 0
+    files_scanned: int = 0
+    files_cached: int = 0
+    wall_time: float = 0.0
+    warnings: list[str] = field(default_factory=list)
+    diff: str = ""
+
+    @property
+    def bytes_removed(self) -> int:
+        return sum(move.size or 0 for move in self.moved)
+
+    def to_json(self) -> dict:
+        payload = {key: value for key, value in vars(self).items() if key not in ("moved", "diff")}
+        payload["moved"] = [vars(move) for move in self.moved]
+        payload["bytes_removed"] = self.bytes_removed
+        return payload
+
+
+def _installed_size(root: Path, name: str) -> int | None:
+    path = root / "node_modules" / name
+    if not path.is_dir():
+        return None
+    total = 0
+    for dirpath, _, filenames in os.walk(path.resolve()):
+        for filename in filenames:
+            with contextlib.suppress(OSError):
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+    return total
+
+
+def _registry_manifest(name: str, declared: str) -> dict | None:
+    """The registry's manifest for the version ``declared`` names (else the latest)."""
+    packument = npm_registry.fetch_packument(name)
+    if not packument:
+        return None
+    versions = packument.get("versions", {})
+    match = re.search(r"\d+\.\d+\.\d+(?:-[\w.]+)?", declared)
+    version = match.group(0) if match and match.group(0) in versions else packument.get("dist-tags", {}).get("latest")
+    manifest = versions.get(version)
+    return manifest if isinstance(manifest, dict) else None
+
+
+def _registry_size(name: str, declared: str) -> int | None:
+    size = (_registry_manifest(name, declared) or {}).get("dist", {}).get("unpackedSize")
+    return size if isinstance(size, int) else None
+
+
+def _dependency_size(root: Path, name: str, declared: str) -> tuple[int | None, str | None]:
+    size = _installed_size(root, name)
+    if size is not None:
+        return size, "node_modules"
+    size = _registry_size(name, declared)
+    return size, "registry" if size is not None else None
+
+
+def _package_manifest(root: Path, name: str, declared: str) -> dict | None:
+    """``name``'s package.json from node_modules, else from the registry."""
+    try:
+        manifest = json.loads((root / "node_modules" / name / "package.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return _registry_manifest(name, declared)
+    return manifest if isinstance(manifest, dict) else None
+
+
+def _peer_dependencies(root: Path, kept: set[str], declared: dict[str, str]) -> tuple[set[str], list[str]]:
+    """Required peers of ``kept`` and of the peers they pull in, and the packages whose manifest was unavailable.
+
+    pnpm does not install required peers for the packages that need them, so
+    they must stay in ``dependencies``. The optimizer runs before
+    ``pnpm install`` in CI; manifests missing from node_modules come from the
+    registry.
+    """
+    peers: set[str] = set()
+    unresolved: list[str] = []
+    pending = sorted(kept)
+    seen = set(pending)
+    while pending:
+        name = pending.pop()
+        manifest = _package_manifest(root, name, declared.get(name, ""))
+        if manifest is None:
+            unresolved.append(name)
+            continue
+        meta = manifest.get("peerDependenciesMeta", {})
+        for peer in manifest.get("peerDependencies", {}):
+            if isinstance(meta.get(peer), dict) and meta[peer].get("optional"):
+                continue
+            peers.add(peer)
+            if peer in declared and peer not in seen:
+                seen.add(peer)
+                pending.append(peer)
+    return peers, sorted(unresolved)
+
+
+def prune_dependencies(
+    root: Path,
+    jobs: int | None = None,
+    dry_run: bool = False,
+    use_cache: bool = True,
+) -> DependencyPruning:
+    """Move ``dependencies`` the packaged app never requires into ``devDependencies``.
+
+    A dependency stays when the import graph reaches it from the main or
+    preload sources through a value import, when it is in KEEP_DEPENDENCIES
+    or the main build's external list, when electron-builder.yml names it
+    under node_modules, or when a kept package requires it as a peer.
+    Everything else is either bundled into the renderer, imported for types
+    only, or not imported at all. When the peers of a kept package cannot be
+    read from node_modules or the registry, nothing is moved.
+    """
+    started = time.perf_counter()
+    result = DependencyPruning()
+    path = root / "package.json"
+    raw = path.read_text(encoding="utf-8")
+    document = json_cst.parse(raw)
+    manifest = document.root
+    deps = _dependency_section(manifest, "dependencies") if isinstance(manifest, json_cst.JsonObject) else None
+    dev_deps = _dependency_section(manifest, "devDependencies") if deps is not None else None
+    if deps is None or dev_deps is None:
+        result.warnings.append("package.json: no dependencies/devDependencies to prune")
+        return result
+
+    graph = import_graph.build_graph(
+        root,
+        RUNTIME_SOURCE_DIRS + BUNDLED_SOURCE_DIRS,
+        aliases=import_graph.load_vite_aliases(root / "electron.vite.config.ts"),
+        jobs=jobs,
+        cache_path=root / IMPORT_GRAPH_CACHE_PATH if use_cache else None,
+    )
+    result.files_scanned = graph.files_scanned
+    result.files_cached = graph.files_cached
+    runtime_files = graph.files_under(RUNTIME_SOURCE_DIRS)
+    if not runtime_files:
+        result.warnings.append(f"no sources under {', '.join(RUNTIME_SOURCE_DIRS)}; dependencies left alone")
+        return result
+    bundled_files = graph.files_under(BUNDLED_SOURCE_DIRS)
+    runtime = set(graph.packages(runtime_files, runtime_only=True))
+    bundled = set(graph.packages(bundled_files, runtime_only=True))
+    referenced = set(graph.packages(runtime_files + bundled_files))
+    with contextlib.suppress(OSError):
+        runtime.update(_BUILDER_PACKAGE_RE.findall((root / "electron-builder.yml").read_text(encoding="utf-8")))
+    runtime |= KEEP_DEPENDENCIES | {import_graph.package_name(name) for name in main_externals(root) or ()}
+    declared = {
+        member.key: member.value.value
+        if isinstance(member.value, json_cst.Scalar) and isinstance(member.value.value, str)
+        else ""
+        for member in deps.members
+    }
+    peers, unresolved = _peer_dependencies(root, runtime & set(declared), declared)
+    if unresolved:
+        # Without their manifests a required peer could be moved out of app.asar.
+        result.kept = len(declared)
+        result.warnings.append(
+            f"peer dependencies of {', '.join(unresolved)} unknown (not installed, registry unavailable); "
+            "dependencies left alone"
+        )
+        return result
+    runtime |= peers
+
+    indent = document.indent_unit()
+    newline = document.newline()
+    for name in deps.keys():
+        if name in runtime:
+            result.kept += 1
+            continue
+        reason = "renderer only" if name in bundled else "types only" if name in referenced else "unused"
+        value = deps.remove(name)
+        if name not in dev_deps:
+            dev_deps.set(name, value, indent=indent, sort=True, newline=newline)
+        result.moved.append(DependencyMove(name, reason, *_dependency_size(root, name, declared[name])))
+
+    updated = document.dumps()
+    if updated != raw:
+        if dry_run:
+            result.diff = "".join(
+                difflib.unified_diff(
+                    raw.splitlines(keepends=True), updated.splitlines(keepends=True), "a/package.json", "b/package.json"
+                )
+            )
+        else:
+            _write_atomic(path, updated.encode("utf-8"))
+    result.wall_time = time.perf_counter() - started
+    return result
+
+
+def _format_size(size: int | None) -> str:
+    return "unknown size" if size is None else f"{size / 1024:.1f} KiB"
+
+
+def update_barrel_imports(
+    root: Path,
+    rules: tuple[barrel_rules.BarrelRule, ...] | None = None,
+    verbose: bool = False,
+    jobs: int | None = None,
+) -> dict[str, int]:
+    """Rewrite barrel imports under ``root``; return the import count per rule."""
+    transform = barrel_transform(rules) if rules is not None else TRANSFORMS["barrel imports"]
+    report = run_transforms(root, [transform], jobs=jobs, verbose=verbose)
+    return report.passes[transform.name].details
+
+
+def update_react_icon_imports(root: Path, verbose: bool = False, jobs: int | None = None) -> int:
+    transform = TRANSFORMS["barrel imports"]
+    report = run_transforms(root, [transform], jobs=jobs, verbose=verbose)
+    return report.files_changed(transform.name)
 
 
 IPC_IDEMPOTENCY_ALLOWLIST = [
@@ -405,15 +1190,18 @@ IPC_IDEMPOTENCY_ALLOWLIST = [
 ]
 
 
-def update_ipc_idempotency(root: Path, verbose: bool = False) -> int:
-    count = 0
-    for path in (root / "src" / "main").rglob("*.ts"):
-        count += _update_ipc_idempotency_file(path, verbose=verbose)
-    return count
+def update_ipc_idempotency(root: Path, verbose: bool = False, jobs: int | None = None) -> int:
+    transform = TRANSFORMS["ipcMain idempotency"]
+    report = run_transforms(root, [transform], jobs=jobs, verbose=verbose)
+    return report.files_changed(transform.name)
 
 
-def _update_ipc_idempotency_file(path: Path, verbose: bool = False) -> int:
-    content = path.read_text(encoding="utf-8")
+@register_transform(
+    "ipcMain idempotency",
+    ("src/main/**/*.ts",),
+    needles=(b"ipcMain.handle(", b"ipcMain.on("),
+)
+def _rewrite_ipc_idempotency(content: str, stats: PassStats) -> str:
     lines = content.splitlines()
     updated_lines: list[str] = []
     changed = False
@@ -431,6 +1219,7 @@ def _update_ipc_idempotency_file(path: Path, verbose: bool = False) -> int:
                 continue
             if not _has_prior_guard(updated_lines, "ipcMain.removeHandler", channel):
                 updated_lines.append(f"ipcMain.removeHandler('{channel}');")
+                stats.matches += 1
                 changed = True
         elif on_match:
             channel = on_match.group("channel")
@@ -439,15 +1228,13 @@ def _update_ipc_idempotency_file(path: Path, verbose: bool = False) -> int:
                 continue
             if not _has_prior_guard(updated_lines, "ipcMain.removeAllListeners", channel):
                 updated_lines.append(f"ipcMain.removeAllListeners('{channel}');")
+                stats.matches += 1
                 changed = True
         updated_lines.append(line)
 
     if changed:
-        path.write_text("\n".join(updated_lines) + "\n", encoding="utf-8")
-        if verbose:
-            print(f"ipcMain idempotency: {path}")
-        return 1
-    return 0
+        return "\n".join(updated_lines) + "\n"
+    return content
 
 
 def _has_prior_guard(lines: list[str], guard: str, channel: str) -> bool:
@@ -462,61 +1249,325 @@ def _ipc_channel_allowed(channel: str) -> bool:
     return any(re.search(pattern, channel) for pattern in IPC_IDEMPOTENCY_ALLOWLIST)
 
 
-def _rewrite_react_icon_imports(content: str) -> str:
-    def replacer(match: re.Match[str]) -> str:
-        pack = match.group("pack")
-        names = match.group("names")
+def _barrel_needles(rules: tuple[barrel_rules.BarrelRule, ...]) -> tuple[bytes, ...]:
+    return tuple(sorted({rule.needle for rule in rules}))
+
+
+@register_transform(
+    "barrel imports",
+    ("**/*.ts", "**/*.tsx"),
+    needles=_barrel_needles(barrel_rules.DEFAULT_RULES),
+)
+def _rewrite_barrel_imports(
+    content: str, stats: PassStats, rules: tuple[barrel_rules.BarrelRule, ...] = barrel_rules.DEFAULT_RULES
+) -> str:
+    parts = []
+    last = 0
+    for declaration in ts_imports.scan_imports(content):
+        if not declaration.named_only:
+            continue
+        for rule in rules:
+            groups = rule.match(declaration.source)
+            if groups is not None:
+                break
+        else:
+            continue
+        keyword = "import type" if declaration.type_only else "import"
         imports = []
-        for entry in names.split(","):
-            entry = entry.strip()
-            if not entry:
+        kept = []
+        for specifier in declaration.specifiers:
+            if not rule.accepts(specifier.imported):
+                kept.append(specifier.render())
                 continue
-            if " as " in entry:
-                original, alias = [part.strip() for part in entry.split(" as ", 1)]
-                spec = f"{original} as {alias}"
+            target = rule.render_target(groups, specifier.imported)
+            if rule.style == "default":
+                type_prefix = "type " if specifier.type_only and not declaration.type_only else ""
+                imports.append(f'{keyword} {type_prefix}{specifier.local} from "{target}";')
             else:
-                original = entry
-                spec = original
-            imports.append(
-                f"import {{ {spec} }} from \"@react-icons/all-files/{pack}/{original}\";"
-            )
-        return "\n".join(imports)
-
-    updated = REACT_ICON_IMPORT_RE.sub(replacer, content)
-    return updated
+                imports.append(f'{keyword} {{ {specifier.render()} }} from "{target}";')
+        if not imports:
+            continue
+        if kept:
+            imports.append(f'{keyword} {{ {", ".join(kept)} }} from "{declaration.source}";')
+        parts.append(content[last : declaration.start])
+        parts.append("\n".join(imports))
+        last = declaration.end
+        stats.count(rule.name)
+    if not parts:
+        return content
+    parts.append(content[last:])
+    return "".join(parts)
+
+
+def barrel_transform(rules: tuple[barrel_rules.BarrelRule, ...]) -> SourceTransform:
+    return SourceTransform(
+        "barrel imports",
+        TRANSFORMS["barrel imports"].globs,
+        partial(_rewrite_barrel_imports, rules=rules),
+        _barrel_needles(rules),
+    )
 
 
-def _update_react_icon_file(path: Path, verbose: bool = False) -> int:
-    content = path.read_text(encoding="utf-8")
-    updated = _rewrite_react_icon_imports(content)
-    if updated != content:
-        path.write_text(updated, encoding="utf-8")
-        if verbose:
-            print(f"react-icons rewrite: {path}")
-        return 1
-    return 0
+def use_barrel_rules(rules: tuple[barrel_rules.BarrelRule, ...]) -> None:
+    """Bind ``rules`` into the registered barrel and package.json transforms."""
+    TRANSFORMS["barrel imports"] = barrel_transform(rules)
+    package_json = TRANSFORMS["package.json"]
+    TRANSFORMS["package.json"] = SourceTransform(
+        package_json.name,
+        package_json.globs,
+        partial(_rewrite_package_json, rules=rules),
+        package_json.needles,
+    )
 
 
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("source", type=Path, help="Path to the Feishin source root")
     parser.add_argument("--verbose", action="store_true", help="Log each file rewritten")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for source rewrites (default: CPU count)",
+    )
+    parser.add_argument(
+        "--prune-dir",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="Extra directory name to skip while walking sources (repeatable)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report whether a run would touch anything (stat calls only); exit 1 if so",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not update the run manifest",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Resolve npm metadata from the cache directory only",
+    )
+    parser.add_argument(
+        "--npm-cache",
+        type=Path,
+        default=None,
+        help="npm metadata cache directory (or fixture directory with --offline)",
+    )
+    parser.add_argument(
+        "--report",
+        choices=("text", "json"),
+        default="text",
+        help="Summary format; json adds per-pass timing and I/O counters",
+    )
+    parser.add_argument(
+        "--report-output",
+        type=Path,
+        default=None,
+        help="Write the report to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--barrel-rules",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="JSON file of extra barrel-import rules (same name replaces a built-in rule)",
+    )
+    parser.add_argument(
+        "--renderer-chunks",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="JSON object mapping renderer packages to chunk names (replaces the built-in map)",
+    )
+    parser.add_argument(
+        "--enable",
+        action="append",
+        default=[],
+        choices=sorted(OPTIONAL_TRANSFORMS),
+        metavar="PASS",
+        help=(
+            f"Also run an opt-in pass (repeatable): {', '.join(sorted(OPTIONAL_TRANSFORMS))}; "
+            "bytecode needs the --pkgbuild depends pinned to the exact Electron version"
+        ),
+    )
+    parser.add_argument(
+        "--bytecode-protect",
+        action="append",
+        default=[],
+        metavar="STRING",
+        help="String literal the bytecode pass keeps out of the bytecode (repeatable)",
+    )
+    parser.add_argument(
+        "--pkgbuild",
+        type=Path,
+        default=Path(__file__).resolve().parents[2] / "PKGBUILD",
+        help=(
+            "PKGBUILD whose system Electron (_electronpkgver, else the installed one) the bytecode pass must match; "
+            "its depends must pin that exact version, e.g. electron${_electronversion}=${_electronpkgver}"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(BUILD_PROFILES),
+        default=None,
+        help="electron-builder profile: fast (deb only, no compression) or release (maximum compression)",
+    )
+    parser.add_argument(
+        "--release-target",
+        action="append",
+        default=[],
+        metavar="TARGET",
+        help=f"Linux target for the release profile (repeatable; default: {', '.join(RELEASE_TARGETS)})",
+    )
+    parser.add_argument(
+        "--prune-dependencies",
+        action="store_true",
+        help="Move dependencies the main and preload code never imports to devDependencies",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print unified diffs of every rewrite without writing any file (under diffs with --report json)",
+    )
     args = parser.parse_args()
 
+    # Worker processes read these through npm_registry.
+    if args.offline:
+        os.environ["FEISHIN_NPM_OFFLINE"] = "1"
+    if args.npm_cache:
+        os.environ["FEISHIN_NPM_CACHE"] = str(args.npm_cache.resolve())
+
+    if args.barrel_rules:
+        try:
+            use_barrel_rules(barrel_rules.load_rules(args.barrel_rules))
+        except (OSError, ValueError, re.error) as exc:
+            parser.error(f"--barrel-rules: {exc}")
+
+    renderer_chunks = RENDERER_CHUNKS
+    if args.renderer_chunks:
+        try:
+            renderer_chunks = load_renderer_chunks(args.renderer_chunks)
+        except (OSError, ValueError) as exc:
+            parser.error(f"--renderer-chunks: {exc}")
+
+    if args.release_target and args.profile != "release":
+        parser.error("--release-target needs --profile release")
+    if args.profile:
+        use_build_profile(args.profile, tuple(dict.fromkeys(args.release_target)) or RELEASE_TARGETS)
+
     root = args.source
-    builder_changed = update_electron_builder(root / "electron-builder.yml")
-    vite_changed = update_electron_vite(root / "electron.vite.config.ts")
-    remote_changed = update_remote_vite(root / "remote.vite.config.ts")
-    pkg_changed = update_package_json(root / "package.json")
-    icon_files_changed = update_react_icon_imports(root, verbose=args.verbose)
-    ipc_files_changed = update_ipc_idempotency(root, verbose=args.verbose)
-
-    print("electron-builder.yml updated:", builder_changed)
-    print("electron.vite.config.ts updated:", vite_changed)
-    print("remote.vite.config.ts updated:", remote_changed)
-    print("package.json updated:", pkg_changed)
-    print("react-icons files updated:", icon_files_changed)
-    print("ipcMain idempotency files updated:", ipc_files_changed)
+    # The configured map is what the run manifest keys on; the lazy-only
+    # filter below needs the import graph, which --check never builds.
+    use_renderer_chunks(renderer_chunks)
+    if "bytecode" in args.enable:
+        mismatch = bytecode_electron_mismatch(root, args.pkgbuild)
+        if mismatch:
+            parser.error(f"--enable bytecode: {mismatch}")
+        if args.bytecode_protect:
+            use_bytecode_protected_strings(tuple(BYTECODE_PROTECTED_STRINGS + args.bytecode_protect))
+
+    prune_dirs = DEFAULT_PRUNE_DIRS | frozenset(args.prune_dir)
+    transforms = list(TRANSFORMS.values()) + [OPTIONAL_TRANSFORMS[name] for name in dict.fromkeys(args.enable)]
+    manifest = None
+    if not args.no_cache or args.check:
+        manifest = RunManifest.load(root / MANIFEST_PATH, rules_version(transforms))
+
+    if args.check:
+        stale = check_transforms(root, manifest, transforms, prune_dirs)
+        if manifest.previous_rules not in (None, manifest.rules):
+            print("Rewrite rules changed since the last run.")
+        for relpath in stale:
+            print(f"stale: {relpath}")
+        print("Up to date." if not stale else f"{len(stale)} file(s) would be re-checked.")
+        return 1 if stale else 0
+
+    # --dry-run writes nothing, the import graph cache included.
+    graph_cache = not args.no_cache and not args.dry_run
+    renderer_chunks, renderer_chunk_notes = lazy_renderer_chunks(
+        root, renderer_chunks, jobs=args.jobs, use_cache=graph_cache
+    )
+    use_renderer_chunks(renderer_chunks)
+    transforms = [TRANSFORMS.get(transform.name, transform) for transform in transforms]
+    report = run_transforms(
+        root,
+        transforms,
+        prune_dirs=prune_dirs,
+        jobs=args.jobs,
+        verbose=args.verbose,
+        manifest=manifest,
+        dry_run=args.dry_run,
+    )
+    report.passes["renderer chunks"].warnings.extend(renderer_chunk_notes)
+    report.profile = args.profile
+    report.targets = build_targets(root)
+    pruning = None
+    if args.prune_dependencies:
+        pruning = prune_dependencies(root, jobs=args.jobs, dry_run=args.dry_run, use_cache=graph_cache)
+        report.dependency_pruning = pruning.to_json()
+        if pruning.diff:
+            report.diffs.append(pruning.diff)
+        if manifest is not None and not args.dry_run and pruning.moved:
+            # Record the pruned package.json so the next run does not re-check it.
+            path = root / "package.json"
+            stat = path.stat()
+            manifest.files["package.json"] = (
+                stat.st_size,
+                stat.st_mtime_ns,
+                hashlib.sha256(path.read_bytes()).hexdigest(),
+            )
+            manifest.save()
+    if not args.dry_run:
+        report.passes["main minify"].warnings.extend(check_externals(root))
+    if args.report == "text":
+        sys.stdout.write("".join(report.diffs))
+    if args.report == "json":
+        # The diffs travel in the report so that stdout stays one JSON document.
+        output = json.dumps(report.to_json(), indent=2) + "\n"
+    else:
+        barrel_counts = report.passes["barrel imports"].details
+        output = "".join(
+            f"{label}: {value}\n"
+            for label, value in (
+                ("electron-builder.yml updated", report.files_changed("electron-builder.yml") > 0),
+                ("build profile", f"{report.profile or 'default'} ({', '.join(report.targets or ['?'])})"),
+                ("electron.vite.config.ts updated", report.files_changed("electron.vite.config.ts") > 0),
+                ("main/preload minification updated", report.files_changed("main minify") > 0),
+                ("renderer chunk groups updated", report.files_changed("renderer chunks") > 0),
+                ("remote.vite.config.ts updated", report.files_changed("remote.vite.config.ts") > 0),
+                ("package.json updated", report.files_changed("package.json") > 0),
+                ("barrel import files updated", report.files_changed("barrel imports")),
+                *((f"  {rule} imports rewritten", count) for rule, count in sorted(barrel_counts.items())),
+                ("ipcMain idempotency files updated", report.files_changed("ipcMain idempotency")),
+                *(
+                    (f"{name} files updated", report.files_changed(name))
+                    for name in OPTIONAL_TRANSFORMS
+                    if name in report.passes
+                ),
+                ("files skipped via run manifest", report.cache_hits),
+            )
+        )
+        if pruning is not None:
+            output += (
+                f"dependencies moved to devDependencies: {len(pruning.moved)} "
+                f"({_format_size(pruning.bytes_removed)} less in app.asar)\n"
+            )
+            for move in pruning.moved:
+                source = f" ({move.size_source})" if move.size_source else ""
+                output += f"  {move.name:<40} {move.reason:<14} {_format_size(move.size):>14}{source}\n"
+        output += "".join(
+            f"warning: {warning}\n" for stats in report.passes.values() for warning in stats.warnings
+        )
+        if pruning is not None:
+            output += "".join(f"warning: {warning}\n" for warning in pruning.warnings)
+    if args.report_output:
+        args.report_output.write_text(output, encoding="utf-8")
+    else:
+        sys.stdout.write(output)
     return 0
 
 
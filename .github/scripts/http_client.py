@@ -0,0 +1,242 @@
+"""Pooled HTTP client for the GitHub release lookups.
+
+Connections are kept alive per host, so the several requests one script makes
+share a TLS session. ``get_json`` keeps responses on disk with their ETag and
+revalidates them with ``If-None-Match``; an unchanged release costs a 304,
+which GitHub does not count against the API quota. Rate limits are honoured
+from ``Retry-After`` and ``X-RateLimit-*``: a request that hits the limit
+waits for the reset and is retried, and once a response reports the quota
+as spent the next request waits instead of failing. Server errors and
+dropped connections are retried with exponential backoff.
+
+Environment overrides:
+  FEISHIN_HTTP_CACHE  cache directory for conditional requests
+  GITHUB_TOKEN        token sent to the API host (GH_TOKEN is also accepted)
+  GITHUB_API_URL      API base URL (default https://api.github.com)
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from urllib.parse import quote, urljoin, urlsplit
+
+DEFAULT_API_URL = "https://api.github.com"
+USER_AGENT = "iipython-feishin-electron-bin"
+GITHUB_ACCEPT = "application/vnd.github+json"
+DEFAULT_RETRIES = 4
+MAX_REDIRECTS = 5
+# Longer waits than this are reported instead of slept through.
+MAX_RATE_LIMIT_WAIT = 15 * 60
+_REDIRECT_STATUS = {301, 302, 303, 307, 308}
+_DROPPED = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class HttpError(RuntimeError):
+    def __init__(self, url: str, status: int, detail: str = "") -> None:
+        detail = detail or http.client.responses.get(status, "")
+        super().__init__(f"{url}: HTTP {status} {detail}".rstrip())
+        self.url = url
+        self.status = status
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: http.client.HTTPMessage
+    body: bytes
+
+    def json(self) -> object:
+        return json.loads(self.body)
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get("FEISHIN_HTTP_CACHE")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, "feishin-optimize", "http")
+
+
+def api_url(path: str) -> str:
+    base = (os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+
+def _load_entry(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    return data if isinstance(data, dict) and "body" in data else None
+
+
+def _store_entry(path: Path, entry: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class HttpClient:
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        token: str | None = None,
+        timeout: float = 30,
+        retries: int = DEFAULT_RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.token = token if token is not None else os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+        self.timeout = timeout
+        self.retries = retries
+        self._sleep = sleep
+        self._api_host = urlsplit(api_url("")).netloc
+        self._connections: dict[tuple[str, str], http.client.HTTPConnection] = {}
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "connections": 0, "not_modified": 0}
+
+    def __enter__(self) -> HttpClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        key = (scheme, netloc)
+        connection = self._connections.get(key)
+        if connection is None:
+            factory = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = factory(netloc, timeout=self.timeout)
+            self._connections[key] = connection
+            self.stats["connections"] += 1
+        return connection
+
+    def _send(self, url: str, headers: dict[str, str]) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL {url!r}")
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity", **headers}
+        # The token only goes to the API host, never to redirect targets.
+        if self.token and parts.netloc == self._api_host:
+            headers.setdefault("Authorization", f"Bearer {self.token}")
+        connection = self._connection(parts.scheme, parts.netloc)
+        while True:
+            reused = connection.sock is not None
+            try:
+                connection.request("GET", target, headers=headers)
+                resp = connection.getresponse()
+                body = resp.read()
+            except _DROPPED:
+                connection.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; reconnect once.
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            self.stats["requests"] += 1
+            if resp.will_close:
+                connection.close()
+            return resp.status, resp.headers, body
+
+    def _rate_limit_delay(self, status: int, headers: http.client.HTTPMessage) -> float | None:
+        if status not in (403, 429):
+            return None
+        retry_after = headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+        if headers.get("X-RateLimit-Remaining") == "0":
+            return self._reset_delay(headers)
+        return None
+
+    @staticmethod
+    def _reset_delay(headers: http.client.HTTPMessage) -> float:
+        reset = headers.get("X-RateLimit-Reset", "")
+        return max(0.0, float(reset) - time.time()) + 1 if reset.isdigit() else 60.0
+
+    def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        """GET ``url`` following redirects; raises HttpError for 4xx/5xx answers."""
+        headers = dict(headers or {})
+        attempt = 0
+        redirects = 0
+        while True:
+            blocked = self._blocked_until - time.time()
+            if blocked > 0:
+                self._sleep(blocked)
+            try:
+                status, resp_headers, body = self._send(url, headers)
+            except (OSError, http.client.HTTPException):
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                self._sleep(min(2**attempt, 30))
+                continue
+
+            if status in _REDIRECT_STATUS and resp_headers.get("Location"):
+                redirects += 1
+                if redirects > MAX_REDIRECTS:
+                    raise HttpError(url, status, "too many redirects")
+                url = urljoin(url, resp_headers["Location"])
+                continue
+            if status < 400 and resp_headers.get("X-RateLimit-Remaining") == "0":
+                self._blocked_until = time.time() + self._reset_delay(resp_headers)
+
+            delay = self._rate_limit_delay(status, resp_headers)
+            if delay is None and status >= 500:
+                delay = min(2 ** (attempt + 1), 30)
+            if delay is not None:
+                attempt += 1
+                if attempt > self.retries or delay > MAX_RATE_LIMIT_WAIT:
+                    raise HttpError(url, status, f"(gave up after {attempt} attempts)")
+                self._sleep(delay)
+                continue
+            if status >= 400:
+                raise HttpError(url, status)
+            return Response(url, status, resp_headers, body)
+
+    def get_json(self, url: str, headers: dict[str, str] | None = None) -> object:
+        """GET a JSON document, revalidating the cached copy with its ETag."""
+        path = self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+        entry = _load_entry(path)
+        request_headers = {"Accept": "application/json", **(headers or {})}
+        if entry and entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        elif entry and entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.get(url, request_headers)
+        if response.status == 304 and entry:
+            self.stats["not_modified"] += 1
+            return entry["body"]
+        data = response.json()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            _store_entry(path, {"url": url, "etag": etag, "last_modified": last_modified, "body": data})
+        return data
+
+
+def github_release(client: HttpClient, repo: str, tag: str | None = None) -> dict:
+    """Release JSON for ``tag`` of ``repo``, or its latest release."""
+    path = f"repos/{repo}/releases/tags/{quote(tag, safe='')}" if tag else f"repos/{repo}/releases/latest"
+    return client.get_json(api_url(path), {"Accept": GITHUB_ACCEPT})
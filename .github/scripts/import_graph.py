@@ -0,0 +1,286 @@
+"""Static import graph of the app sources.
+
+``build_graph`` scans every TS/JS file under the given directories and follows
+relative and aliased imports out of them (into ``src/shared``, say). For each
+file it records the modules it references: ``import`` and ``export ... from``
+declarations, plus ``import()`` and ``require()`` calls with a literal
+argument. Type-only imports are marked as such because the build erases them.
+
+Files are scanned in a process pool once there are enough of them. Results
+are cached by size and mtime, so a rerun only rescans the files that changed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import tempfile
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import ts_imports
+
+SOURCE_SUFFIXES = (".ts", ".tsx", ".mts", ".cts", ".js", ".jsx", ".mjs", ".cjs")
+RESOLVE_SUFFIXES = SOURCE_SUFFIXES + (".json",)
+PRUNE_DIRS = frozenset({".git", "dist", "node_modules", "out"})
+CACHE_VERSION = 1
+# Below this many files to scan the process pool costs more than it saves.
+POOL_MIN_FILES = 64
+
+_EXPORT_FROM_RE = re.compile(
+    r"""\bexport\s+(type\s+)?(?:\*(?:\s+as\s+[\w$]+)?|\{[^}]*\})\s*from\s*(['"])([^'"\n]+)\2"""
+)
+_DYNAMIC_IMPORT_RE = re.compile(r"""(?<![\w$.])import\s*\(\s*(['"`])([^'"`$\n]+)\1\s*[,)]""")
+_REQUIRE_RE = re.compile(r"""(?<![\w$.])require(?:\.resolve)?\s*\(\s*(['"`])([^'"`$\n]+)\1\s*\)""")
+# Vite aliases declared as ``'/@/shared': resolve('src/shared')``.
+_VITE_ALIAS_RE = re.compile(
+    r"""(['"])([^'"\n]+)\1\s*:\s*(?:path\.)?resolve\(\s*(?:__dirname\s*,\s*)?(['"])([^'"\n]+)\3\s*\)"""
+)
+
+# (specifier, kind) with kind one of "static", "type", "dynamic", "require".
+Reference = tuple[str, str]
+
+
+def scan_source(text: str) -> list[Reference]:
+    """Return the modules ``text`` references, in first-seen order."""
+    references: list[Reference] = []
+    for declaration in ts_imports.scan_imports(text):
+        type_only = declaration.type_only or (
+            declaration.named_only and all(specifier.type_only for specifier in declaration.specifiers)
+        )
+        references.append((declaration.source, "type" if type_only else "static"))
+    for match in _EXPORT_FROM_RE.finditer(text):
+        references.append((match.group(3), "type" if match.group(1) else "static"))
+    references.extend((match.group(2), "dynamic") for match in _DYNAMIC_IMPORT_RE.finditer(text))
+    references.extend((match.group(2), "require") for match in _REQUIRE_RE.finditer(text))
+    return list(dict.fromkeys(references))
+
+
+def package_name(specifier: str) -> str | None:
+    """The npm package a bare specifier refers to; None for paths, builtins and aliases."""
+    specifier = specifier.split("?", 1)[0]
+    if not specifier or specifier.startswith((".", "/", "~", "#")) or ":" in specifier:
+        return None
+    parts = specifier.split("/")
+    if specifier.startswith("@"):
+        return "/".join(parts[:2]) if len(parts) > 1 and len(parts[0]) > 1 and parts[1] else None
+    return parts[0]
+
+
+def load_vite_aliases(path: Path) -> dict[str, str]:
+    """Alias prefix -> root-relative directory, from an electron-vite or vite config."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return {}
+    return {
+        match.group(2): posixpath.normpath(match.group(4).removeprefix("./"))
+        for match in _VITE_ALIAS_RE.finditer(text)
+    }
+
+
+@dataclass
+class Module:
+    references: list[Reference]
+    # Files this one imports, root-relative, with the reference kind.
+    local: list[tuple[str, str]] = field(default_factory=list)
+    # Packages this one imports, with the reference kind.
+    packages: list[tuple[str, str]] = field(default_factory=list)
+
+
+def _skipped_kinds(runtime_only: bool, eager_only: bool) -> frozenset[str]:
+    if eager_only:
+        return frozenset({"type", "dynamic"})
+    return frozenset({"type"}) if runtime_only else frozenset()
+
+
+@dataclass
+class ImportGraph:
+    root: Path
+    modules: dict[str, Module]
+    files_scanned: int = 0
+    files_cached: int = 0
+
+    def reachable(self, starts: Iterable[str], runtime_only: bool = False, eager_only: bool = False) -> set[str]:
+        """Files reachable from ``starts``.
+
+        Type-only edges are skipped when ``runtime_only``; ``eager_only``
+        also skips dynamic ``import()``, leaving what loads with ``starts``.
+        """
+        skipped = _skipped_kinds(runtime_only, eager_only)
+        seen: set[str] = set()
+        stack = [relpath for relpath in starts if relpath in self.modules]
+        while stack:
+            relpath = stack.pop()
+            if relpath in seen:
+                continue
+            seen.add(relpath)
+            stack.extend(
+                target
+                for target, kind in self.modules[relpath].local
+                if target in self.modules and kind not in skipped
+            )
+        return seen
+
+    def packages(
+        self, starts: Iterable[str], runtime_only: bool = False, eager_only: bool = False
+    ) -> dict[str, set[str]]:
+        """Package name -> files importing it, over the files reachable from ``starts``."""
+        skipped = _skipped_kinds(runtime_only, eager_only)
+        used: dict[str, set[str]] = {}
+        for relpath in self.reachable(starts, runtime_only, eager_only):
+            for name, kind in self.modules[relpath].packages:
+                if kind not in skipped:
+                    used.setdefault(name, set()).add(relpath)
+        return used
+
+    def files_under(self, directories: Iterable[str]) -> list[str]:
+        prefixes = tuple(directory.rstrip("/") + "/" for directory in directories)
+        return sorted(relpath for relpath in self.modules if relpath.startswith(prefixes))
+
+
+def _scan_file(path: str) -> tuple[int, int, list[Reference]]:
+    with open(path, "rb") as handle:
+        stat = os.fstat(handle.fileno())
+        text = handle.read().decode("utf-8", "replace")
+    return stat.st_size, stat.st_mtime_ns, scan_source(text)
+
+
+def _cache_key() -> str:
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for module_file in (__file__, ts_imports.__file__):
+        digest.update(Path(module_file).read_bytes())
+    return digest.hexdigest()
+
+
+def _load_cache(path: Path | None, key: str) -> dict[str, list]:
+    if path is None:
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("key") == key else {}
+
+
+def _save_cache(path: Path, key: str, files: dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"key": key, "files": files}, handle, sort_keys=True)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _walk(root: Path, directory: str) -> Iterable[str]:
+    base = root / directory
+    for dirpath, dirnames, filenames in os.walk(base):
+        dirnames[:] = sorted(name for name in dirnames if name not in PRUNE_DIRS)
+        reldir = Path(dirpath).relative_to(root).as_posix()
+        for filename in sorted(filenames):
+            if filename.endswith(SOURCE_SUFFIXES) and not filename.endswith(".d.ts"):
+                yield f"{reldir}/{filename}"
+
+
+def _resolve_file(root: Path, candidate: str) -> str | None:
+    if candidate.startswith("../") or candidate == "..":
+        return None
+    stems = [candidate]
+    # TypeScript ESM sources import "./x.js" for "./x.ts".
+    stem, suffix = posixpath.splitext(candidate)
+    if suffix in (".js", ".jsx", ".mjs", ".cjs"):
+        stems.append(stem)
+    for stem in stems:
+        if os.path.isfile(root / stem):
+            return stem
+        for suffix in RESOLVE_SUFFIXES:
+            if os.path.isfile(root / f"{stem}{suffix}"):
+                return f"{stem}{suffix}"
+            if os.path.isfile(root / stem / f"index{suffix}"):
+                return f"{stem}/index{suffix}"
+    return None
+
+
+def _link(root: Path, relpath: str, references: list[Reference], aliases: dict[str, str]) -> Module:
+    module = Module(references)
+    for specifier, kind in references:
+        path = specifier.split("?", 1)[0]
+        target = None
+        if path.startswith("."):
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(relpath), path))
+        else:
+            for prefix, directory in aliases.items():
+                if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                    target = posixpath.normpath(directory + path[len(prefix.rstrip("/")) :])
+                    break
+        if target is not None:
+            resolved = _resolve_file(root, target)
+            if resolved:
+                module.local.append((resolved, kind))
+            continue
+        name = package_name(path)
+        if name:
+            module.packages.append((name, kind))
+    return module
+
+
+def build_graph(
+    root: Path,
+    directories: Iterable[str],
+    aliases: dict[str, str] | None = None,
+    jobs: int | None = None,
+    cache_path: Path | None = None,
+) -> ImportGraph:
+    """Scan the sources under ``directories`` and everything they import locally."""
+    aliases = dict(sorted((aliases or {}).items(), key=lambda item: len(item[0]), reverse=True))
+    key = _cache_key()
+    cache = _load_cache(cache_path, key)
+    graph = ImportGraph(root, {})
+    entries: dict[str, list] = {}
+    pending = list(dict.fromkeys(relpath for directory in directories for relpath in _walk(root, directory)))
+    seen = set(pending)
+    jobs = jobs or os.cpu_count() or 1
+    executor = None
+    try:
+        while pending:
+            stale = []
+            for relpath in pending:
+                entry = cache.get(relpath)
+                stat = os.stat(root / relpath)
+                if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                    entries[relpath] = entry
+                    graph.files_cached += 1
+                else:
+                    stale.append(relpath)
+            paths = [str(root / relpath) for relpath in stale]
+            if jobs > 1 and len(stale) >= POOL_MIN_FILES:
+                executor = executor or ProcessPoolExecutor(max_workers=jobs)
+                results = executor.map(_scan_file, paths, chunksize=max(1, len(paths) // (jobs * 8)))
+            else:
+                results = map(_scan_file, paths)
+            for relpath, (size, mtime_ns, references) in zip(stale, results):
+                entries[relpath] = [size, mtime_ns, references]
+                graph.files_scanned += 1
+
+            discovered = []
+            for relpath in pending:
+                references = [tuple(reference) for reference in entries[relpath][2]]
+                module = graph.modules[relpath] = _link(root, relpath, references, aliases)
+                for target, _ in module.local:
+                    if target not in seen and target.endswith(SOURCE_SUFFIXES):
+                        seen.add(target)
+                        discovered.append(target)
+            pending = discovered
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if cache_path is not None and graph.files_scanned:
+        _save_cache(cache_path, key, entries)
+    return graph
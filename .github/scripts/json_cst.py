@@ -0,0 +1,326 @@
+"""Lossless JSON concrete syntax tree for format-preserving manifest edits.
+
+``parse`` tokenizes a document once into nodes that keep every byte of
+whitespace around them, so ``Document.dumps()`` reproduces the input exactly
+until a node is changed. Edits only touch the members involved: indentation,
+key order and the layout of the rest of the file are left alone. ``//`` and
+``/* */`` comments are kept as part of the whitespace they sit in.
+"""
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Union
+
+_WS_RE = re.compile(r"(?:[ \t\r\n]+|//[^\r\n]*|/\*.*?\*/)*", re.DOTALL)
+_COMMENT_RE = re.compile(r"//|/\*")
+_STRING_RE = re.compile(r'"(?:[^"\\\x00-\x1f]|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*"')
+_SCALAR_RE = re.compile(
+    r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null"
+)
+
+
+class JsonCstError(ValueError):
+    pass
+
+
+@dataclass
+class Scalar:
+    raw: str
+
+    @classmethod
+    def from_value(cls, value: str | int | float | bool | None) -> Scalar:
+        return cls(json.dumps(value, ensure_ascii=False))
+
+    @property
+    def value(self) -> str | int | float | bool | None:
+        return json.loads(self.raw)
+
+
+@dataclass
+class Member:
+    leading: str
+    key_raw: str
+    separator: str
+    value: Node
+    trailing: str = ""
+
+    @property
+    def key(self) -> str:
+        return json.loads(self.key_raw)
+
+
+@dataclass
+class Element:
+    leading: str
+    value: Node
+    trailing: str = ""
+
+
+@dataclass
+class JsonObject:
+    members: list[Member] = field(default_factory=list)
+    inner: str = ""
+    depth: int = 0
+
+    def keys(self) -> list[str]:
+        return [member.key for member in self.members]
+
+    def index(self, key: str) -> int | None:
+        for idx, member in enumerate(self.members):
+            if member.key == key:
+                return idx
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self.index(key) is not None
+
+    def get(self, key: str) -> Node | None:
+        idx = self.index(key)
+        return None if idx is None else self.members[idx].value
+
+    def remove(self, key: str) -> Node | None:
+        idx = self.index(key)
+        if idx is None:
+            return None
+        removed = self.members.pop(idx)
+        # A comment right after the previous comma stays; one on the removed member's line goes.
+        kept_comment = _same_line_comment(removed.leading)
+        if not self.members:
+            self.inner = ""
+        elif idx == len(self.members):
+            # The removed member carried the whitespace before the closing brace.
+            self.members[-1].trailing = kept_comment + removed.trailing[len(_same_line_comment(removed.trailing)) :]
+        else:
+            following = self.members[idx]
+            following.leading = kept_comment + following.leading[len(_same_line_comment(following.leading)) :]
+        return removed.value
+
+    def set(self, key: str, value: Node, indent: str = "  ", sort: bool = False, newline: str = "\n") -> None:
+        """Replace ``key``'s value, or add it.
+
+        New keys go at the end unless ``sort`` is set and the existing keys are
+        already in npm's case-insensitive order, in which case they are
+        inserted at their sorted position. ``indent`` and ``newline`` lay out
+        the first key of an empty object; other keys copy a neighbour.
+        """
+        idx = self.index(key)
+        if idx is not None:
+            self.members[idx].value = value
+            return
+        _reindent(value, self.depth + 1)
+        key_raw = json.dumps(key, ensure_ascii=False)
+        if not self.members:
+            outer = newline + indent * self.depth
+            self.members.append(Member(outer + indent, key_raw, ": ", value, outer))
+            self.inner = ""
+            return
+
+        position = len(self.members)
+        if sort:
+            keys = [_sort_key(name) for name in self.keys()]
+            if keys == sorted(keys):
+                position = bisect_right(keys, _sort_key(key))
+        if position == len(self.members):
+            last = self.members[-1]
+            # A comment on the last member's line stays there, after the new comma.
+            comment = _same_line_comment(last.trailing)
+            member = Member(
+                comment + _layout(last.leading), key_raw, last.separator, value, last.trailing[len(comment) :]
+            )
+            last.trailing = ""
+        else:
+            neighbour = self.members[position]
+            member = Member(_layout(neighbour.leading), key_raw, neighbour.separator, value)
+        self.members.insert(position, member)
+
+
+@dataclass
+class JsonArray:
+    elements: list[Element] = field(default_factory=list)
+    inner: str = ""
+    depth: int = 0
+
+
+Node = Union[Scalar, JsonObject, JsonArray]
+
+
+@dataclass
+class Document:
+    leading: str
+    root: Node
+    trailing: str
+
+    def indent_unit(self) -> str:
+        """Indentation of the root's first member, defaulting to two spaces."""
+        if isinstance(self.root, JsonObject) and self.root.members:
+            unit = self.root.members[0].leading.rpartition("\n")[2]
+            if unit:
+                return unit
+        return "  "
+
+    def newline(self) -> str:
+        """The document's line break, ``\\r\\n`` when its first one is; ``\\n`` otherwise."""
+        text = self.dumps()
+        pos = text.find("\n")
+        return "\r\n" if pos > 0 and text[pos - 1] == "\r" else "\n"
+
+    def dumps(self) -> str:
+        parts = [self.leading]
+        _serialize(self.root, parts)
+        parts.append(self.trailing)
+        return "".join(parts)
+
+
+def _layout(whitespace: str) -> str:
+    """``whitespace`` without the comments in it, for a new member copying a neighbour's layout."""
+    if not _COMMENT_RE.search(whitespace):
+        return whitespace
+    newline = "\r\n" if "\r\n" in whitespace else "\n"
+    return newline + whitespace.rpartition("\n")[2] if "\n" in whitespace else " "
+
+
+def _same_line_comment(whitespace: str) -> str:
+    """The leading part of ``whitespace`` up to its first line break, when that holds a comment."""
+    head = re.match(r"[^\r\n]*", whitespace).group(0)
+    return head if _COMMENT_RE.search(head) else ""
+
+
+def _sort_key(key: str) -> str:
+    return key.lower()
+
+
+def _reindent(node: Node, depth: int) -> None:
+    if isinstance(node, (JsonObject, JsonArray)):
+        node.depth = depth
+
+
+def _serialize(node: Node, parts: list[str]) -> None:
+    if isinstance(node, Scalar):
+        parts.append(node.raw)
+    elif isinstance(node, JsonObject):
+        parts.append("{")
+        if not node.members:
+            parts.append(node.inner)
+        for idx, member in enumerate(node.members):
+            if idx:
+                parts.append(",")
+            parts.extend((member.leading, member.key_raw, member.separator))
+            _serialize(member.value, parts)
+            parts.append(member.trailing)
+        parts.append("}")
+    else:
+        parts.append("[")
+        if not node.elements:
+            parts.append(node.inner)
+        for idx, element in enumerate(node.elements):
+            if idx:
+                parts.append(",")
+            parts.append(element.leading)
+            _serialize(element.value, parts)
+            parts.append(element.trailing)
+        parts.append("]")
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str) -> JsonCstError:
+        line = self.text.count("\n", 0, self.pos) + 1
+        column = self.pos - self.text.rfind("\n", 0, self.pos)
+        return JsonCstError(f"{message} at line {line} column {column}")
+
+    def ws(self) -> str:
+        match = _WS_RE.match(self.text, self.pos)
+        self.pos = match.end()
+        return match.group(0)
+
+    def expect(self, char: str) -> None:
+        if not self.text.startswith(char, self.pos):
+            raise self.error(f"Expected {char!r}")
+        self.pos += 1
+
+    def string(self) -> str:
+        match = _STRING_RE.match(self.text, self.pos)
+        if not match:
+            raise self.error("Expected string")
+        self.pos = match.end()
+        return match.group(0)
+
+    def value(self, depth: int) -> Node:
+        char = self.text[self.pos : self.pos + 1]
+        if char == "{":
+            return self.object(depth)
+        if char == "[":
+            return self.array(depth)
+        if char == '"':
+            return Scalar(self.string())
+        match = _SCALAR_RE.match(self.text, self.pos)
+        if not match:
+            raise self.error("Expected value")
+        self.pos = match.end()
+        return Scalar(match.group(0))
+
+    def object(self, depth: int) -> JsonObject:
+        self.expect("{")
+        node = JsonObject(depth=depth)
+        leading = self.ws()
+        if self.text.startswith("}", self.pos):
+            self.pos += 1
+            node.inner = leading
+            return node
+        while True:
+            key_raw = self.string()
+            separator_start = self.pos
+            self.ws()
+            self.expect(":")
+            self.ws()
+            separator = self.text[separator_start : self.pos]
+            value = self.value(depth + 1)
+            node.members.append(Member(leading, key_raw, separator, value, self.ws()))
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+                leading = self.ws()
+                continue
+            self.expect("}")
+            return node
+
+    def array(self, depth: int) -> JsonArray:
+        self.expect("[")
+        node = JsonArray(depth=depth)
+        leading = self.ws()
+        if self.text.startswith("]", self.pos):
+            self.pos += 1
+            node.inner = leading
+            return node
+        while True:
+            value = self.value(depth + 1)
+            node.elements.append(Element(leading, value, self.ws()))
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+                leading = self.ws()
+                continue
+            self.expect("]")
+            return node
+
+
+def parse(text: str) -> Document:
+    parser = _Parser(text)
+    leading = parser.ws()
+    root = parser.value(0)
+    trailing = parser.ws()
+    if parser.pos != len(text):
+        raise parser.error("Unexpected trailing content")
+    return Document(leading, root, trailing)
+
+
+def to_python(node: Node) -> object:
+    if isinstance(node, Scalar):
+        return node.value
+    if isinstance(node, JsonObject):
+        return {member.key: to_python(member.value) for member in node.members}
+    return [to_python(element.value) for element in node.elements]
@@ -0,0 +1,114 @@
+"""Cached npm registry metadata lookups.
+
+Packuments are requested in the abbreviated install format and kept on disk
+with their ETag. Within the TTL the cached copy is returned without touching
+the network; after it, the registry is asked to revalidate (a 304 costs a few
+hundred bytes). Offline mode only reads the cache directory, which may also be
+seeded with fixture files (either a cache entry or a bare packument).
+
+Environment overrides:
+  FEISHIN_NPM_REGISTRY  registry base URL (default https://registry.npmjs.org)
+  FEISHIN_NPM_CACHE     cache directory
+  FEISHIN_NPM_OFFLINE   set to 1 to never hit the network
+  FEISHIN_NPM_TTL       seconds before a cached packument is revalidated
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+DEFAULT_REGISTRY = "https://registry.npmjs.org"
+DEFAULT_TTL = 6 * 60 * 60
+ABBREVIATED_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get("FEISHIN_NPM_CACHE")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, "feishin-optimize", "npm")
+
+
+def offline_enabled() -> bool:
+    return os.environ.get("FEISHIN_NPM_OFFLINE", "") not in ("", "0")
+
+
+def _cache_path(cache_dir: Path, name: str) -> Path:
+    return cache_dir / f"{quote(name, safe='@')}.json"
+
+
+def _load_entry(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    if "packument" not in data:
+        # A bare packument dropped in as a fixture.
+        return {"etag": None, "fetched_at": 0, "packument": data}
+    return data
+
+
+def _store_entry(path: Path, entry: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def fetch_packument(
+    name: str,
+    cache_dir: Path | None = None,
+    ttl: float | None = None,
+    offline: bool | None = None,
+    registry: str | None = None,
+    timeout: float = 10,
+) -> dict | None:
+    """Return the abbreviated packument for ``name``, or None if unavailable."""
+    cache_dir = cache_dir or default_cache_dir()
+    if ttl is None:
+        ttl = float(os.environ.get("FEISHIN_NPM_TTL", DEFAULT_TTL))
+    if offline is None:
+        offline = offline_enabled()
+    registry = (registry or os.environ.get("FEISHIN_NPM_REGISTRY") or DEFAULT_REGISTRY).rstrip("/")
+
+    path = _cache_path(cache_dir, name)
+    entry = _load_entry(path)
+    if offline:
+        return entry["packument"] if entry else None
+    if entry and time.time() - entry.get("fetched_at", 0) < ttl:
+        return entry["packument"]
+
+    headers = {"Accept": ABBREVIATED_ACCEPT}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    request = Request(f"{registry}/{quote(name, safe='@')}", headers=headers)
+    try:
+        with urlopen(request, timeout=timeout) as resp:
+            packument = json.load(resp)
+            etag = resp.headers.get("ETag")
+    except HTTPError as exc:
+        if exc.code == 304 and entry:
+            entry["fetched_at"] = time.time()
+            _store_entry(path, entry)
+            return entry["packument"]
+        return entry["packument"] if entry else None
+    except (URLError, OSError, ValueError):
+        # Serve a stale copy rather than nothing when the registry is unreachable.
+        return entry["packument"] if entry else None
+
+    _store_entry(path, {"etag": etag, "fetched_at": time.time(), "packument": packument})
+    return packument
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""A small PKGBUILD model: parse, update and render PKGBUILD and .SRCINFO.
+
+Usage:
+  python .github/scripts/pkgbuild.py            # refresh local checksums, regenerate .SRCINFO
+  python .github/scripts/pkgbuild.py --check    # exit 1 if either file is out of date
+
+Top-level variable and array assignments are parsed with bash quoting and
+the parameter expansions PKGBUILDs use (``$var``, ``${var}``,
+``${var%pat}``/``%%``/``#``/``##``, ``${var:-default}``); function bodies are
+skipped. ``Pkgbuild.set`` records new values and ``render`` splices them
+back in one pass, keeping each assignment's quoting and layout. ``srcinfo``
+writes .SRCINFO in makepkg's field order without running bash or makepkg.
+Split packages and per-package overrides inside ``package_*()`` are not
+modelled; this repository builds a single package.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+_NAME_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)(\+?)=")
+_FUNCTION_RE = re.compile(r"[A-Za-z_][\w-]*\s*\(\)")
+_SAFE_WORD_RE = re.compile(r"[\w@%+=:,./-]+")
+_HASH_ALGOS = ("ck", "md5", "sha1", "sha224", "sha256", "sha384", "sha512", "b2")
+# Field order of makepkg's srcinfo.sh.
+SRCINFO_SINGLE = ("pkgdesc", "pkgver", "pkgrel", "epoch", "url", "install", "changelog")
+SRCINFO_MULTI = (
+    "arch", "groups", "license", "checkdepends", "makedepends", "depends", "optdepends",
+    "provides", "conflicts", "replaces", "noextract", "options", "backup", "source",
+    "validpgpkeys", *(f"{algo}sums" for algo in _HASH_ALGOS),
+)
+SRCINFO_ARCH = (
+    "source", "provides", "conflicts", "depends", "replaces", "optdepends", "makedepends",
+    "checkdepends", *(f"{algo}sums" for algo in _HASH_ALGOS),
+)
+
+
+class PkgbuildError(ValueError):
+    pass
+
+
+@dataclass
+class Assignment:
+    name: str
+    start: int
+    end: int
+    words: list[str]
+    array: bool
+    append: bool = False
+    # For arrays: "inline" ``(a b)``, "block" (one item per indented line)
+    # or "aligned" (first item after ``(``, the rest lined up under it).
+    layout: str = "inline"
+    indent: str = ""
+
+
+@dataclass
+class Pkgbuild:
+    text: str
+    assignments: list[Assignment] = field(default_factory=list)
+    _updates: dict[str, str | list[str]] = field(default_factory=dict)
+    _inserts: dict[str, tuple[str, str | list[str]]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Pkgbuild:
+        return cls.parse(Path(path).read_text(encoding="utf-8"))
+
+    @classmethod
+    def parse(cls, text: str) -> Pkgbuild:
+        return cls(text, _parse_assignments(text))
+
+    def _find(self, name: str) -> Assignment | None:
+        found = [item for item in self.assignments if item.name == name and not item.append]
+        return found[-1] if found else None
+
+    def variables(self) -> dict[str, str | list[str]]:
+        """Evaluate every assignment in order, with pending updates applied."""
+        env: dict[str, str | list[str]] = {}
+        pending = dict(self._updates)
+        for name, (after, value) in self._inserts.items():
+            pending[name] = value
+        for item in self.assignments:
+            if item.name in pending and not item.append:
+                env[item.name] = pending[item.name]
+            elif item.array:
+                values = [_expand(word, env) for word in item.words]
+                previous = env.get(item.name, []) if item.append else []
+                env[item.name] = (previous if isinstance(previous, list) else [previous]) + values
+            else:
+                value = _expand(item.words[0], env) if item.words else ""
+                env[item.name] = str(env.get(item.name, "")) + value if item.append else value
+            for name, (after, value) in self._inserts.items():
+                if after == item.name:
+                    env[name] = value
+        return env
+
+    def get(self, name: str, default: str | list[str] | None = None) -> str | list[str] | None:
+        return self.variables().get(name, default)
+
+    def require(self, name: str) -> str:
+        value = self.get(name)
+        if value is None:
+            raise PkgbuildError(f"Missing {name} in PKGBUILD")
+        return value if isinstance(value, str) else " ".join(value)
+
+    def set(self, name: str, value: str | list[str], after: str | None = None) -> None:
+        """Give ``name`` a literal value; a missing variable is added after ``after``."""
+        if self._find(name):
+            self._updates[name] = value
+        elif after and self._find(after):
+            self._inserts[name] = (after, value)
+        else:
+            raise PkgbuildError(f"{name} is not assigned in PKGBUILD")
+
+    def render(self) -> str:
+        """The PKGBUILD text with every pending update spliced in."""
+        edits: list[tuple[int, int, str]] = []
+        for name, value in self._updates.items():
+            item = self._find(name)
+            edits.append((item.start, item.end, _render_assignment(item, value)))
+        for name, (after, value) in self._inserts.items():
+            anchor = self._find(after)
+            line = _render_assignment(Assignment(name, 0, 0, [], isinstance(value, list)), value)
+            edits.append((anchor.end, anchor.end, f"\n{line}"))
+        text = self.text
+        for start, end, replacement in sorted(edits, reverse=True):
+            text = text[:start] + replacement + text[end:]
+        return text
+
+    def srcinfo(self) -> str:
+        env = self.variables()
+        names = _as_list(env.get("pkgname"))
+        if not names:
+            raise PkgbuildError("PKGBUILD has no pkgname")
+        lines = [f"pkgbase = {env.get('pkgbase') or names[0]}"]
+        for attr in (*SRCINFO_SINGLE, *SRCINFO_MULTI):
+            lines.extend(f"\t{attr} = {value}" for value in _as_list(env.get(attr)) if value)
+        for arch in _as_list(env.get("arch")):
+            if arch == "any":
+                continue
+            for attr in SRCINFO_ARCH:
+                lines.extend(f"\t{attr}_{arch} = {value}" for value in _as_list(env.get(f"{attr}_{arch}")) if value)
+        for name in names:
+            lines.extend(["", f"pkgname = {name}"])
+        return "\n".join(lines) + "\n"
+
+
+def _as_list(value: str | list[str] | None) -> list[str]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _skip_quoted(text: str, i: int) -> int:
+    """Index just past the quoted string or ``${...}`` starting at ``i``."""
+    opener = text[i]
+    if opener == "'":
+        end = text.find("'", i + 1)
+        if end < 0:
+            raise PkgbuildError("unterminated single quote")
+        return end + 1
+    closer = '"' if opener == '"' else "}"
+    i += 1 if opener == '"' else 2
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == closer:
+            return i + 1
+        if char == "$" and text.startswith("${", i):
+            i = _skip_quoted(text, i)
+            continue
+        i += 1
+    raise PkgbuildError(f"unterminated {opener}")
+
+
+def _scan_word(text: str, i: int) -> int:
+    while i < len(text):
+        char = text[i]
+        if char in " \t\n;)(":
+            return i
+        if char == "\\":
+            i += 2
+        elif char in "'\"" or text.startswith("${", i):
+            i = _skip_quoted(text, i)
+        else:
+            i += 1
+    return i
+
+
+def _parse_assignments(text: str) -> list[Assignment]:
+    assignments = []
+    lines = text.splitlines(keepends=True)
+    offset = 0
+    position = 0
+    in_function = False
+    for line in lines:
+        line_start = offset
+        offset += len(line)
+        if line_start < position:
+            continue
+        stripped = line.strip()
+        if in_function:
+            in_function = line.rstrip("\n") != "}"
+            continue
+        if _FUNCTION_RE.match(stripped):
+            in_function = not stripped.endswith("}")
+            continue
+        indent = len(line) - len(line.lstrip())
+        match = _NAME_RE.match(line, indent)
+        if not match:
+            continue
+        start = line_start + indent
+        i = line_start + match.end()
+        item = Assignment(match.group(1), start, i, [], False, append=bool(match.group(2)))
+        if text.startswith("(", i):
+            item.array = True
+            i += 1
+            first_newline = None
+            while True:
+                while i < len(text) and text[i] in " \t\n":
+                    if text[i] == "\n" and first_newline is None:
+                        first_newline = i
+                    i += 1
+                if i >= len(text):
+                    raise PkgbuildError(f"unterminated array {item.name}")
+                if text[i] == "#":
+                    i = text.find("\n", i)
+                    i = len(text) if i < 0 else i
+                    continue
+                if text[i] == ")":
+                    i += 1
+                    break
+                end = _scan_word(text, i)
+                if end == i:
+                    raise PkgbuildError(f"unexpected {text[i]!r} in array {item.name}")
+                if not item.words and first_newline is not None:
+                    item.layout = "block"
+                    item.indent = text[first_newline + 1 : i]
+                elif item.words and first_newline is not None and item.layout == "inline":
+                    item.layout = "aligned"
+                item.words.append(text[i:end])
+                i = end
+        else:
+            end = _scan_word(text, i)
+            item.words = [text[i:end]] if end > i else []
+            i = end
+        item.end = i
+        position = i
+        assignments.append(item)
+    return assignments
+
+
+def _remove_pattern(value: str, op: str, pattern: str) -> str:
+    lengths = range(len(value) + 1)
+    if op in ("%%", "##"):
+        lengths = reversed(lengths)
+    for length in lengths:
+        if op.startswith("%"):
+            if fnmatch.fnmatchcase(value[len(value) - length :], pattern):
+                return value[: len(value) - length]
+        elif fnmatch.fnmatchcase(value[:length], pattern):
+            return value[length:]
+    return value
+
+
+def _parameter(body: str, env: dict[str, str | list[str]]) -> str:
+    match = re.match(r"[A-Za-z_][A-Za-z0-9_]*", body)
+    if not match:
+        raise PkgbuildError(f"unsupported expansion ${{{body}}}")
+    value = env.get(match.group(0))
+    text = (value[0] if value else "") if isinstance(value, list) else (value or "")
+    rest = body[match.end() :]
+    if not rest:
+        return text
+    for op in ("%%", "##", "%", "#", ":-", "-"):
+        if rest.startswith(op):
+            argument = _expand(rest[len(op) :], env)
+            if op in (":-", "-"):
+                return text if (text if op == ":-" else value is not None) else argument
+            return _remove_pattern(text, op, argument)
+    raise PkgbuildError(f"unsupported expansion ${{{body}}}")
+
+
+def _expand(word: str, env: dict[str, str | list[str]]) -> str:
+    """Expand one shell word: quotes removed, parameters substituted."""
+    out = []
+    i = 0
+    quoted = False
+    while i < len(word):
+        char = word[i]
+        if char == "'" and not quoted:
+            end = word.index("'", i + 1)
+            out.append(word[i + 1 : end])
+            i = end + 1
+        elif char == '"':
+            quoted = not quoted
+            i += 1
+        elif char == "\\" and i + 1 < len(word):
+            following = word[i + 1]
+            if quoted and following not in '$`"\\\n':
+                out.append(char)
+            out.append(following)
+            i += 2
+        elif char == "$" and word.startswith("${", i):
+            end = _skip_quoted(word, i)
+            out.append(_parameter(word[i + 2 : end - 1], env))
+            i = end
+        elif char == "$":
+            match = re.match(r"[A-Za-z_][A-Za-z0-9_]*", word[i + 1 :])
+            if match:
+                out.append(_parameter(match.group(0), env))
+                i += 1 + match.end()
+            else:
+                out.append(char)
+                i += 1
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+def _quote(value: str, style: str) -> str:
+    if style == '"':
+        return '"' + re.sub(r'([\\"$`])', r"\\\1", value) + '"'
+    if style == "" and _SAFE_WORD_RE.fullmatch(value):
+        return value
+    if "'" in value:
+        return _quote(value, '"')
+    return f"'{value}'"
+
+
+def _render_assignment(item: Assignment, value: str | list[str]) -> str:
+    style = item.words[0][0] if item.words and item.words[0][0] in "'\"" else ""
+    if not isinstance(value, list):
+        return f"{item.name}={_quote(value, style)}"
+    words = [_quote(entry, style or "'") for entry in value]
+    if item.layout == "block" and words:
+        body = "".join(f"{item.indent}{word}\n" for word in words)
+        return f"{item.name}=(\n{body})"
+    separator = "\n" + " " * (len(item.name) + 2) if item.layout == "aligned" else " "
+    return f"{item.name}=({separator.join(words)})"
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def update_local_checksums(pkgbuild: Pkgbuild, root: Path) -> list[str]:
+    """Recompute sha256sums for sources that live next to the PKGBUILD.
+
+    Remote entries and SKIP keep their current value. Returns the names of
+    the sources whose checksum changed.
+    """
+    env = pkgbuild.variables()
+    changed = []
+    for arch in ["", *(f"_{arch}" for arch in _as_list(env.get("arch")))]:
+        sources = _as_list(env.get(f"source{arch}"))
+        sums = _as_list(env.get(f"sha256sums{arch}"))
+        if not sources or len(sums) != len(sources):
+            continue
+        updated = list(sums)
+        for idx, source in enumerate(sources):
+            name, _, location = source.partition("::")
+            location = location or name
+            if "://" in location or sums[idx] == "SKIP":
+                continue
+            digest = sha256_file(root / location)
+            if digest != sums[idx]:
+                updated[idx] = digest
+                changed.append(location)
+        if updated != sums:
+            pkgbuild.set(f"sha256sums{arch}", updated)
+    return changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", type=Path, default=Path("."), help="Directory holding PKGBUILD")
+    parser.add_argument("--check", action="store_true", help="Only report whether the files are current")
+    args = parser.parse_args()
+
+    pkgbuild_path = args.root / "PKGBUILD"
+    srcinfo_path = args.root / ".SRCINFO"
+    try:
+        pkgbuild = Pkgbuild.load(pkgbuild_path)
+        changed = update_local_checksums(pkgbuild, args.root)
+        rendered = pkgbuild.render()
+        srcinfo = Pkgbuild.parse(rendered).srcinfo()
+    except (OSError, PkgbuildError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    current_srcinfo = srcinfo_path.read_text(encoding="utf-8") if srcinfo_path.exists() else ""
+    stale = [name for name, old, new in (
+        ("PKGBUILD", pkgbuild.text, rendered), (".SRCINFO", current_srcinfo, srcinfo),
+    ) if old != new]
+    for name in changed:
+        print(f"checksum changed: {name}")
+    if args.check:
+        for name in stale:
+            print(f"{name} is out of date")
+        return 1 if stale else 0
+    if rendered != pkgbuild.text:
+        pkgbuild_path.write_text(rendered, encoding="utf-8")
+    if srcinfo != current_srcinfo:
+        srcinfo_path.write_text(srcinfo, encoding="utf-8")
+    print("updated " + ", ".join(stale) if stale else "PKGBUILD and .SRCINFO are current")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
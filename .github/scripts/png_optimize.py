@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""Lossless recompression of the PNG icons and images the package ships.
+
+Usage:
+  python .github/scripts/png_optimize.py upstream/assets upstream/resources
+  python .github/scripts/png_optimize.py upstream/assets --dry-run --output png-report.json
+
+Every PNG is decoded and re-encoded in pure Python:
+
+* IDAT is rebuilt with each scanline filtered both by the per-row heuristic
+  (smallest sum of absolute differences) and by each fixed filter, deflated
+  at level 9 with the default and filtered zlib strategies; the smallest
+  stream wins. Above EXHAUSTIVE_MAX_PIXELS only the heuristic over the None,
+  Sub and Up filters (computed a whole row at a time) is deflated, with the
+  filtered strategy alone: Average and Paeth need a Python step per byte, and
+  each level-9 pass takes seconds on a large image;
+* ancillary chunks are dropped except the ones that change how pixels
+  render (tRNS, gAMA, cHRM, sRGB, iCCP, cICP);
+* 8-bit RGB and RGBA images with at most 256 colours become palette images,
+  packed to 1, 2 or 4 bits per pixel when few enough colours are used.
+
+The result is decoded again and must reproduce the input pixels exactly;
+otherwise, or when it is not smaller, the file is left alone. Animated PNGs
+are skipped. Files whose sha256 is in the cache (outputs of an earlier run,
+or inputs that could not be improved) are not decoded at all.
+
+Environment overrides:
+  FEISHIN_PNG_CACHE  cache directory (default ~/.cache/feishin-optimize/png)
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+
+REPORT_VERSION = 1
+CACHE_NAME = "optimized.json"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Ancillary chunks that affect the rendered pixels; all others are dropped.
+KEEP_ANCILLARY = (b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"cICP")
+ANIMATION_CHUNKS = frozenset({b"acTL", b"fcTL", b"fdAT"})
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+# Largest image (in pixels) that gets the full filter search: a 256x256 icon.
+EXHAUSTIVE_MAX_PIXELS = 256 * 256
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+# Adam7 passes: (x start, y start, x step, y step).
+_ADAM7 = ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4), (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2))
+# |signed byte| for the per-row filter heuristic.
+_ABS = bytes(value if value < 128 else 256 - value for value in range(256))
+
+
+class PngError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Header:
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    interlace: int
+
+    @classmethod
+    def parse(cls, data: bytes) -> Header:
+        if len(data) != 13:
+            raise PngError("bad IHDR length")
+        width, height, bit_depth, color_type, compression, filtering, interlace = struct.unpack(">IIBBBBB", data)
+        if color_type not in _CHANNELS or compression or filtering or interlace not in (0, 1) or not width or not height:
+            raise PngError("unsupported IHDR")
+        return cls(width, height, bit_depth, color_type, interlace)
+
+    def pack(self) -> bytes:
+        return struct.pack(">IIBBBBB", self.width, self.height, self.bit_depth, self.color_type, 0, 0, self.interlace)
+
+    @property
+    def bits_per_pixel(self) -> int:
+        return _CHANNELS[self.color_type] * self.bit_depth
+
+    @property
+    def filter_bpp(self) -> int:
+        return max(1, self.bits_per_pixel // 8)
+
+    def row_bytes(self, width: int) -> int:
+        return (width * self.bits_per_pixel + 7) // 8
+
+    def passes(self) -> list[tuple[int, int]]:
+        """(width, height) of each sub-image; one for non-interlaced files."""
+        if not self.interlace:
+            return [(self.width, self.height)]
+        sizes = []
+        for x0, y0, dx, dy in _ADAM7:
+            sizes.append(((self.width - x0 + dx - 1) // dx if self.width > x0 else 0,
+                          (self.height - y0 + dy - 1) // dy if self.height > y0 else 0))
+        return sizes
+
+
+def read_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    if not data.startswith(PNG_SIGNATURE):
+        raise PngError("not a PNG file")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        if pos + 12 > len(data):
+            raise PngError("truncated chunk")
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8 : pos + 8 + length]
+        (crc,) = struct.unpack_from(">I", data, pos + 8 + length) if pos + 12 + length <= len(data) else (None,)
+        if len(body) != length or crc != zlib.crc32(kind + body):
+            raise PngError(f"bad {kind.decode('latin-1')} chunk")
+        chunks.append((kind, body))
+        pos += 12 + length
+        if kind == b"IEND":
+            break
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[-1][0] != b"IEND":
+        raise PngError("missing IHDR or IEND")
+    return chunks
+
+
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    dl, du, dul = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    if dl <= du and dl <= dul:
+        return left
+    return up if du <= dul else up_left
+
+
+@lru_cache(maxsize=None)
+def _high_bits(size: int) -> int:
+    return int.from_bytes(b"\x80" * size, "big")
+
+
+# Bytewise arithmetic modulo 256 on whole rows, as one big-integer operation
+# per row: the top bit of each byte is handled apart so no carry or borrow
+# crosses into the next byte.
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    high = _high_bits(len(a))
+    x, y = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+    return (((x & ~high) + (y & ~high)) ^ ((x ^ y) & high)).to_bytes(len(a), "big")
+
+
+def _sub_bytes(a: bytes, b: bytes) -> bytes:
+    high = _high_bits(len(a))
+    x, y = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+    return (((x | high) - (y & ~high)) ^ ((x ^ ~y) & high)).to_bytes(len(a), "big")
+
+
+def _unfilter_sub(row: bytes, bpp: int) -> bytes:
+    """Undo the Sub filter: a running sum per channel, in log2(width) whole-row additions."""
+    shift = bpp
+    while shift < len(row):
+        row = _add_bytes(row, bytes(shift) + row[:-shift])
+        shift *= 2
+    return row
+
+
+def _unfilter_row(kind: int, row: bytearray, prev: bytes, bpp: int) -> bytes:
+    if kind == 0:
+        return bytes(row)
+    if kind == 1:
+        return _unfilter_sub(bytes(row), bpp)
+    if kind == 2:
+        return _add_bytes(bytes(row), prev)
+    for index in range(len(row)):
+        left = row[index - bpp] if index >= bpp else 0
+        if kind == 1:
+            row[index] = (row[index] + left) & 0xFF
+        elif kind == 3:
+            row[index] = (row[index] + ((left + prev[index]) >> 1)) & 0xFF
+        elif kind == 4:
+            up_left = prev[index - bpp] if index >= bpp else 0
+            row[index] = (row[index] + _paeth(left, prev[index], up_left)) & 0xFF
+        else:
+            raise PngError(f"bad filter type {kind}")
+    return bytes(row)
+
+
+def decode_rows(header: Header, idat: bytes) -> list[list[bytes]]:
+    """Unfiltered scanlines of every (sub-)image."""
+    try:
+        raw = zlib.decompress(idat)
+    except zlib.error as exc:
+        raise PngError(f"bad IDAT stream: {exc}") from None
+    bpp = header.filter_bpp
+    passes = []
+    pos = 0
+    for width, height in header.passes():
+        rows: list[bytes] = []
+        if width and height:
+            size = header.row_bytes(width)
+            prev = bytes(size)
+            for _ in range(height):
+                if pos + 1 + size > len(raw):
+                    raise PngError("truncated image data")
+                prev = _unfilter_row(raw[pos], bytearray(raw[pos + 1 : pos + 1 + size]), prev, bpp)
+                rows.append(prev)
+                pos += 1 + size
+        passes.append(rows)
+    return passes
+
+
+def _filter_candidates(row: bytes, prev: bytes, bpp: int, exhaustive: bool = True) -> list[bytes]:
+    """``row`` under filters None, Sub and Up, then Average and Paeth when ``exhaustive``."""
+    left = bytes(bpp) + row[:-bpp]
+    fast = [row, _sub_bytes(row, left), _sub_bytes(row, prev)]
+    if not exhaustive:
+        return fast
+    up_left = bytes(bpp) + prev[:-bpp]
+    return fast + [
+        bytes((value - ((before + above) >> 1)) & 0xFF for value, before, above in zip(row, left, prev)),
+        bytes(
+            (value - _paeth(before, above, corner)) & 0xFF
+            for value, before, above, corner in zip(row, left, prev, up_left)
+        ),
+    ]
+
+
+def encode_idat(passes: list[list[bytes]], bpp: int, exhaustive: bool = True) -> bytes:
+    """The smallest zlib stream over the filter strategies tried.
+
+    Without ``exhaustive`` only the per-row heuristic over None, Sub and Up
+    is deflated, once, with the filtered strategy: level 9 alone can take
+    seconds on a large image.
+    """
+    streams: list[bytearray] = [bytearray() for _ in range(6 if exhaustive else 1)]
+    for rows in passes:
+        prev = bytes(len(rows[0])) if rows else b""
+        for row in rows:
+            candidates = _filter_candidates(row, prev, bpp, exhaustive)
+            # Heuristic pick; filter 0 is scored unsigned, as libpng does.
+            scores = [sum(row)] + [sum(candidate.translate(_ABS)) for candidate in candidates[1:]]
+            best = scores.index(min(scores))
+            streams[0] += bytes((best,)) + candidates[best]
+            if exhaustive:
+                for kind, candidate in enumerate(candidates):
+                    streams[kind + 1] += bytes((kind,)) + candidate
+            prev = row
+    best_stream = None
+    for stream in streams:
+        for strategy in ZLIB_STRATEGIES if exhaustive else (zlib.Z_FILTERED,):
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+            compressed = compressor.compress(stream) + compressor.flush()
+            if best_stream is None or len(compressed) < len(best_stream):
+                best_stream = compressed
+    return best_stream
+
+
+def _pixels(header: Header, rows: list[bytes], palette: bytes | None, trns: bytes | None) -> list[bytes]:
+    """Non-interlaced 8-bit RGB/RGBA or palette rows as RGBA bytes, for comparison."""
+    out = []
+    if header.color_type == 3:
+        alphas = (trns or b"") + b"\xff" * 256
+        colors = [palette[index * 3 : index * 3 + 3] + alphas[index : index + 1] for index in range(len(palette) // 3)]
+        depth = header.bit_depth
+        mask = (1 << depth) - 1
+        for row in rows:
+            indexes = (
+                (byte >> shift) & mask for byte in row for shift in range(8 - depth, -1, -depth)
+            )
+            out.append(b"".join(colors[index] for _, index in zip(range(header.width), indexes)))
+        return out
+    if header.color_type == 6:
+        return list(rows)
+    # An 8-bit image's colour key has zero high bytes; any other key matches nothing.
+    key = trns[1::2] if trns and len(trns) == 6 and not any(trns[0::2]) else None
+    for row in rows:
+        pixels = bytearray()
+        for index in range(0, len(row), 3):
+            color = row[index : index + 3]
+            pixels += color + (b"\x00" if color == key else b"\xff")
+        out.append(bytes(pixels))
+    return out
+
+
+def _to_palette(header: Header, rows: list[bytes], trns: bytes | None) -> tuple[Header, list[bytes], bytes, bytes] | None:
+    """Palette form of an 8-bit RGB/RGBA image with at most 256 colours."""
+    if header.interlace or header.bit_depth != 8 or header.color_type not in (2, 6):
+        return None
+    if header.color_type == 2 and trns is not None and len(trns) != 6:
+        return None
+    rgba_rows = _pixels(header, rows, None, trns)
+    counts: dict[bytes, int] = {}
+    for row in rgba_rows:
+        for index in range(0, len(row), 4):
+            pixel = row[index : index + 4]
+            counts[pixel] = counts.get(pixel, 0) + 1
+        if len(counts) > 256:
+            return None
+    # Translucent entries first keep tRNS short; frequent colours get low indexes.
+    order = sorted(counts, key=lambda pixel: (pixel[3] == 255, -counts[pixel]))
+    lookup = {pixel: index for index, pixel in enumerate(order)}
+    depth = next(bits for bits in (1, 2, 4, 8) if len(order) <= 1 << bits)
+    per_byte = 8 // depth
+    packed_rows = []
+    for row in rgba_rows:
+        indexes = [lookup[row[index : index + 4]] for index in range(0, len(row), 4)]
+        packed = bytearray()
+        for start in range(0, len(indexes), per_byte):
+            byte = 0
+            group = indexes[start : start + per_byte]
+            for index in group:
+                byte = (byte << depth) | index
+            packed.append(byte << (depth * (per_byte - len(group))))
+        packed_rows.append(bytes(packed))
+    palette = b"".join(pixel[:3] for pixel in order)
+    alphas = bytes(pixel[3] for pixel in order).rstrip(b"\xff")
+    return Header(header.width, header.height, depth, 3, 0), packed_rows, palette, alphas
+
+
+def _assemble(header: Header, ancillary: list[tuple[bytes, bytes]], palette: bytes | None, trns: bytes | None, idat: bytes) -> bytes:
+    parts = [PNG_SIGNATURE, _chunk(b"IHDR", header.pack())]
+    parts.extend(_chunk(kind, body) for kind, body in ancillary)
+    if palette is not None:
+        parts.append(_chunk(b"PLTE", palette))
+    if trns:
+        parts.append(_chunk(b"tRNS", trns))
+    parts.append(_chunk(b"IDAT", idat))
+    parts.append(_chunk(b"IEND", b""))
+    return b"".join(parts)
+
+
+def _decode(data: bytes) -> tuple[Header, list[list[bytes]], bytes | None, bytes | None, list[tuple[bytes, bytes]]]:
+    chunks = read_chunks(data)
+    header = Header.parse(chunks[0][1])
+    kinds = {kind for kind, _ in chunks}
+    if kinds & ANIMATION_CHUNKS:
+        raise PngError("animated PNG")
+    body = {kind: chunk for kind, chunk in reversed(chunks)}
+    ancillary = [(kind, chunk) for kind, chunk in chunks if kind in KEEP_ANCILLARY]
+    idat = b"".join(chunk for kind, chunk in chunks if kind == b"IDAT")
+    return header, decode_rows(header, idat), body.get(b"PLTE"), body.get(b"tRNS"), ancillary
+
+
+def optimize_png(data: bytes) -> tuple[bytes, str]:
+    """Return ``(output, note)``; ``output`` is ``data`` itself when nothing smaller was found."""
+    header, passes, palette, trns, ancillary = _decode(data)
+    candidates = [(header, passes, palette, trns, "refiltered")]
+    reduced = _to_palette(header, passes[0], trns)
+    if reduced is not None:
+        new_header, rows, new_palette, new_trns = reduced
+        candidates.append((new_header, [rows], new_palette, new_trns, f"palette {new_header.bit_depth}-bit"))
+    best, note = data, "no gain"
+    exhaustive = header.width * header.height <= EXHAUSTIVE_MAX_PIXELS
+    for cand_header, cand_passes, cand_palette, cand_trns, cand_note in candidates:
+        idat = encode_idat(cand_passes, cand_header.filter_bpp, exhaustive)
+        output = _assemble(cand_header, ancillary, cand_palette, cand_trns, idat)
+        if len(output) < len(best):
+            best, note = output, cand_note
+    if best is not data:
+        check_header, check_passes, check_palette, check_trns, _ = _decode(best)
+        if check_header == header:
+            same = check_passes == passes and check_palette == palette and check_trns == trns
+        else:
+            same = _pixels(check_header, check_passes[0], check_palette, check_trns) == _pixels(header, passes[0], palette, trns)
+        if not same:
+            return data, "verification failed"
+    return best, note
+
+
+@dataclass
+class FileResult:
+    path: str
+    before: int
+    after: int
+    note: str
+    input_hash: str
+    output_hash: str
+
+    @property
+    def saved(self) -> int:
+        return self.before - self.after
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def process_file(path: str, dry_run: bool = False) -> FileResult:
+    data = Path(path).read_bytes()
+    try:
+        output, note = optimize_png(data)
+    except PngError as exc:
+        output, note = data, f"skipped: {exc}"
+    if output is not data and not dry_run:
+        _write_atomic(Path(path), output)
+    return FileResult(path, len(data), len(output), note, _sha256(data), _sha256(output))
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get("FEISHIN_PNG_CACHE")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base, "feishin-optimize", "png")
+
+
+def _cache_key() -> str:
+    return _sha256(Path(__file__).read_bytes())
+
+
+def load_cache(path: Path) -> set[str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return set()
+    return set(data.get("hashes", [])) if data.get("key") == _cache_key() else set()
+
+
+def save_cache(path: Path, hashes: set[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps({"key": _cache_key(), "hashes": sorted(hashes)}).encode("utf-8")
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def find_pngs(roots: list[Path]) -> list[Path]:
+    found = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(name for name in dirnames if name != "node_modules")
+            found.extend(Path(dirpath, name) for name in sorted(filenames) if name.lower().endswith(".png"))
+    return found
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("roots", nargs="+", type=Path, help="Directories to search for PNG files")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without rewriting files")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the hash cache")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Hash cache directory")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    roots = [root for root in args.roots if root.is_dir()]
+    for root in args.roots:
+        if not root.is_dir():
+            print(f"{root}: not a directory, skipped", file=sys.stderr)
+    cache_path = (args.cache_dir or default_cache_dir()) / CACHE_NAME
+    known = set() if args.no_cache else load_cache(cache_path)
+
+    pending = []
+    cached = 0
+    for path in find_pngs(roots):
+        if _sha256(path.read_bytes()) in known:
+            cached += 1
+        else:
+            pending.append(str(path))
+    jobs = args.jobs or os.cpu_count() or 1
+    flags = [args.dry_run] * len(pending)
+    if jobs <= 1 or len(pending) < 2:
+        results = list(map(process_file, pending, flags))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(process_file, pending, flags))
+
+    for result in sorted(results, key=lambda item: item.saved, reverse=True):
+        print(f"  {_kib(result.before):>12} -> {_kib(result.after):>12}  {result.saved:>9,d} B  {result.note:<18} {result.path}")
+    saved = sum(result.saved for result in results)
+    print(f"{len(results)} PNG files processed, {cached} skipped via cache, saved {_kib(saved)}")
+
+    if not args.no_cache and not args.dry_run:
+        known.update(result.output_hash for result in results if not result.note.startswith("skipped"))
+        save_cache(cache_path, known)
+    if args.output:
+        payload = {
+            "version": REPORT_VERSION,
+            "bytes_saved": saved,
+            "cached": cached,
+            "files": [{**asdict(result), "saved": result.saved} for result in results],
+        }
+        args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
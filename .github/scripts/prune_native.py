@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Drop native binaries the Linux x86_64 package can never load.
+
+Usage:
+  python .github/scripts/prune_native.py upstream/node_modules
+  python .github/scripts/prune_native.py upstream/node_modules --dry-run --output native-report.json
+
+Prebuilt addons often ship for every platform at once, and electron-builder
+unpacks every ``*.node``/``*.dll``/``*.so``/``*.dylib`` it packs. Binaries are
+recognised from their ELF, PE or Mach-O header, not their file name:
+
+* PE and Mach-O (including fat) files, and ELF files for another OS ABI or
+  machine, are deleted;
+* x86_64 ELF files carrying ``.debug*`` sections get ``strip --strip-debug``.
+
+Files are replaced rather than rewritten, so inodes hardlinked into the pnpm
+store are left untouched. Hardlinked copies are only counted once.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+REPORT_VERSION = 1
+TARGET_OS = "linux"
+TARGET_MACHINE = "x86_64"
+# Text files that are never binaries; skipped without opening them.
+TEXT_SUFFIXES = frozenset(
+    {".js", ".cjs", ".mjs", ".ts", ".mts", ".cts", ".map", ".json", ".md", ".markdown", ".txt",
+     ".css", ".html", ".yml", ".yaml", ".c", ".cc", ".cpp", ".h", ".hpp", ".gyp", ".gypi", ".py"}
+)
+
+_ELF_MACHINES = {
+    0x03: "i386", 0x08: "mips", 0x14: "ppc", 0x15: "ppc64", 0x16: "s390x",
+    0x28: "arm", 0x3E: "x86_64", 0xB7: "arm64", 0xF3: "riscv", 0x102: "loongarch",
+}
+# EI_OSABI values; 0 (System V) is what Linux toolchains emit.
+_ELF_OSABI = {0: "linux", 3: "linux", 6: "solaris", 9: "freebsd", 12: "openbsd"}
+_PE_MACHINES = {0x14C: "i386", 0x8664: "x86_64", 0xAA64: "arm64", 0x1C4: "arm"}
+_MACHO_CPUS = {7: "i386", 0x01000007: "x86_64", 12: "arm", 0x0100000C: "arm64", 0x18: "ppc"}
+_MACHO_MAGICS = {
+    b"\xfe\xed\xfa\xce": ">", b"\xfe\xed\xfa\xcf": ">",
+    b"\xce\xfa\xed\xfe": "<", b"\xcf\xfa\xed\xfe": "<",
+}
+_FAT_MAGICS = (b"\xca\xfe\xba\xbe", b"\xca\xfe\xba\xbf")
+
+
+@dataclass(frozen=True)
+class Binary:
+    format: str
+    os: str
+    machine: str
+
+
+def _elf(header: bytes, handle) -> Binary | None:
+    if len(header) < 20 or header[4] not in (1, 2) or header[5] not in (1, 2):
+        return None
+    order = "<" if header[5] == 1 else ">"
+    (machine,) = struct.unpack_from(f"{order}H", header, 18)
+    return Binary("elf", _ELF_OSABI.get(header[7], f"osabi-{header[7]}"), _ELF_MACHINES.get(machine, hex(machine)))
+
+
+def _pe(header: bytes, handle) -> Binary | None:
+    if len(header) < 0x40:
+        return None
+    (offset,) = struct.unpack_from("<I", header, 0x3C)
+    handle.seek(offset)
+    signature = handle.read(6)
+    if len(signature) < 6 or signature[:4] != b"PE\0\0":
+        return None
+    (machine,) = struct.unpack_from("<H", signature, 4)
+    return Binary("pe", "windows", _PE_MACHINES.get(machine, hex(machine)))
+
+
+def _macho(header: bytes, handle) -> Binary | None:
+    if header[:4] in _FAT_MAGICS:
+        if len(header) < 12:
+            return None
+        count, cpu = struct.unpack_from(">II", header, 4)
+        # Java class files share 0xCAFEBABE; their "count" is a class file version >= 45.
+        if not 0 < count < 45:
+            return None
+        return Binary("macho-fat", "darwin", _MACHO_CPUS.get(cpu, hex(cpu)) if count == 1 else "universal")
+    order = _MACHO_MAGICS.get(header[:4])
+    if order is None or len(header) < 8:
+        return None
+    (cpu,) = struct.unpack_from(f"{order}I", header, 4)
+    return Binary("macho", "darwin", _MACHO_CPUS.get(cpu, hex(cpu)))
+
+
+def identify(path: Path) -> Binary | None:
+    """The executable format ``path`` is in, from its header; None for anything else."""
+    with open(path, "rb") as handle:
+        header = handle.read(64)
+        if header[:4] == b"\x7fELF":
+            return _elf(header, handle)
+        if header[:2] == b"MZ":
+            return _pe(header, handle)
+        return _macho(header, handle)
+
+
+def debug_section_bytes(path: Path) -> int:
+    """Total size of the ``.debug*``/``.zdebug*`` sections of a 64-bit little-endian ELF file."""
+    with open(path, "rb") as handle:
+        header = handle.read(64)
+        if len(header) < 64 or header[4] != 2 or header[5] != 1:
+            return 0
+        shoff, = struct.unpack_from("<Q", header, 0x28)
+        shentsize, shnum, shstrndx = struct.unpack_from("<HHH", header, 0x3A)
+        if not shoff or shentsize < 64 or shstrndx >= shnum:
+            return 0
+        handle.seek(shoff)
+        table = handle.read(shentsize * shnum)
+        if len(table) < shentsize * shnum:
+            return 0
+        sections = [struct.unpack_from("<IIQQQQ", table, index * shentsize) for index in range(shnum)]
+        _, _, _, _, names_offset, names_size = sections[shstrndx]
+        handle.seek(names_offset)
+        names = handle.read(names_size)
+    total = 0
+    for name_offset, _, _, _, _, size in sections:
+        name = names[name_offset : names.find(b"\0", name_offset)]
+        if name.startswith((b".debug", b".zdebug")):
+            total += size
+    return total
+
+
+def strip_debug(path: Path, strip: str) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        subprocess.run([strip, "--strip-debug", "-o", tmp_name, str(path)], check=True, capture_output=True)
+        shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+@dataclass
+class Action:
+    path: str
+    format: str
+    os: str
+    machine: str
+    # "deleted" or "stripped"
+    action: str
+    bytes_saved: int
+
+
+@dataclass
+class Report:
+    files_checked: int = 0
+    binaries: int = 0
+    actions: list[Action] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    def bytes_saved(self, action: str | None = None) -> int:
+        return sum(item.bytes_saved for item in self.actions if action in (None, item.action))
+
+
+def _iter_files(root: Path):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath, filename)
+            if path.suffix.lower() not in TEXT_SUFFIXES and not path.is_symlink():
+                yield path
+
+
+def prune(roots: list[Path], dry_run: bool = False, strip: str | None = None) -> Report:
+    report = Report()
+    seen: set[tuple[int, int]] = set()
+    if strip is None and not dry_run:
+        report.warnings.append("strip not found; debug sections left in place")
+    for root in roots:
+        for path in _iter_files(root):
+            report.files_checked += 1
+            try:
+                stat = path.stat()
+                binary = identify(path) if stat.st_size >= 64 else None
+            except OSError as exc:
+                report.warnings.append(f"{path}: {exc}")
+                continue
+            if binary is None:
+                continue
+            report.binaries += 1
+            inode = (stat.st_dev, stat.st_ino)
+            counted = inode not in seen
+            seen.add(inode)
+            relpath = path.relative_to(root).as_posix()
+            if binary.os != TARGET_OS or binary.machine != TARGET_MACHINE:
+                if not dry_run:
+                    path.unlink()
+                report.actions.append(
+                    Action(relpath, binary.format, binary.os, binary.machine, "deleted", stat.st_size if counted else 0)
+                )
+                continue
+            if binary.format != "elf" or debug_section_bytes(path) == 0:
+                continue
+            if dry_run:
+                saved = debug_section_bytes(path)
+            elif strip is None:
+                continue
+            else:
+                try:
+                    strip_debug(path, strip)
+                except (OSError, subprocess.CalledProcessError) as exc:
+                    report.warnings.append(f"{relpath}: strip failed: {exc}")
+                    continue
+                saved = stat.st_size - path.stat().st_size
+            report.actions.append(
+                Action(relpath, binary.format, binary.os, binary.machine, "stripped", saved if counted else 0)
+            )
+    return report
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
+
+
+def render_text(report: Report, dry_run: bool) -> str:
+    verb = "would save" if dry_run else "saved"
+    lines = [
+        f"{report.files_checked} files checked, {report.binaries} native binaries",
+        f"deleted: {sum(item.action == 'deleted' for item in report.actions)} ({_kib(report.bytes_saved('deleted'))})",
+        f"stripped: {sum(item.action == 'stripped' for item in report.actions)} ({_kib(report.bytes_saved('stripped'))})",
+    ]
+    for item in sorted(report.actions, key=lambda item: item.bytes_saved, reverse=True):
+        target = f"{item.os}/{item.machine}"
+        lines.append(f"  {item.action:<8} {target:<18} {_kib(item.bytes_saved):>12}  {item.path}")
+    lines.append(f"{verb}: {_kib(report.bytes_saved())}")
+    lines.extend(f"warning: {warning}" for warning in report.warnings)
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("roots", nargs="+", type=Path, help="Directories to prune (e.g. upstream/node_modules)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching files")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    missing = [str(root) for root in args.roots if not root.is_dir()]
+    if missing:
+        print(f"not a directory: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    report = prune(args.roots, dry_run=args.dry_run, strip=shutil.which("strip"))
+    sys.stdout.write(render_text(report, args.dry_run))
+    if args.output:
+        payload = {"version": REPORT_VERSION, "bytes_saved": report.bytes_saved(), **asdict(report)}
+        args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
-import json
 import os
-from urllib.request import urlopen
+
+from http_client import HttpClient, github_release
 
 
 def main() -> int:
@@ -11,13 +11,8 @@ def main() -> int:
     pkgver = os.environ.get("INPUT_PKGVER") or ""
     assetver = os.environ.get("INPUT_ASSETVER") or ""
 
-    if tag:
-        release_url = f"https://api.github.com/repos/{upstream_repo}/releases/tags/{tag}"
-    else:
-        release_url = f"https://api.github.com/repos/{upstream_repo}/releases/latest"
-
-    with urlopen(release_url, timeout=10) as resp:
-        data = json.load(resp)
+    with HttpClient(timeout=10) as client:
+        data = github_release(client, upstream_repo, tag or None)
 
     latest_tag = data["tag_name"]
     assets = data.get("assets", [])
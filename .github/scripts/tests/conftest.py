@@ -0,0 +1,72 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# The scripts import each other as top-level modules, as they do when CI runs them.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# asar.py sits at the repository root, next to the PKGBUILD that ships it.
+sys.path.insert(1, str(Path(__file__).resolve().parents[3]))
+
+
+class StubServer:
+    """A local HTTP/1.1 server answering each path from a list of canned responses.
+
+    ``routes[path]`` holds callables taking the request headers and returning
+    ``(status, headers, body)``; they are used in order and the last one
+    repeats. ``requests`` records ``(path, headers)`` of every request.
+    """
+
+    def __init__(self) -> None:
+        self.routes: dict[str, list] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                headers = dict(self.headers.items())
+                stub.requests.append((self.path, headers))
+                responses = stub.routes.get(self.path)
+                if not responses:
+                    status, extra, body = 404, {}, b""
+                else:
+                    respond = responses.pop(0) if len(responses) > 1 else responses[0]
+                    status, extra, body = respond(headers)
+                self.send_response(status)
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def route(self, path: str, *responses) -> None:
+        self.routes[path] = list(responses)
+
+    def paths(self) -> list[str]:
+        return [path for path, _ in self.requests]
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    # urllib would send 127.0.0.1 through a configured proxy.
+    for name in ("http_proxy", "HTTP_PROXY", "https_proxy", "HTTPS_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import asar
+
+# Three 100-byte entries laid out back to back after a 1000-byte header.
+ARCHIVE = asar.Archive(
+    Path("/usr/lib/feishin/app.asar"),
+    {
+        "files": {
+            "out": {
+                "files": {
+                    "main.js": {"offset": "0", "size": 100},
+                    "preload.js": {"offset": "100", "size": 100},
+                    "renderer.js": {"offset": "200", "size": 100},
+                }
+            }
+        }
+    },
+    1000,
+)
+
+
+def _order(trace):
+    return asar.order_from_trace(ARCHIVE, trace.splitlines())
+
+
+def test_fd_number_reused_by_another_process_is_not_an_archive_read():
+    trace = """\
+4000  openat(AT_FDCWD, "/usr/lib/feishin/app.asar", O_RDONLY|O_CLOEXEC) = 23
+4000  pread64(23, "..."..., 100, 1100) = 100
+4100  openat(AT_FDCWD, "/usr/share/fonts/DejaVuSans.ttf", O_RDONLY) = 23
+4100  pread64(23, "..."..., 100, 1200) = 100
+4000  pread64(23, "..."..., 100, 1000) = 100
+"""
+    assert _order(trace) == ["out/preload.js", "out/main.js"]
+
+
+def test_threads_share_the_descriptors_of_their_process():
+    trace = """\
+4000  clone(child_stack=0x7f00, flags=CLONE_VM|CLONE_FS|CLONE_FILES|CLONE_SIGHAND|CLONE_THREAD|CLONE_SYSVSEM \
+<unfinished ...>
+[pid  4001] pread64(23, "..."..., 100, 1200) = 100
+4000  <... clone resumed>, parent_tid=[4001], tls=0x7f01, child_tidptr=0x7f02) = 4001
+4000  openat(AT_FDCWD, "/usr/lib/feishin/app.asar", O_RDONLY|O_CLOEXEC) = 23
+4000  clone3({flags=CLONE_VM|CLONE_FS|CLONE_FILES|CLONE_SIGHAND|CLONE_THREAD, child_tid=0x7f03}, 88) = 4002
+[pid  4002] pread64(23,  <unfinished ...>
+[pid  4001] pread64(23, "..."..., 100, 1100) = 100
+[pid  4002] <... pread64 resumed>"..."..., 100, 1000) = 100
+"""
+    assert _order(trace) == ["out/preload.js", "out/main.js"]
+
+
+def test_forked_child_keeps_a_copy_of_the_descriptors():
+    trace = """\
+4000  openat(AT_FDCWD, "/usr/lib/feishin/app.asar", O_RDONLY) = 23
+4000  clone(child_stack=NULL, flags=CLONE_CHILD_CLEARTID|CLONE_CHILD_SETTID|SIGCHLD, child_tidptr=0x7f00) = 4100
+4000  close(23) = 0
+4000  openat(AT_FDCWD, "/etc/hosts", O_RDONLY) = 23
+4000  pread64(23, "..."..., 100, 1000) = 100
+[pid  4100] pread64(23, "..."..., 100, 1200) = 100
+"""
+    assert _order(trace) == ["out/renderer.js"]
+
+
+def test_entry_paths_in_the_trace_count_directly():
+    trace = """\
+4000  openat(AT_FDCWD, "/usr/lib/feishin/app.asar/out/renderer.js", O_RDONLY) = -1 ENOTDIR
+4000  statx(AT_FDCWD, "/usr/lib/feishin/app.asar/out/missing.js", 0, STATX_ALL, 0x7f00) = -1 ENOENT
+"""
+    assert _order(trace) == ["out/renderer.js"]
@@ -0,0 +1,27 @@
+import bench_optimize
+import png_optimize
+
+
+def _results(**seconds):
+    return {"results": {entry: {"seconds": value} for entry, value in seconds.items()}}
+
+
+def test_entries_over_their_budget_fail():
+    budget = bench_optimize.TIME_BUDGETS["png_optimize"]
+    assert bench_optimize.check_budgets(_results(png_optimize=budget / 2), None, None) == []
+    (failure,) = bench_optimize.check_budgets(_results(png_optimize=budget * 2), None, None)
+    assert failure.startswith("png_optimize:")
+
+
+def test_slowdown_against_the_baseline_fails_only_when_asked():
+    baseline = _results(run_transforms=1.0)
+    slower = _results(run_transforms=1.5)
+    assert bench_optimize.check_budgets(slower, baseline, None) == []
+    assert bench_optimize.check_budgets(slower, baseline, 60) == []
+    (failure,) = bench_optimize.check_budgets(slower, baseline, 25)
+    assert "+50.0% vs baseline" in failure
+
+
+def test_the_bench_icon_is_too_colourful_for_a_palette():
+    _, note = png_optimize.optimize_png(bench_optimize._icon_png(64, seed=0))
+    assert not note.startswith("palette")
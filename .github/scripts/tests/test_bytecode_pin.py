@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import feishin_optimize
+
+PKGBUILD = """\
+pkgname=demo-bin
+_electronversion=39
+_electronpkgver=39.2.3-1
+depends=(
+    {depends}
+)
+"""
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    electron = tmp_path / "upstream" / "node_modules" / "electron"
+    electron.mkdir(parents=True)
+    (electron / "package.json").write_text(json.dumps({"name": "electron", "version": "39.2.3"}))
+    return tmp_path / "upstream"
+
+
+def _pkgbuild(tmp_path, depends):
+    path = tmp_path / "PKGBUILD"
+    path.write_text(PKGBUILD.format(depends=depends))
+    return path
+
+
+@pytest.mark.parametrize(
+    "depends",
+    ['"electron${_electronversion}=${_electronpkgver}"', "'electron39=39.2.3'", "'mpv' 'electron39=39.2.3-2'"],
+)
+def test_exact_pin_is_accepted(tmp_path, upstream, depends):
+    assert feishin_optimize.bytecode_electron_mismatch(upstream, _pkgbuild(tmp_path, depends)) is None
+
+
+@pytest.mark.parametrize(
+    ("depends", "found"),
+    [
+        ('"electron${_electronversion}"', "found electron39)"),
+        ("'electron39>=39.2.3'", "found electron39)"),
+        ("'electron39=39.2.4'", "found electron39=39.2.4)"),
+        ("'electron38=39.2.3'", "found electron39)"),
+    ],
+)
+def test_unpinned_or_other_version_is_refused(tmp_path, upstream, depends, found):
+    mismatch = feishin_optimize.bytecode_electron_mismatch(upstream, _pkgbuild(tmp_path, depends))
+    assert mismatch.startswith(f"{tmp_path / 'PKGBUILD'} must pin depends to electron39=39.2.3 ({found}")
+
+
+def test_version_mismatch_is_reported_before_the_pin(tmp_path, upstream):
+    path = _pkgbuild(tmp_path, "'electron39=39.2.3'")
+    path.write_text(path.read_text().replace("_electronpkgver=39.2.3-1", "_electronpkgver=39.2.1-1"))
+    mismatch = feishin_optimize.bytecode_electron_mismatch(upstream, path)
+    assert mismatch.startswith("upstream builds with Electron 39.2.3 but the package runs on Electron 39.2.1")
+
@@ -0,0 +1,98 @@
+import hashlib
+
+import pytest
+
+import downloader
+
+PAYLOAD = bytes(range(256)) * 64
+DIGEST = "sha256:" + hashlib.sha256(PAYLOAD).hexdigest()
+
+
+def _ranged(payload):
+    """Serve ``payload``, honouring ``Range: bytes=N-`` with a 206."""
+
+    def respond(request):
+        header = request.get("Range", "")
+        if not header:
+            return 200, {}, payload
+        start = int(header.removeprefix("bytes=").rstrip("-"))
+        if start >= len(payload):
+            return 416, {}, b""
+        return 206, {"Content-Range": f"bytes {start}-{len(payload) - 1}/{len(payload)}"}, payload[start:]
+
+    return respond
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(downloader.time, "sleep", recorded.append)
+    return recorded
+
+
+def _partial(cache_dir, data):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"sha256-{DIGEST.removeprefix('sha256:')}.part"
+    path.write_bytes(data)
+    return path
+
+
+def test_download_is_verified_and_cached(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", _ranged(PAYLOAD))
+    path = downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert path.read_bytes() == PAYLOAD
+    assert downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path) == path
+    assert stub_server.paths() == ["/app.deb"]
+    assert sleeps == []
+
+
+def test_partial_file_is_resumed_with_a_range_request(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", _ranged(PAYLOAD))
+    partial = _partial(tmp_path, PAYLOAD[:5000])
+    path = downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert path.read_bytes() == PAYLOAD
+    assert stub_server.requests[0][1]["Range"] == "bytes=5000-"
+    assert not partial.exists()
+
+
+def test_server_ignoring_the_range_restarts_the_file(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", lambda request: (200, {}, PAYLOAD))
+    _partial(tmp_path, b"stale bytes")
+    path = downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert path.read_bytes() == PAYLOAD
+
+
+def test_complete_partial_file_is_accepted_on_416(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", _ranged(PAYLOAD))
+    _partial(tmp_path, PAYLOAD)
+    assert downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path).read_bytes() == PAYLOAD
+
+
+def test_checksum_mismatch_deletes_the_partial_file(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", _ranged(PAYLOAD[::-1]))
+    with pytest.raises(downloader.DownloadError, match="does not match expected"):
+        downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+    assert sleeps == []
+
+
+def test_mismatch_after_resuming_restarts_from_scratch(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", _ranged(PAYLOAD))
+    _partial(tmp_path, b"\0" * 5000)
+    path = downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert path.read_bytes() == PAYLOAD
+    assert [request[1].get("Range") for request in stub_server.requests] == ["bytes=5000-", None]
+    assert sleeps == [2]
+
+
+def test_server_errors_are_retried(tmp_path, stub_server, sleeps):
+    stub_server.route("/app.deb", lambda request: (503, {}, b""), _ranged(PAYLOAD))
+    path = downloader.download(f"{stub_server.url}/app.deb", DIGEST, cache_dir=tmp_path)
+    assert path.read_bytes() == PAYLOAD
+    assert sleeps == [2]
+
+
+def test_client_errors_are_final(tmp_path, stub_server, sleeps):
+    with pytest.raises(downloader.DownloadError, match="HTTP 404"):
+        downloader.download(f"{stub_server.url}/missing.deb", DIGEST, cache_dir=tmp_path)
+    assert sleeps == []
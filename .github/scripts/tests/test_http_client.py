@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from http_client import HttpClient, HttpError
+
+RELEASE = {"tag_name": "26.03.14-1.0", "assets": []}
+
+
+def _client(tmp_path, sleeps):
+    return HttpClient(cache_dir=tmp_path / "http", token="", sleep=sleeps.append)
+
+
+def _json(status=200, **headers):
+    return lambda request: (status, {"Content-Type": "application/json", **headers}, json.dumps(RELEASE).encode())
+
+
+def test_unchanged_document_is_revalidated_with_a_304(tmp_path, stub_server):
+    def not_modified(request):
+        assert request["If-None-Match"] == '"v1"'
+        return 304, {"ETag": '"v1"'}, b""
+
+    stub_server.route("/release", _json(ETag='"v1"'), not_modified)
+    sleeps = []
+    with _client(tmp_path, sleeps) as client:
+        assert client.get_json(f"{stub_server.url}/release") == RELEASE
+        assert client.get_json(f"{stub_server.url}/release") == RELEASE
+        assert client.stats == {"requests": 2, "connections": 1, "not_modified": 1}
+    # A new client revalidates from the on-disk cache.
+    with _client(tmp_path, sleeps) as client:
+        assert client.get_json(f"{stub_server.url}/release") == RELEASE
+        assert client.stats["not_modified"] == 1
+    assert "If-None-Match" not in stub_server.requests[0][1]
+    assert sleeps == []
+
+
+def test_changed_document_replaces_the_cached_copy(tmp_path, stub_server):
+    updated = {"tag_name": "27.01.02-1.0", "assets": []}
+    stub_server.route(
+        "/release",
+        _json(ETag='"v1"'),
+        lambda request: (200, {"ETag": '"v2"'}, json.dumps(updated).encode()),
+        lambda request: (304, {}, b"") if request.get("If-None-Match") == '"v2"' else (500, {}, b""),
+    )
+    with _client(tmp_path, []) as client:
+        client.get_json(f"{stub_server.url}/release")
+        assert client.get_json(f"{stub_server.url}/release") == updated
+        assert client.get_json(f"{stub_server.url}/release") == updated
+
+
+def test_429_waits_for_retry_after(tmp_path, stub_server):
+    stub_server.route("/release", lambda request: (429, {"Retry-After": "7"}, b""), _json())
+    sleeps = []
+    with _client(tmp_path, sleeps) as client:
+        assert client.get_json(f"{stub_server.url}/release") == RELEASE
+    assert sleeps == [7.0]
+    assert stub_server.paths() == ["/release", "/release"]
+
+
+def test_exhausted_quota_waits_for_the_reset(tmp_path, stub_server):
+    spent = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "not-a-time"}
+    stub_server.route("/release", lambda request: (403, spent, b""), _json())
+    sleeps = []
+    with _client(tmp_path, sleeps) as client:
+        client.get_json(f"{stub_server.url}/release")
+    assert sleeps == [60.0]
+
+
+def test_rate_limit_gives_up_after_the_retries(tmp_path, stub_server):
+    stub_server.route("/release", lambda request: (429, {"Retry-After": "1"}, b""))
+    sleeps = []
+    client = HttpClient(cache_dir=tmp_path, token="", retries=2, sleep=sleeps.append)
+    with pytest.raises(HttpError, match="HTTP 429 .gave up after 3 attempts."):
+        client.get(f"{stub_server.url}/release")
+    assert sleeps == [1.0, 1.0]
+
+
+def test_retry_after_beyond_the_limit_is_not_slept_through(tmp_path, stub_server):
+    stub_server.route("/release", lambda request: (429, {"Retry-After": "3600"}, b""))
+    sleeps = []
+    with pytest.raises(HttpError):
+        _client(tmp_path, sleeps).get(f"{stub_server.url}/release")
+    assert sleeps == []
+
+
+def test_server_errors_back_off_exponentially(tmp_path, stub_server):
+    stub_server.route("/release", lambda request: (502, {}, b""), lambda request: (503, {}, b""), _json())
+    sleeps = []
+    with _client(tmp_path, sleeps) as client:
+        assert client.get_json(f"{stub_server.url}/release") == RELEASE
+    assert sleeps == [2, 4]
+
+
+def test_client_errors_are_not_retried(tmp_path, stub_server):
+    sleeps = []
+    with pytest.raises(HttpError, match="HTTP 404"):
+        _client(tmp_path, sleeps).get(f"{stub_server.url}/missing")
+    assert sleeps == [] and stub_server.paths() == ["/missing"]
+
+
+def test_redirects_are_followed_without_the_token(tmp_path, stub_server, monkeypatch):
+    monkeypatch.setenv("GITHUB_API_URL", stub_server.url)
+    # Another host name for the same server, as a release asset on a CDN would be.
+    asset_url = stub_server.url.replace("127.0.0.1", "localhost") + "/asset"
+    stub_server.route("/release", lambda request: (302, {"Location": asset_url}, b""))
+    stub_server.route("/asset", lambda request: (200, {}, b"payload"))
+    client = HttpClient(cache_dir=tmp_path, token="secret", sleep=[].append)
+    assert client.get(f"{stub_server.url}/release").body == b"payload"
+    assert stub_server.requests[0][1]["Authorization"] == "Bearer secret"
+    assert "Authorization" not in stub_server.requests[1][1]
@@ -0,0 +1,187 @@
+import json
+
+import pytest
+
+import json_cst
+
+PACKAGE_JSON = """{
+  "name": "feishin",
+  "version": "1.0.0",
+  "scripts": {
+    "build": "electron-vite build",
+    "package:linux:pr": "electron-builder --linux --publish never"
+  },
+  "dependencies": {
+    "axios": "^1.7.0",
+    "electron-store": "^8.2.0",
+    "mpris-service": "^2.1.2"
+  },
+  "devDependencies": {
+    "electron": "^39.2.0",
+    "typescript": "^5.6.0",
+    "vite": "^7.0.0"
+  }
+}
+"""
+
+SAMPLES = {
+    "two spaces": PACKAGE_JSON,
+    "crlf": PACKAGE_JSON.replace("\n", "\r\n"),
+    "tabs": PACKAGE_JSON.replace("  ", "\t"),
+    "odd spacing": '{"name" :"feishin",\n\n   "dependencies":{ "axios" : "^1.7.0" ,"x":[ 1,2 , {} ,[ ] ]},"e": { }  }',
+    "comments": (
+        "// generated\n{\n  /* app */ \"name\": \"feishin\", // trailing\n"
+        "  \"dependencies\": {\n    // http\n    \"axios\": \"^1.7.0\"\n  }\n}\n"
+    ),
+    "unicode and escapes": '{"description": "caf\\u00e9 \\"quoted\\" \\\\ ♪", "n": -1.5e+3, "ok": true, "no": null}\n',
+}
+
+
+def _value(raw: str) -> json_cst.Scalar:
+    return json_cst.Scalar.from_value(raw)
+
+
+@pytest.mark.parametrize("text", SAMPLES.values(), ids=SAMPLES.keys())
+def test_round_trip_is_lossless(text):
+    document = json_cst.parse(text)
+    assert document.dumps() == text
+    if "//" not in text:
+        assert json_cst.to_python(document.root) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["{", '{"a": 1,}', '{"a" 1}', "[1 2]", '{"a": 1} x', "{'a': 1}", "/* open {}"])
+def test_invalid_documents_are_rejected(text):
+    with pytest.raises(json_cst.JsonCstError):
+        json_cst.parse(text)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_set_sorted_inserts_in_npm_order(newline):
+    text = PACKAGE_JSON.replace("\n", newline)
+    document = json_cst.parse(text)
+    document.root.get("dependencies").set("dexie", _value("^4.0.0"), indent=document.indent_unit(), sort=True)
+    output = document.dumps()
+    expected = json.loads(text)
+    expected["dependencies"]["dexie"] = "^4.0.0"
+    assert json.loads(output) == expected
+    assert list(json.loads(output)["dependencies"]) == ["axios", "dexie", "electron-store", "mpris-service"]
+    assert f'    "dexie": "^4.0.0",{newline}' in output
+    assert output.count("\r\n") == (output.count("\n") if newline == "\r\n" else 0)
+
+
+def test_set_appends_when_keys_are_unsorted():
+    text = PACKAGE_JSON.replace('"axios": "^1.7.0",\n    "electron-store"', '"zod": "^3.0.0",\n    "electron-store"')
+    document = json_cst.parse(text)
+    document.root.get("dependencies").set("axios", _value("^1.7.0"), sort=True)
+    assert list(json.loads(document.dumps())["dependencies"]) == ["zod", "electron-store", "mpris-service", "axios"]
+
+
+def test_set_replaces_existing_value_in_place():
+    document = json_cst.parse(PACKAGE_JSON)
+    document.root.get("devDependencies").set("vite", _value("npm:rolldown-vite@7.1.0"))
+    assert document.dumps() == PACKAGE_JSON.replace('"vite": "^7.0.0"', '"vite": "npm:rolldown-vite@7.1.0"')
+
+
+def test_set_on_empty_object_uses_indent():
+    document = json_cst.parse('{\n    "name": "x",\n    "dependencies": {}\n}\n')
+    document.root.get("dependencies").set("a", _value("1"), indent=document.indent_unit())
+    assert document.dumps() == '{\n    "name": "x",\n    "dependencies": {\n        "a": "1"\n    }\n}\n'
+
+
+def test_set_on_empty_object_keeps_crlf():
+    text = '{\r\n  "dependencies": {\r\n    "axios": "^1.7.0",\r\n    "dexie": "^4.0.0"\r\n  },\r\n  "devDependencies": {}\r\n}\r\n'
+    document = json_cst.parse(text)
+    assert document.newline() == "\r\n"
+    deps = document.root.get("dependencies")
+    dev_deps = document.root.get("devDependencies")
+    for key in ("dexie", "axios"):
+        dev_deps.set(key, deps.remove(key), indent=document.indent_unit(), sort=True, newline=document.newline())
+    output = document.dumps()
+    assert json.loads(output) == {"dependencies": {}, "devDependencies": {"axios": "^1.7.0", "dexie": "^4.0.0"}}
+    assert "\n" not in output.replace("\r\n", "")
+    assert output == (
+        '{\r\n  "dependencies": {},\r\n  "devDependencies": {\r\n    "axios": "^1.7.0",\r\n    "dexie": "^4.0.0"\r\n  }\r\n}\r\n'
+    )
+
+
+@pytest.mark.parametrize(("text", "newline"), [("{}", "\n"), ('{\n  "a": 1\r\n}', "\n"), ('{\r\n  "a": 1\n}', "\r\n")])
+def test_newline_follows_the_first_line_break(text, newline):
+    assert json_cst.parse(text).newline() == newline
+
+
+@pytest.mark.parametrize("key", ["axios", "electron-store", "mpris-service"], ids=["first", "middle", "last"])
+def test_remove(key):
+    document = json_cst.parse(PACKAGE_JSON)
+    removed = document.root.get("dependencies").remove(key)
+    expected = json.loads(PACKAGE_JSON)
+    assert json_cst.to_python(removed) == expected["dependencies"].pop(key)
+    output = document.dumps()
+    assert json.loads(output) == expected
+    # Only the removed line goes; the rest keeps its bytes.
+    assert len(output.splitlines()) == len(PACKAGE_JSON.splitlines()) - 1
+    assert output.endswith(PACKAGE_JSON[PACKAGE_JSON.index('  },\n  "devDependencies"') :])
+
+
+def test_remove_only_member_and_missing_key():
+    document = json_cst.parse('{"a": {"b": 1}}')
+    assert document.root.get("a").remove("missing") is None
+    document.root.get("a").remove("b")
+    assert document.dumps() == '{"a": {}}'
+
+
+def test_move_between_objects():
+    document = json_cst.parse(PACKAGE_JSON)
+    deps = document.root.get("dependencies")
+    dev_deps = document.root.get("devDependencies")
+    dev_deps.set("axios", deps.remove("axios"), indent=document.indent_unit(), sort=True)
+    expected = json.loads(PACKAGE_JSON)
+    expected["devDependencies"]["axios"] = expected["dependencies"].pop("axios")
+    output = document.dumps()
+    assert json.loads(output) == expected
+    assert list(json.loads(output)["devDependencies"]) == ["axios", "electron", "typescript", "vite"]
+    assert '  "devDependencies": {\n    "axios": "^1.7.0",\n    "electron"' in output
+
+
+def test_move_nested_object_is_reindented():
+    document = json_cst.parse('{\n  "a": {\n    "inner": {"x": 1}\n  },\n  "b": {\n    "deep": {"y": {}}\n  }\n}\n')
+    inner = document.root.get("a").remove("inner")
+    document.root.get("b").get("deep").get("y").set("x", _value(2))
+    document.root.get("b").set("inner", inner)
+    assert json.loads(document.dumps()) == {"a": {}, "b": {"deep": {"y": {"x": 2}}, "inner": {"x": 1}}}
+
+
+def test_edits_keep_comments_with_their_lines():
+    text = '{\n  "a": 1, // one\n  // about b\n  "b": 2, // two\n  "c": 3 // three\n}\n'
+    document = json_cst.parse(text)
+    document.root.remove("c")
+    assert document.dumps() == '{\n  "a": 1, // one\n  // about b\n  "b": 2 // two\n}\n'
+    document.root.set("d", _value(4))
+    assert document.dumps() == '{\n  "a": 1, // one\n  // about b\n  "b": 2, // two\n  "d": 4\n}\n'
+    document.root.remove("b")
+    assert document.dumps() == '{\n  "a": 1, // one\n  "d": 4\n}\n'
+
+
+@pytest.mark.parametrize(
+    ("text", "unit"),
+    [
+        (PACKAGE_JSON, "  "),
+        (PACKAGE_JSON.replace("\n  ", "\n    "), "    "),
+        (PACKAGE_JSON.replace("  ", "\t"), "\t"),
+        (PACKAGE_JSON.replace("\n", "\r\n"), "  "),
+        ('{"name": "x"}', "  "),
+        ("{}", "  "),
+        ("[1, 2]", "  "),
+    ],
+    ids=["two spaces", "four spaces", "tabs", "crlf", "single line", "empty", "array root"],
+)
+def test_indent_unit(text, unit):
+    assert json_cst.parse(text).indent_unit() == unit
+
+
+def test_large_manifest_round_trip():
+    deps = {f"package-{index:05d}": f"^{index}.0.0" for index in range(5000)}
+    text = json.dumps({"name": "big", "dependencies": deps}, indent=2) + "\n"
+    document = json_cst.parse(text)
+    document.root.get("dependencies").remove("package-02500")
+    deps.pop("package-02500")
+    assert json.loads(document.dumps()) == {"name": "big", "dependencies": deps}
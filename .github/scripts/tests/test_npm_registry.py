@@ -0,0 +1,60 @@
+import json
+
+import npm_registry
+
+PACKUMENT = {"name": "rolldown-vite", "dist-tags": {"latest": "7.1.14"}, "versions": {"7.1.14": {}}}
+
+
+def _packument(etag):
+    return lambda request: (200, {"Content-Type": "application/json", "ETag": etag}, json.dumps(PACKUMENT).encode())
+
+
+def _fetch(stub_server, tmp_path, **kwargs):
+    kwargs.setdefault("offline", False)
+    return npm_registry.fetch_packument("rolldown-vite", cache_dir=tmp_path, registry=stub_server.url, **kwargs)
+
+
+def test_fresh_copy_is_served_from_the_cache(tmp_path, stub_server):
+    stub_server.route("/rolldown-vite", _packument('"v1"'))
+    assert _fetch(stub_server, tmp_path, ttl=3600) == PACKUMENT
+    assert _fetch(stub_server, tmp_path, ttl=3600) == PACKUMENT
+    assert stub_server.paths() == ["/rolldown-vite"]
+    assert stub_server.requests[0][1]["Accept"] == npm_registry.ABBREVIATED_ACCEPT
+
+
+def test_stale_copy_is_revalidated_with_its_etag(tmp_path, stub_server):
+    def not_modified(request):
+        assert request["If-None-Match"] == '"v1"'
+        return 304, {"ETag": '"v1"'}, b""
+
+    stub_server.route("/rolldown-vite", _packument('"v1"'), not_modified)
+    assert _fetch(stub_server, tmp_path, ttl=0) == PACKUMENT
+    entry = json.loads((tmp_path / "rolldown-vite.json").read_text())
+    assert _fetch(stub_server, tmp_path, ttl=0) == PACKUMENT
+    revalidated = json.loads((tmp_path / "rolldown-vite.json").read_text())
+    assert revalidated["etag"] == '"v1"'
+    assert revalidated["fetched_at"] >= entry["fetched_at"]
+    assert len(stub_server.requests) == 2
+
+
+def test_registry_errors_fall_back_to_the_stale_copy(tmp_path, stub_server):
+    stub_server.route("/rolldown-vite", _packument('"v1"'), lambda request: (503, {}, b""))
+    _fetch(stub_server, tmp_path, ttl=0)
+    assert _fetch(stub_server, tmp_path, ttl=0) == PACKUMENT
+    assert npm_registry.fetch_packument("missing", cache_dir=tmp_path, registry=stub_server.url, offline=False) is None
+
+
+def test_offline_reads_only_the_cache(tmp_path, stub_server):
+    (tmp_path / "rolldown-vite.json").write_text(json.dumps(PACKUMENT))
+    assert _fetch(stub_server, tmp_path, offline=True) == PACKUMENT
+    assert npm_registry.fetch_packument("vite", cache_dir=tmp_path, registry=stub_server.url, offline=True) is None
+    assert stub_server.requests == []
+
+
+def test_scoped_names_keep_their_at_sign(tmp_path, stub_server):
+    stub_server.route("/@vitejs%2Fplugin-react", _packument('"v1"'))
+    packument = npm_registry.fetch_packument(
+        "@vitejs/plugin-react", cache_dir=tmp_path, registry=stub_server.url, offline=False, ttl=0
+    )
+    assert packument == PACKUMENT
+    assert (tmp_path / "@vitejs%2Fplugin-react.json").is_file()
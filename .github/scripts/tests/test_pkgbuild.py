@@ -0,0 +1,117 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pkgbuild import Pkgbuild, PkgbuildError, update_local_checksums
+
+SCRIPT = Path(__file__).resolve().parents[1] / "pkgbuild.py"
+REPO = Path(__file__).resolve().parents[3]
+PACKAGE_FILES = ("PKGBUILD", ".SRCINFO", "iipython-feishin-electron.sh", "asar.py")
+
+
+@pytest.fixture
+def package(tmp_path):
+    for name in PACKAGE_FILES:
+        shutil.copy(REPO / name, tmp_path / name)
+    return tmp_path
+
+
+def _run(root, *args):
+    return subprocess.run(
+        [sys.executable, str(SCRIPT), "--root", str(root), *args], capture_output=True, text=True
+    )
+
+
+def test_committed_srcinfo_matches_generated():
+    assert Pkgbuild.load(REPO / "PKGBUILD").srcinfo() == (REPO / ".SRCINFO").read_text(encoding="utf-8")
+
+
+def test_check_passes_on_committed_files(package):
+    result = _run(package, "--check")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout == ""
+
+
+def test_generated_srcinfo_passes_check_after_release_update(package):
+    # The same edits update_pkgbuild.py makes for a new release.
+    pkgbuild = Pkgbuild.load(package / "PKGBUILD")
+    pkgbuild.set("pkgver", "27.01.02_1.0")
+    pkgbuild.set("_tag", "27.01.02-1.0")
+    pkgbuild.set("_upstream_tag", "27.01.02-1.0", after="_tag")
+    pkgbuild.set("_electronversion", "40")
+    pkgbuild.set("sha256sums_x86_64", ["0" * 64])
+    rendered = pkgbuild.render()
+    (package / "PKGBUILD").write_text(rendered, encoding="utf-8")
+    assert _run(package, "--check").returncode == 1
+
+    (package / ".SRCINFO").write_text(Pkgbuild.parse(rendered).srcinfo(), encoding="utf-8")
+    result = _run(package, "--check")
+    assert result.returncode == 0, result.stdout
+    srcinfo = (package / ".SRCINFO").read_text(encoding="utf-8")
+    assert "\tpkgver = 27.01.02_1.0\n" in srcinfo
+    assert "\tdepends = electron40\n" in srcinfo
+    assert "\tprovides = feishin=27.01.02_1.0\n" in srcinfo
+    assert "/releases/download/27.01.02-1.0/Feishin-linux-amd64.deb\n" in srcinfo
+    assert f"\tsha256sums_x86_64 = {'0' * 64}\n" in srcinfo
+
+
+def test_check_reports_stale_local_checksum_and_refresh_fixes_it(package):
+    with open(package / "asar.py", "a", encoding="utf-8") as handle:
+        handle.write("# local change\n")
+    result = _run(package, "--check")
+    assert result.returncode == 1
+    assert result.stdout.splitlines() == [
+        "checksum changed: asar.py",
+        "PKGBUILD is out of date",
+        ".SRCINFO is out of date",
+    ]
+    assert _run(package).returncode == 0
+    assert _run(package, "--check").returncode == 0
+    sums = Pkgbuild.load(package / "PKGBUILD").get("sha256sums")
+    assert sums[1] != Pkgbuild.load(REPO / "PKGBUILD").get("sha256sums")[1]
+
+
+def test_update_local_checksums_skips_remote_sources(package):
+    pkgbuild = Pkgbuild.load(package / "PKGBUILD")
+    assert update_local_checksums(pkgbuild, package) == []
+    assert pkgbuild.render() == pkgbuild.text
+
+
+def test_render_keeps_array_layouts():
+    text = (
+        "pkgname=demo\npkgver=1.0\narch=('x86_64')\n"
+        "source=(\n    \"a.sh\"\n    \"b.py\"\n)\n"
+        "sha256sums=('aaa'\n            'bbb')\n"
+    )
+    pkgbuild = Pkgbuild.parse(text)
+    pkgbuild.set("source", ["a.sh", "c.py"])
+    pkgbuild.set("sha256sums", ["aaa", "ccc"])
+    pkgbuild.set("pkgrel", "2", after="pkgver")
+    assert pkgbuild.render() == (
+        "pkgname=demo\npkgver=1.0\npkgrel=2\narch=('x86_64')\n"
+        "source=(\n    \"a.sh\"\n    \"c.py\"\n)\n"
+        "sha256sums=('aaa'\n            'ccc')\n"
+    )
+
+
+def test_expansions_and_appends():
+    pkgbuild = Pkgbuild.parse(
+        "pkgname=foo-bin\n_base=${pkgname%-bin}\npkgver=1.2.3\n"
+        "_major=${pkgver%%.*}\n_rest=${pkgver#*.}\n_opt=${_unset:-fallback}\n"
+        "depends=('a')\ndepends+=(\"lib${_base}$_major\")\n"
+        "prepare() {\n  pkgver=9\n}\n"
+    )
+    assert pkgbuild.get("_base") == "foo"
+    assert pkgbuild.get("_major") == "1"
+    assert pkgbuild.get("_rest") == "2.3"
+    assert pkgbuild.get("_opt") == "fallback"
+    assert pkgbuild.get("depends") == ["a", "libfoo1"]
+    assert pkgbuild.get("pkgver") == "1.2.3"
+
+
+def test_set_unknown_variable_without_anchor_is_an_error():
+    with pytest.raises(PkgbuildError):
+        Pkgbuild.parse("pkgname=demo\n").set("pkgrel", "1")
@@ -0,0 +1,299 @@
+import random
+import struct
+import zlib
+
+import pytest
+
+import png_optimize
+from png_optimize import PNG_SIGNATURE, Header, PngError
+
+ADAM7 = ((0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4), (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2))
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def _chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def _pack(pixels, bit_depth):
+    if bit_depth >= 8:
+        return b"".join(sample.to_bytes(bit_depth // 8, "big") for pixel in pixels for sample in pixel)
+    packed = bytearray()
+    samples = [sample for pixel in pixels for sample in pixel]
+    per_byte = 8 // bit_depth
+    for start in range(0, len(samples), per_byte):
+        byte = 0
+        group = samples[start : start + per_byte]
+        for sample in group:
+            byte = (byte << bit_depth) | sample
+        packed.append(byte << (bit_depth * (per_byte - len(group))))
+    return bytes(packed)
+
+
+def _png(image, color_type, bit_depth=8, interlace=0, chunks=()):
+    """An unfiltered, uncompressed (stored) PNG of ``image``: rows of sample tuples."""
+    height, width = len(image), len(image[0])
+    if interlace:
+        passes = [
+            [row[x0::dx] for row in image[y0::dy]] if width > x0 and height > y0 else []
+            for x0, y0, dx, dy in ADAM7
+        ]
+    else:
+        passes = [image]
+    raw = b"".join(b"\x00" + _pack(row, bit_depth) for rows in passes for row in rows)
+    ihdr = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, interlace)
+    parts = [PNG_SIGNATURE, _chunk(b"IHDR", ihdr)]
+    parts.extend(_chunk(kind, body) for kind, body in chunks)
+    parts += [_chunk(b"IDAT", zlib.compress(raw, 0)), _chunk(b"IEND", b"")]
+    return b"".join(parts)
+
+
+def _unpack(row, header):
+    channels = CHANNELS[header.color_type]
+    depth = header.bit_depth
+    if depth >= 8:
+        size = depth // 8
+        samples = [int.from_bytes(row[pos : pos + size], "big") for pos in range(0, len(row), size)]
+    else:
+        mask = (1 << depth) - 1
+        samples = [(byte >> shift) & mask for byte in row for shift in range(8 - depth, -1, -depth)]
+    return [tuple(samples[pos : pos + channels]) for pos in range(0, len(samples) - channels + 1, channels)]
+
+
+def _rgba(data):
+    """Every pixel of ``data`` as an (r, g, b, a) tuple at the file's sample depth."""
+    chunks = png_optimize.read_chunks(data)
+    header = Header.parse(chunks[0][1])
+    body = dict(chunks)
+    idat = b"".join(chunk for kind, chunk in chunks if kind == b"IDAT")
+    passes = png_optimize.decode_rows(header, idat)
+    image = [[None] * header.width for _ in range(header.height)]
+    layout = ADAM7 if header.interlace else ((0, 0, 1, 1),)
+    for (x0, y0, dx, dy), rows in zip(layout, passes):
+        for row_index, row in enumerate(rows):
+            for column, pixel in enumerate(_unpack(row, header)[: len(range(x0, header.width, dx))]):
+                image[y0 + row_index * dy][x0 + column * dx] = pixel
+    opaque = (1 << header.bit_depth) - 1 if header.color_type != 3 else 255
+    trns = body.get(b"tRNS")
+    out = []
+    for row in image:
+        converted = []
+        for pixel in row:
+            if header.color_type == 3:
+                (index,) = pixel
+                palette = body[b"PLTE"]
+                alpha = trns[index] if trns and index < len(trns) else 255
+                converted.append((*palette[index * 3 : index * 3 + 3], alpha))
+            elif header.color_type in (0, 2):
+                color = pixel * 3 if header.color_type == 0 else pixel
+                key = trns and _unpack(trns, Header(1, 1, 16, header.color_type, 0))[0]
+                converted.append((*color, 0 if key == pixel else opaque))
+            elif header.color_type == 4:
+                converted.append((pixel[0],) * 3 + (pixel[1],))
+            else:
+                converted.append(pixel)
+        out.append(converted)
+    return header, out
+
+
+def _kinds(data):
+    return [kind for kind, _ in png_optimize.read_chunks(data)]
+
+
+def _noise(width, height, colors, seed=0):
+    """Colours in no pattern a PNG filter can predict, so a palette is the smaller encoding."""
+    rng = random.Random(seed)
+    return [[rng.choice(colors) for _ in range(width)] for _ in range(height)]
+
+
+def test_rgb_with_colour_key_becomes_palette_with_transparency():
+    colors = [(0, 0, 0), (255, 0, 255), (10, 200, 30), (200, 200, 200), (1, 2, 3)]
+    image = _noise(23, 9, colors)
+    data = _png(image, 2, chunks=[(b"tRNS", struct.pack(">HHH", 255, 0, 255))])
+    output, note = png_optimize.optimize_png(data)
+    assert note == "palette 4-bit"
+    assert len(output) < len(data)
+    header, pixels = _rgba(output)
+    assert (header.color_type, header.bit_depth) == (3, 4)
+    assert pixels == _rgba(data)[1]
+    assert pixels == [[(*color, 0 if color == (255, 0, 255) else 255) for color in row] for row in image]
+    assert dict(png_optimize.read_chunks(output))[b"tRNS"] == b"\x00"
+
+
+def test_rgb_colour_key_of_another_depth_matches_nothing():
+    image = _noise(17, 5, [(0, 0, 0), (255, 0, 255)])
+    # A key with a non-zero high byte cannot match an 8-bit sample.
+    data = _png(image, 2, chunks=[(b"tRNS", struct.pack(">HHH", 0x1FF, 0, 0x1FF))])
+    output, _ = png_optimize.optimize_png(data)
+    assert _rgba(output)[1] == _rgba(data)[1]
+    assert all(pixel[3] == 255 for row in _rgba(output)[1] for pixel in row)
+
+
+@pytest.mark.parametrize(("count", "depth"), [(2, 1), (4, 2), (16, 4), (200, 8)])
+def test_rgba_is_reduced_to_the_smallest_palette(count, depth):
+    colors = [(index, 255 - index, (index * 37) % 256, 255 if index % 3 else index) for index in range(count)]
+    image = _noise(29, 31, colors)
+    data = _png(image, 6)
+    output, note = png_optimize.optimize_png(data)
+    assert note == f"palette {depth}-bit"
+    header, pixels = _rgba(output)
+    assert (header.color_type, header.bit_depth) == (3, depth)
+    assert pixels == [list(row) for row in image]
+    trns = dict(png_optimize.read_chunks(output)).get(b"tRNS", b"")
+    # Translucent entries come first, and opaque ones are left out of tRNS.
+    assert b"\xff" not in trns
+    assert len(trns) == sum(1 for color in colors if color[3] != 255)
+
+
+def test_more_than_256_colours_stay_truecolour():
+    image = [[(x, y, (x + y) % 256, 255) for x in range(20)] for y in range(20)]
+    data = _png(image, 6)
+    output, note = png_optimize.optimize_png(data)
+    assert note == "refiltered"
+    header, pixels = _rgba(output)
+    assert header.color_type == 6
+    assert pixels == [list(row) for row in image]
+
+
+@pytest.mark.parametrize(("width", "height"), [(1, 1), (3, 2), (9, 11), (33, 17)])
+def test_interlaced_images_round_trip(width, height):
+    image = [[((x * 29) % 256, (y * 53) % 256, (x ^ y) % 256, 128 + x % 2) for x in range(width)] for y in range(height)]
+    data = _png(image, 6, interlace=1)
+    output, note = png_optimize.optimize_png(data)
+    header, pixels = _rgba(output)
+    assert pixels == [list(row) for row in image]
+    if output is not data:
+        # Palette reduction only handles non-interlaced images.
+        assert note == "refiltered"
+        assert (header.interlace, header.color_type) == (1, 6)
+
+
+@pytest.mark.parametrize(
+    ("color_type", "pixel"),
+    [
+        (0, lambda x, y: ((x * 4099 + y) % 65536,)),
+        (2, lambda x, y: (x * 1000, 65535 - y * 999, (x * y * 37) % 65536)),
+        (4, lambda x, y: ((x * 3001) % 65536, y * 2000)),
+        (6, lambda x, y: (x * 257, y * 258, 65535, (x * y * 11) % 65536)),
+    ],
+)
+def test_sixteen_bit_images_round_trip(color_type, pixel):
+    image = [[pixel(x, y) for x in range(19)] for y in range(13)]
+    for interlace in (0, 1):
+        data = _png(image, color_type, bit_depth=16, interlace=interlace)
+        output, note = png_optimize.optimize_png(data)
+        assert note == "refiltered"
+        header, pixels = _rgba(output)
+        assert (header.bit_depth, header.color_type, header.interlace) == (16, color_type, interlace)
+        assert pixels == _rgba(data)[1]
+
+
+def test_sixteen_bit_colour_key_is_kept():
+    image = [[(x * 300, 7, 7) for x in range(16)] for _ in range(8)]
+    data = _png(image, 2, bit_depth=16, chunks=[(b"tRNS", struct.pack(">HHH", 300, 7, 7))])
+    output, _ = png_optimize.optimize_png(data)
+    assert dict(png_optimize.read_chunks(output))[b"tRNS"] == struct.pack(">HHH", 300, 7, 7)
+    assert _rgba(output)[1] == _rgba(data)[1]
+    assert _rgba(output)[1][0][1] == (300, 7, 7, 0)
+
+
+def test_sub_byte_greyscale_round_trips():
+    image = [[((x + y) % 4,) for x in range(13)] for y in range(7)]
+    data = _png(image, 0, bit_depth=2)
+    output, _ = png_optimize.optimize_png(data)
+    assert _rgba(output)[1] == _rgba(data)[1]
+
+
+def test_rendering_chunks_are_kept_and_metadata_dropped():
+    image = _noise(16, 16, [(1, 2, 3, 255), (4, 5, 6, 0)])
+    chunks = [
+        (b"gAMA", struct.pack(">I", 45455)),
+        (b"tEXt", b"Software\x00test"),
+        (b"sRGB", b"\x00"),
+        (b"pHYs", struct.pack(">IIB", 2835, 2835, 1)),
+    ]
+    output, _ = png_optimize.optimize_png(_png(image, 6, chunks=chunks))
+    assert _kinds(output) == [b"IHDR", b"gAMA", b"sRGB", b"PLTE", b"tRNS", b"IDAT", b"IEND"]
+
+
+def test_split_idat_is_joined():
+    image = _noise(24, 24, [(x, x, x, 255) for x in range(0, 250, 10)])
+    data = _png(image, 6)
+    chunks = png_optimize.read_chunks(data)
+    idat = dict(chunks)[b"IDAT"]
+    split = PNG_SIGNATURE + b"".join(
+        _chunk(kind, body) for kind, body in [chunks[0], (b"IDAT", idat[:50]), (b"IDAT", idat[50:]), chunks[-1]]
+    )
+    output, _ = png_optimize.optimize_png(split)
+    assert _kinds(output).count(b"IDAT") == 1
+    assert _rgba(output)[1] == _rgba(data)[1]
+
+
+@pytest.mark.parametrize("bpp", [1, 2, 3, 4, 8])
+def test_row_arithmetic_matches_bytewise(bpp):
+    rng = random.Random(bpp)
+    row, prev = rng.randbytes(67 * bpp), rng.randbytes(67 * bpp)
+    left = bytes(bpp) + row[:-bpp]
+    sub, up = png_optimize._filter_candidates(row, prev, bpp, exhaustive=False)[1:]
+    assert sub == bytes((value - before) & 0xFF for value, before in zip(row, left))
+    assert up == bytes((value - above) & 0xFF for value, above in zip(row, prev))
+    assert png_optimize._unfilter_row(1, bytearray(sub), prev, bpp) == row
+    assert png_optimize._unfilter_row(2, bytearray(up), prev, bpp) == row
+
+
+def test_large_images_only_try_none_sub_and_up(monkeypatch):
+    monkeypatch.setattr(png_optimize, "EXHAUSTIVE_MAX_PIXELS", 20 * 20 - 1)
+    image = [[(x * 13 % 256, y * 7 % 256, (x * y) % 256, 255 - x) for x in range(20)] for y in range(20)]
+    data = _png(image, 6)
+    output, note = png_optimize.optimize_png(data)
+    assert note == "refiltered"
+    assert _rgba(output)[1] == [list(row) for row in image]
+    chunks = png_optimize.read_chunks(output)
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    stride = 1 + 20 * 4
+    assert {raw[pos] for pos in range(0, len(raw), stride)} <= {0, 1, 2}
+
+
+def test_no_gain_returns_the_input():
+    data = _png([[(0, 0, 0, 255)]], 6)
+    once, _ = png_optimize.optimize_png(data)
+    output, note = png_optimize.optimize_png(once)
+    assert output is once
+    assert note == "no gain"
+
+
+@pytest.mark.parametrize(
+    ("mutate", "message"),
+    [
+        (lambda data: data[:-6], "truncated"),
+        (lambda data: data[:20] + bytes([data[20] ^ 1]) + data[21:], "bad IHDR chunk"),
+        (lambda data: b"GIF89a" + data[6:], "not a PNG"),
+    ],
+)
+def test_corrupt_files_are_rejected(mutate, message):
+    data = _png([[(0, 0, 0)] * 4] * 4, 2)
+    with pytest.raises(PngError, match=message):
+        png_optimize.optimize_png(mutate(data))
+
+
+def test_animated_png_is_skipped(tmp_path):
+    data = _png([[(0, 0, 0)] * 4] * 4, 2)
+    animated = data[:33] + _chunk(b"acTL", struct.pack(">II", 1, 0)) + data[33:]
+    path = tmp_path / "anim.png"
+    path.write_bytes(animated)
+    result = png_optimize.process_file(str(path))
+    assert result.note == "skipped: animated PNG"
+    assert path.read_bytes() == animated
+
+
+def test_process_file_rewrites_unless_dry_run(tmp_path):
+    path = tmp_path / "icon.png"
+    data = _png(_noise(32, 32, [(9, 9, 9, 255), (0, 0, 0, 0)]), 6)
+    path.write_bytes(data)
+    result = png_optimize.process_file(str(path), dry_run=True)
+    assert result.saved > 0
+    assert path.read_bytes() == data
+    result = png_optimize.process_file(str(path))
+    assert path.read_bytes() != data
+    assert result.output_hash == png_optimize._sha256(path.read_bytes())
+    assert _rgba(path.read_bytes())[1] == _rgba(data)[1]
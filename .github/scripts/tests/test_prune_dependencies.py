@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+import feishin_optimize
+
+PACKUMENTS = {
+    "electron-store": {"1.2.0": {"peerDependencies": {"conf": "*", "debug": "*"},
+                                 "peerDependenciesMeta": {"debug": {"optional": True}}}},
+    "conf": {"10.0.0": {"peerDependencies": {"ajv": "*"}}},
+    "ajv": {"8.0.0": {}},
+    "debug": {"4.0.0": {}},
+    "react": {"18.0.0": {}},
+}
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    root = tmp_path / "upstream"
+    (root / "src" / "main").mkdir(parents=True)
+    (root / "src" / "renderer").mkdir(parents=True)
+    (root / "src" / "main" / "index.ts").write_text("import Store from 'electron-store';\nnew Store();\n")
+    (root / "src" / "renderer" / "app.tsx").write_text("import React from 'react';\nexport default React;\n")
+    manifest = {
+        "name": "feishin",
+        "dependencies": {
+            "ajv": "^8.0.0",
+            "conf": "^10.0.0",
+            "debug": "^4.0.0",
+            "electron-store": "1.2.0",
+            "react": "^18.0.0",
+        },
+        "devDependencies": {"typescript": "^5.0.0"},
+    }
+    (root / "package.json").write_text(json.dumps(manifest, indent=2) + "\n")
+    cache = tmp_path / "npm"
+    cache.mkdir()
+    for name, versions in PACKUMENTS.items():
+        latest = next(iter(versions))
+        packument = {"name": name, "dist-tags": {"latest": latest}, "versions": versions}
+        (cache / f"{name}.json").write_text(json.dumps(packument))
+    monkeypatch.setenv("FEISHIN_NPM_CACHE", str(cache))
+    monkeypatch.setenv("FEISHIN_NPM_OFFLINE", "1")
+    return root
+
+
+def _dependencies(root):
+    manifest = json.loads((root / "package.json").read_text())
+    return sorted(manifest["dependencies"]), sorted(manifest["devDependencies"])
+
+
+def test_peers_come_from_registry_without_node_modules(tree):
+    assert not (tree / "node_modules").exists()
+    result = feishin_optimize.prune_dependencies(tree, use_cache=False)
+    assert result.warnings == []
+    assert sorted(move.name for move in result.moved) == ["debug", "react"]
+    # conf is a required peer of electron-store, ajv a required peer of conf.
+    assert _dependencies(tree) == (["ajv", "conf", "electron-store"], ["debug", "react", "typescript"])
+
+
+def test_installed_manifest_wins_over_registry(tree):
+    installed = tree / "node_modules" / "electron-store"
+    installed.mkdir(parents=True)
+    (installed / "package.json").write_text(json.dumps({"name": "electron-store", "peerDependencies": {"debug": "*"}}))
+    feishin_optimize.prune_dependencies(tree, use_cache=False)
+    assert _dependencies(tree) == (["debug", "electron-store"], ["ajv", "conf", "react", "typescript"])
+
+
+def test_unknown_peers_keep_every_dependency(tree, tmp_path):
+    (tmp_path / "npm" / "conf.json").unlink()
+    before = (tree / "package.json").read_text()
+    result = feishin_optimize.prune_dependencies(tree, use_cache=False)
+    assert result.moved == []
+    assert result.kept == 5
+    assert "conf" in result.warnings[0]
+    assert (tree / "package.json").read_text() == before
@@ -0,0 +1,155 @@
+import hashlib
+import re
+
+import chunk_graph
+import feishin_optimize
+
+# The defaults before packages were checked against the renderer's import graph.
+PREVIOUS_RENDERER_CHUNKS = {
+    "react": "react",
+    "react-dom": "react",
+    "react-router": "react",
+    "@mantine/core": "mantine",
+    "@mantine/hooks": "mantine",
+    "@mantine/dates": "mantine",
+    "ag-grid-community": "ag-grid",
+    "ag-grid-react": "ag-grid",
+    "lodash": "lodash",
+}
+
+# Bytes each package contributes to the renderer bundle.
+PACKAGE_SIZES = {
+    "react": 10_000,
+    "react-dom": 130_000,
+    "react-router": 60_000,
+    "@mantine/core": 300_000,
+    "@mantine/hooks": 20_000,
+    "@mantine/dates": 70_000,
+    "ag-grid-community": 900_000,
+    "ag-grid-react": 40_000,
+    "lodash": 70_000,
+}
+
+SOURCES = {
+    "src/renderer/index.html": '<div id="root"></div>\n<script type="module" src="./main.tsx"></script>\n',
+    "src/renderer/main.tsx": (
+        "import { createRoot } from 'react-dom/client';\n"
+        "import { lazy } from 'react';\n"
+        "import { MantineProvider } from '@mantine/core';\n"
+        "import { useDisclosure } from '@mantine/hooks';\n"
+        "import { createHashRouter } from 'react-router';\n"
+        "import debounce from 'lodash/debounce';\n"
+        "import type { ColDef } from 'ag-grid-community';\n"
+        "const Library = lazy(() => import('./routes/library'));\n"
+        "const Settings = lazy(() => import('./routes/settings'));\n"
+    ),
+    "src/renderer/routes/library.tsx": (
+        "import { AgGridReact } from 'ag-grid-react';\nimport { ModuleRegistry } from 'ag-grid-community';\n"
+    ),
+    "src/renderer/routes/settings.tsx": (
+        "import { DatePicker } from '@mantine/dates';\nimport { Button } from '@mantine/core';\n"
+    ),
+}
+
+
+def _tree(root):
+    for relpath, text in SOURCES.items():
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def _filler(name, size):
+    """Incompressible-enough JS of ``size`` bytes standing in for a package's code."""
+    blocks = (hashlib.sha256(f"{name}{counter}".encode()).hexdigest() for counter in range(size // 64 + 1))
+    return f"/*{''.join(blocks)[: size - 4]}*/"
+
+
+def _emit(root, out, chunks):
+    """Lay out out/renderer the way advancedChunks groups split modules.
+
+    Every package matching a group's ``test`` goes to that group's chunk,
+    whoever imports it; the rest goes to the entry chunk when the entry
+    imports it, else to the route chunk importing it. A chunk statically
+    imports each group chunk holding a package it uses, and the entry
+    imports the route chunks dynamically.
+    """
+    groups = [
+        (name, re.compile(re.search(r"test: /(.*)/ }$", source).group(1)))
+        for name, source in feishin_optimize._chunk_groups(chunks)
+    ]
+    graph = feishin_optimize.import_graph.build_graph(root, ["src/renderer"])
+    sources = {
+        "index": "src/renderer/main.tsx",
+        "library": "src/renderer/routes/library.tsx",
+        "settings": "src/renderer/routes/settings.tsx",
+    }
+    bodies = {name: [] for name in [*sources, *(group for group, _ in groups)]}
+    imports = {name: set() for name in bodies}
+    for chunk, relpath in sources.items():
+        for package, kind in dict.fromkeys(graph.modules[relpath].packages):
+            if kind == "type":
+                continue
+            module = f"/app/node_modules/{package}/index.js"
+            group = next((name for name, test in groups if test.search(module)), None)
+            if group is None:
+                if package not in bodies["index"]:
+                    bodies[chunk].append(package)
+            else:
+                if package not in bodies[group]:
+                    bodies[group].append(package)
+                imports[chunk].add(group)
+    out.mkdir(parents=True)
+    (out / "index.html").write_text('<script type="module" src="./assets/index-1a2b3c4d.js"></script>\n')
+    (out / "assets").mkdir()
+    for chunk, packages in bodies.items():
+        lines = [f'import "./{target}-1a2b3c4d.js";' for target in sorted(imports[chunk])]
+        if chunk == "index":
+            lines += ['import("./library-1a2b3c4d.js");', 'import("./settings-1a2b3c4d.js");']
+        lines += [_filler(package, PACKAGE_SIZES[package]) for package in packages]
+        (out / "assets" / f"{chunk}-1a2b3c4d.js").write_text("\n".join(lines) + "\n")
+    return chunk_graph.build_report(out)
+
+
+def _initial_chunks(report):
+    return sorted(name for name, chunk in report["chunks"].items() if chunk["load"] == "initial")
+
+
+def test_only_lazily_imported_packages_get_groups(tmp_path):
+    root = _tree(tmp_path)
+    chunks, notes = feishin_optimize.lazy_renderer_chunks(root, PREVIOUS_RENDERER_CHUNKS, use_cache=False)
+    assert chunks == {"@mantine/dates": "mantine", "ag-grid-community": "ag-grid", "ag-grid-react": "ag-grid"}
+    first_paint = [note.split()[2] for note in notes]
+    assert first_paint == ["react", "react-dom", "react-router", "@mantine/core", "@mantine/hooks", "lodash"]
+
+
+def test_default_map_keeps_lazy_packages_only(tmp_path):
+    root = _tree(tmp_path)
+    chunks, _ = feishin_optimize.lazy_renderer_chunks(root, feishin_optimize.RENDERER_CHUNKS, use_cache=False)
+    assert chunks == {"ag-grid-community": "ag-grid", "ag-grid-react": "ag-grid", "@mantine/dates": "mantine-dates"}
+
+
+def test_missing_entry_html_adds_no_groups(tmp_path):
+    root = _tree(tmp_path)
+    (root / "src" / "renderer" / "index.html").unlink()
+    chunks, notes = feishin_optimize.lazy_renderer_chunks(root, feishin_optimize.RENDERER_CHUNKS, use_cache=False)
+    assert chunks == {}
+    assert "not found" in notes[0]
+
+
+def test_initial_load_goes_down(tmp_path):
+    root = _tree(tmp_path / "upstream")
+    before = _emit(root, tmp_path / "before", PREVIOUS_RENDERER_CHUNKS)
+    chunks, _ = feishin_optimize.lazy_renderer_chunks(root, feishin_optimize.RENDERER_CHUNKS, use_cache=False)
+    after = _emit(root, tmp_path / "after", chunks)
+    # Before: @mantine/dates rides in the eager mantine group, and react/mantine/lodash
+    # are split into extra first-paint requests.
+    eager_groups = ("index", "lodash", "mantine", "react")
+    assert _initial_chunks(before) == [f"assets/{name}-1a2b3c4d.js" for name in eager_groups]
+    assert _initial_chunks(after) == ["assets/index-1a2b3c4d.js"]
+    saved = before["totals"]["initial"]["raw"] - after["totals"]["initial"]["raw"]
+    assert saved >= PACKAGE_SIZES["@mantine/dates"]
+    assert after["totals"]["initial"]["gzip"] < before["totals"]["initial"]["gzip"]
+    # The bytes left first paint; @mantine/dates now loads with the settings route.
+    assert after["totals"]["lazy"]["raw"] - before["totals"]["lazy"]["raw"] >= PACKAGE_SIZES["@mantine/dates"]
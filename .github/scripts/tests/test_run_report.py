@@ -0,0 +1,91 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import feishin_optimize
+
+SCRIPT = Path(feishin_optimize.__file__)
+
+
+def _upper(content, stats):
+    stats.matches += 1
+    return content.upper()
+
+
+def _unchanged(content, stats):
+    return content
+
+
+TRANSFORMS = [
+    feishin_optimize.SourceTransform("upper", ("src/**/*.ts",), _upper, (b"needle",)),
+    feishin_optimize.SourceTransform("noop", ("src/**/*.ts",), _unchanged),
+]
+
+
+def _tree(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.ts").write_text("needle\n")
+    (tmp_path / "src" / "b.ts").write_text("plain text\n")
+    return tmp_path
+
+
+def test_reads_are_charged_once_per_file_and_only_to_passes_that_ran(tmp_path):
+    root = _tree(tmp_path)
+    report = feishin_optimize.run_transforms(root, TRANSFORMS, jobs=1)
+    assert (report.files_visited, report.files_opened, report.bytes_read) == (2, 2, 18)
+    assert (report.bytes_written, report.bytes_would_write) == (7, 0)
+    upper, noop = report.passes["upper"], report.passes["noop"]
+    assert (upper.files_visited, upper.files_opened, upper.bytes_read, upper.files_changed) == (2, 1, 7, 1)
+    assert (noop.files_visited, noop.files_opened, noop.bytes_read, noop.files_changed) == (2, 2, 18, 0)
+
+
+def test_dry_run_counts_bytes_it_would_write(tmp_path):
+    root = _tree(tmp_path)
+    report = feishin_optimize.run_transforms(root, TRANSFORMS, jobs=1, dry_run=True)
+    assert (report.bytes_written, report.bytes_would_write) == (0, 7)
+    assert (report.passes["upper"].bytes_written, report.passes["upper"].bytes_would_write) == (0, 7)
+    assert (root / "src" / "a.ts").read_text() == "needle\n"
+
+
+def test_unchanged_hash_is_not_charged_to_passes(tmp_path):
+    root = _tree(tmp_path)
+    manifest = feishin_optimize.RunManifest.load(tmp_path / "manifest.json", "rules")
+    feishin_optimize.run_transforms(root, TRANSFORMS, jobs=1, manifest=manifest)
+    manifest = feishin_optimize.RunManifest.load(tmp_path / "manifest.json", "rules")
+    # A stale size/mtime (a touched file) with the content hash the last run left.
+    manifest.files["src/b.ts"] = (0, 0, manifest.files["src/b.ts"][2])
+    report = feishin_optimize.run_transforms(root, TRANSFORMS, jobs=1, manifest=manifest)
+    assert (report.cache_hits, report.files_opened) == (1, 1)
+    assert all(stats.files_opened == 0 and stats.bytes_read == 0 for stats in report.passes.values())
+
+
+def test_dry_run_json_report_is_one_json_document(tmp_path):
+    (tmp_path / "src").mkdir()
+    source = tmp_path / "src" / "player.tsx"
+    source.write_text("import { FaPlay } from 'react-icons/fa';\n")
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), str(tmp_path), "--dry-run", "--report", "json", "--no-cache", "--jobs", "1"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    report = json.loads(result.stdout)
+    assert report["bytes_written"] == 0 and report["bytes_would_write"] > 0
+    assert report["passes"]["barrel imports"]["bytes_written"] == 0
+    assert report["diffs"][0].startswith("--- a/src/player.tsx\n+++ b/src/player.tsx\n")
+    assert source.read_text() == "import { FaPlay } from 'react-icons/fa';\n"
+
+
+@pytest.mark.parametrize("mode", ["--check", "--dry-run"])
+def test_check_and_dry_run_write_no_cache_files(tmp_path, mode):
+    renderer = tmp_path / "src" / "renderer"
+    renderer.mkdir(parents=True)
+    (renderer / "index.html").write_text('<script type="module" src="./main.tsx"></script>\n')
+    (renderer / "main.tsx").write_text("const grid = () => import('ag-grid-react');\n")
+    (tmp_path / "node_modules").mkdir()
+    before = sorted(path.relative_to(tmp_path) for path in tmp_path.rglob("*"))
+    subprocess.run([sys.executable, str(SCRIPT), str(tmp_path), mode, "--jobs", "1"], capture_output=True, text=True)
+    assert sorted(path.relative_to(tmp_path) for path in tmp_path.rglob("*")) == before
@@ -0,0 +1,130 @@
+import pytest
+
+from ts_config import ConfigEditor, ConfigParseError
+
+VITE_CONFIG = """\
+import { defineConfig } from 'vite';
+import react from '@vitejs/plugin-react';
+
+const banner = `/* ${'{'} not a brace */`;
+
+export default defineConfig({
+    // a stray } in a comment
+    define: {
+        'process.env.BRACES': JSON.stringify('}{'),
+        PATTERN: /[}{]+\\//g,
+    },
+    plugins: [react({ babel: { plugins: ['{'] } })],
+    build: {
+        rollupOptions: {
+            output: { banner },
+        },
+        /* } */ sourcemap: true,
+    },
+    resolve: {
+        alias: { '/@': `${__dirname}/src` },
+    },
+});
+"""
+
+
+def test_braces_in_strings_comments_templates_and_regexes():
+    editor = ConfigEditor(VITE_CONFIG)
+    assert [prop.key for prop in editor.root.properties] == ["define", "plugins", "build", "resolve"]
+    assert editor.value("define.PATTERN") == "/[}{]+\\//g"
+    assert editor.value("define.process.env.BRACES") is None
+    assert editor.get("define").child.get("process.env.BRACES") is not None
+    assert editor.value("build.sourcemap") == "true"
+    assert editor.value("build.rollupOptions.output") == "{ banner }"
+    assert editor.value("resolve.alias./@") == "`${__dirname}/src`"
+    assert editor.elements("plugins") == ["react({ babel: { plugins: ['{'] } })"]
+
+
+def test_unbalanced_config_is_rejected():
+    with pytest.raises(ConfigParseError):
+        ConfigEditor("export default defineConfig({ build: { minify: true }")
+
+
+@pytest.mark.parametrize(
+    "action",
+    [
+        lambda editor: editor.set("build.minify", "'esbuild'"),
+        lambda editor: editor.set("build.rollupOptions.treeshake", "{ preset: 'smallest' }"),
+        lambda editor: editor.set("server.port", "4343", create_parents=True),
+        lambda editor: editor.set_key("define", "__APP_FLAG__", "'1'"),
+        lambda editor: editor.setdefault("build.sourcemap", "false"),
+        lambda editor: editor.rename("build.sourcemap", "sourceMap"),
+        lambda editor: editor.ensure_items("build.rollupOptions.external", ["electron", "node:fs"]),
+        lambda editor: editor.ensure_calls("plugins", ["bytecodePlugin()", "react()"]),
+    ],
+)
+def test_edits_are_idempotent(action):
+    editor = ConfigEditor(VITE_CONFIG)
+    action(editor)
+    once = editor.text
+    changes = editor.changes
+    action(editor)
+    assert editor.text == once
+    assert editor.changes == changes
+    # The edited text still parses to the same tree.
+    assert ConfigEditor(once).text == once
+
+
+def test_set_creates_parents_and_keeps_indentation():
+    editor = ConfigEditor(VITE_CONFIG)
+    assert editor.set("server.port", "4343", create_parents=True)
+    assert "    server: {\n        port: 4343,\n    },\n});" in editor.text
+    assert editor.value("server.port") == "4343"
+
+
+def test_missing_parent_is_recorded_without_creating_it():
+    editor = ConfigEditor(VITE_CONFIG)
+    assert not editor.set("server.port", "4343")
+    assert editor.missing == ["server"]
+    assert editor.text == VITE_CONFIG
+
+
+def test_setdefault_keeps_existing_value():
+    editor = ConfigEditor(VITE_CONFIG)
+    assert not editor.setdefault("build.sourcemap", "false")
+    assert editor.value("build.sourcemap") == "true"
+    assert editor.text == VITE_CONFIG
+
+
+def test_rename_keeps_quotes_and_refuses_to_clobber():
+    editor = ConfigEditor(VITE_CONFIG)
+    assert editor.rename("define.PATTERN", "REGEX")
+    assert editor.value("define.REGEX") == "/[}{]+\\//g"
+    editor = ConfigEditor("export default { a: 1, 'b-c': 2, d: 3 };\n")
+    assert editor.rename("b-c", "e")
+    assert editor.text == "export default { a: 1, 'e': 2, d: 3 };\n"
+    assert not editor.rename("a", "d")
+    assert not editor.rename("missing", "f")
+
+
+def test_ensure_items_matches_quote_style_in_multi_line_arrays():
+    text = 'export default {\n  external: [\n    "electron",\n    "fsevents",\n  ],\n};\n'
+    editor = ConfigEditor(text)
+    assert editor.ensure_items("external", ["electron", "node:fs"])
+    assert editor.text == 'export default {\n  external: [\n    "electron",\n    "fsevents",\n    "node:fs",\n  ],\n};\n'
+    assert not editor.ensure_items("external", ["node:fs", "fsevents"])
+
+
+def test_ensure_calls_leaves_configured_calls_alone():
+    editor = ConfigEditor("export default defineConfig({ plugins: [react(), bytecodePlugin({ protectedStrings: [] })] });\n")
+    assert not editor.ensure_calls("plugins", ["bytecodePlugin()"])
+    assert editor.ensure_calls("plugins", ["externalizeDepsPlugin()"])
+    assert editor.elements("plugins")[-1] == "externalizeDepsPlugin()"
+
+
+def test_append_to_non_array_is_recorded():
+    editor = ConfigEditor("export default { plugins: getPlugins() };\n")
+    assert not editor.append("plugins", ["react()"])
+    assert editor.missing == ["plugins (not an array literal)"]
+
+
+def test_named_config_and_arrow_function_exports():
+    named = "const config = { build: { minify: false } };\nexport default config;\n"
+    assert ConfigEditor(named).value("build.minify") == "false"
+    arrow = "export default defineConfig(({ mode }) => ({\n  base: mode === 'x' ? '{' : '/',\n}));\n"
+    assert ConfigEditor(arrow).value("base") == "mode === 'x' ? '{' : '/'"
@@ -0,0 +1,130 @@
+import pytest
+
+import feishin_optimize
+import ts_imports
+from ts_imports import ImportSpecifier
+
+
+def _sources(text):
+    return [declaration.source for declaration in ts_imports.scan_imports(text)]
+
+
+def test_multi_line_import_with_aliases_and_trailing_comma():
+    text = (
+        "import {\n"
+        "    FaPlay as PlayIcon, // primary\n"
+        "    FaPause,\n"
+        "    /* spare */ FaHeart as Heart,\n"
+        "} from 'react-icons/fa';\n"
+        "const x = 1;\n"
+    )
+    (declaration,) = ts_imports.scan_imports(text)
+    assert declaration.source == "react-icons/fa"
+    assert declaration.specifiers == (
+        ImportSpecifier("FaPlay", "PlayIcon"),
+        ImportSpecifier("FaPause", "FaPause"),
+        ImportSpecifier("FaHeart", "Heart"),
+    )
+    assert text[declaration.start : declaration.end] == text[: text.index(";") + 1]
+
+
+def test_default_namespace_and_type_forms():
+    text = (
+        "import React, { useState as useLocalState } from 'react';\n"
+        "import * as path from \"node:path\"\n"
+        "import type { Song, Album as A } from '/@/renderer/api/types';\n"
+        "import { type IpcMain, ipcMain } from 'electron';\n"
+        "import type Store from 'electron-store';\n"
+        "import './styles.css';\n"
+        "import data from './data.json' with { type: 'json' };\n"
+    )
+    declarations = ts_imports.scan_imports(text)
+    assert [item.source for item in declarations] == [
+        "react", "node:path", "/@/renderer/api/types", "electron", "electron-store", "./styles.css", "./data.json"
+    ]
+    react, path, types, electron, store, css, data = declarations
+    assert react.default == "React" and react.specifiers == (ImportSpecifier("useState", "useLocalState"),)
+    assert path.namespace == "path" and not path.named_only
+    assert types.type_only and types.specifiers[1] == ImportSpecifier("Album", "A")
+    assert electron.specifiers == (ImportSpecifier("IpcMain", "IpcMain", True), ImportSpecifier("ipcMain", "ipcMain"))
+    assert store.type_only and store.default == "Store"
+    assert css.specifiers == () and css.default is None
+    assert text[data.start : data.end] == "import data from './data.json' with { type: 'json' };"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "// import { FaPlay } from 'react-icons/fa';\n",
+        "/* import { FaPlay } from 'react-icons/fa'; */\n",
+        "/**\n * import { FaPlay } from 'react-icons/fa';\n */\n",
+        "const s = \"import { FaPlay } from 'react-icons/fa'\";\n",
+        "const t = `import { FaPlay } from 'react-icons/fa'`;\n",
+        "const u = `${x ? `import { a } from 'b'` : ''}`;\n",
+        "const r = /import { FaPlay } from 'react-icons\\/fa'/;\n",
+        "const lazy = import('react-icons/fa');\nconst meta = import.meta.url;\n",
+        "reimport { FaPlay } from 'react-icons/fa';\n",
+    ],
+    ids=["line", "block", "jsdoc", "string", "template", "nested template", "regex", "dynamic", "identifier"],
+)
+def test_commented_and_quoted_imports_are_ignored(text):
+    assert ts_imports.scan_imports(text) == []
+
+
+def test_real_import_after_commented_one():
+    text = "// import { A } from 'a';\n/* import { B } from 'b'; */\nimport { C } from 'c';\n"
+    assert _sources(text) == ["c"]
+
+
+def test_division_is_not_a_regex():
+    text = "const half = total / 2; const q = a / b / c;\nimport { D } from 'd';\n"
+    assert _sources(text) == ["d"]
+
+
+def test_barrel_rewrite_keeps_aliases_and_skips_comments():
+    text = (
+        "// import { FaStop } from 'react-icons/fa';\n"
+        "import type { IconType } from 'react-icons';\n"
+        "import {\n  FaPlay as PlayIcon,\n  FaPause,\n} from 'react-icons/fa';\n"
+        "export const icons: IconType[] = [PlayIcon, FaPause];\n"
+    )
+    stats = feishin_optimize.PassStats()
+    output = feishin_optimize._rewrite_barrel_imports(text, stats)
+    assert output == (
+        "// import { FaStop } from 'react-icons/fa';\n"
+        "import type { IconType } from 'react-icons';\n"
+        'import { FaPlay as PlayIcon } from "@react-icons/all-files/fa/FaPlay";\n'
+        'import { FaPause } from "@react-icons/all-files/fa/FaPause";\n'
+        "export const icons: IconType[] = [PlayIcon, FaPause];\n"
+    )
+    assert stats.details == {"react-icons": 1}
+    assert feishin_optimize._rewrite_barrel_imports(output, feishin_optimize.PassStats()) == output
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        (
+            "import { defineConfig } from 'electron-vite';\n",
+            "import { defineConfig, bytecodePlugin } from 'electron-vite';\n",
+        ),
+        (
+            "import {\n  defineConfig,\n  externalizeDepsPlugin\n} from 'electron-vite';\n",
+            "import {\n  defineConfig,\n  externalizeDepsPlugin,\n  bytecodePlugin,\n} from 'electron-vite';\n",
+        ),
+        (
+            'import { resolve } from "path";\n\nexport default {};\n',
+            'import { resolve } from "path";\nimport { bytecodePlugin } from "electron-vite";\n\nexport default {};\n',
+        ),
+        ("export default {};\n", "import { bytecodePlugin } from 'electron-vite';\nexport default {};\n"),
+        (
+            "import { bytecodePlugin as bp, defineConfig } from 'electron-vite';\n",
+            "import { bytecodePlugin as bp, defineConfig, bytecodePlugin } from 'electron-vite';\n",
+        ),
+    ],
+    ids=["single line", "multi line", "new declaration", "no imports", "aliased"],
+)
+def test_ensure_named_import(text, expected):
+    output = ts_imports.ensure_named_import(text, "electron-vite", "bytecodePlugin")
+    assert output == expected
+    assert ts_imports.ensure_named_import(output, "electron-vite", "bytecodePlugin") == output
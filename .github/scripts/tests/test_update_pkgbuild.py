@@ -0,0 +1,48 @@
+import pytest
+
+import update_pkgbuild
+from build_manifest import MANIFEST_NAME
+
+ASSETS = [
+    {"name": "Feishin-linux-amd64.deb", "browser_download_url": "https://example.invalid/app.deb"},
+    {"name": MANIFEST_NAME, "browser_download_url": "https://example.invalid/manifest.json"},
+]
+
+
+class _Client:
+    def __init__(self, document):
+        self.document = document
+
+    def get_json(self, url):
+        return self.document
+
+
+def _major(document):
+    return update_pkgbuild.manifest_electron_major(_Client(document), ASSETS, "Feishin-linux-amd64.deb", "abc")
+
+
+def test_manifest_vouching_for_the_asset_gives_the_major():
+    document = {"electron": {"major": 39}, "assets": [{"name": "Feishin-linux-amd64.deb", "sha256": "abc"}]}
+    assert _major(document) == "39"
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        [],
+        "build-manifest",
+        None,
+        {"electron": "39", "assets": []},
+        {"electron": {"major": 39}, "assets": {"Feishin-linux-amd64.deb": "abc"}},
+        {"electron": {"major": 39}, "assets": ["Feishin-linux-amd64.deb"]},
+    ],
+)
+def test_malformed_manifest_is_ignored(document, capsys):
+    assert _major(document) is None
+    assert capsys.readouterr().out == f"Ignoring {MANIFEST_NAME}: not a build manifest\n"
+
+
+def test_manifest_for_another_asset_is_ignored(capsys):
+    document = {"electron": {"major": 39}, "assets": [{"name": "Feishin-linux-amd64.deb", "sha256": "other"}]}
+    assert _major(document) is None
+    assert "does not describe Feishin-linux-amd64.deb" in capsys.readouterr().out
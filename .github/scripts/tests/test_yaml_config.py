@@ -0,0 +1,173 @@
+import pytest
+
+import feishin_optimize
+import yaml_config
+
+MAPPING_TARGETS = """appId: org.jeffvli.feishin
+linux:
+  target:
+    - target: AppImage
+      arch: [x64, arm64]
+    # the deb is what the PKGBUILD repackages
+    - target: deb
+      arch:
+        - x64
+    - snap
+  category: AudioVideo
+"""
+
+
+def test_set_items_keeps_mapping_items_it_retains():
+    editor = yaml_config.YamlEditor(MAPPING_TARGETS)
+    assert editor.items("linux.target") == ["AppImage", "deb", "snap"]
+    assert editor.set_items("linux.target", ["AppImage", "deb", "tar.xz"])
+    assert editor.text == MAPPING_TARGETS.replace("    - snap\n", "    - tar.xz\n")
+
+
+def test_set_items_drops_and_reorders_whole_items():
+    editor = yaml_config.YamlEditor(MAPPING_TARGETS)
+    assert editor.set_items("linux.target", ["deb", "AppImage"])
+    assert editor.text == (
+        "appId: org.jeffvli.feishin\nlinux:\n  target:\n"
+        "    # the deb is what the PKGBUILD repackages\n    - target: deb\n      arch:\n        - x64\n"
+        "    - target: AppImage\n      arch: [x64, arm64]\n"
+        "  category: AudioVideo\n"
+    )
+    assert not editor.set_items("linux.target", ["deb", "AppImage"])
+
+
+@pytest.mark.parametrize(
+    ("profile", "expected"),
+    [
+        ("release", MAPPING_TARGETS.replace("    - snap\n", "    - tar.xz\n") + "compression: maximum\n"),
+        (
+            "fast",
+            "appId: org.jeffvli.feishin\nlinux:\n  target:\n"
+            "    # the deb is what the PKGBUILD repackages\n    - target: deb\n      arch:\n        - x64\n"
+            "  category: AudioVideo\ncompression: store\n",
+        ),
+    ],
+)
+def test_build_profiles_keep_per_target_arch(profile, expected):
+    rewrite = feishin_optimize._rewrite_electron_builder
+    output = rewrite(MAPPING_TARGETS, feishin_optimize.PassStats(), profile=profile)
+    assert output == expected
+    assert rewrite(output, feishin_optimize.PassStats(), profile=profile) == output
+
+
+def test_comment_after_last_item_stays_with_it():
+    text = "linux:\n  target:\n    - deb\n    - tar.xz\n    # keep tar.xz for the AUR\nappId: x\n"
+    editor = yaml_config.YamlEditor(text)
+    assert editor.set_items("linux.target", ["tar.xz"])
+    assert editor.set("compression", "maximum")
+    assert editor.text == "linux:\n  target:\n    - tar.xz\n    # keep tar.xz for the AUR\nappId: x\ncompression: maximum\n"
+
+
+COMMENTED = """\
+# electron-builder config
+appId: org.jeffvli.feishin  # reverse DNS
+productName: 'Feishin'
+
+linux:
+  # package formats
+  target: [AppImage, "deb"]  # trimmed in CI
+  category: AudioVideo
+asar: true
+"""
+
+
+def test_edits_keep_comments_and_untouched_lines():
+    editor = yaml_config.YamlEditor(COMMENTED)
+    assert editor.set("appId", "org.example.feishin")
+    assert editor.set("asar", "false")
+    assert editor.text == (
+        COMMENTED.replace("appId: org.jeffvli.feishin  #", "appId: org.example.feishin  #")
+        .replace("asar: true", "asar: 'false'")
+    )
+    assert not editor.set("productName", "Feishin")
+    assert editor.changes == 2
+
+
+def test_crlf_line_endings_are_preserved():
+    text = COMMENTED.replace("\n", "\r\n")
+    editor = yaml_config.YamlEditor(text)
+    assert editor.items("linux.target") == ["AppImage", "deb"]
+    assert editor.set_items("linux.target", ["deb"])
+    assert editor.set("linux.executableName", "feishin")
+    assert editor.set("compression", "maximum")
+    assert "\n" not in editor.text.replace("\r\n", "")
+    assert editor.text == text.replace(
+        '  target: [AppImage, "deb"]  # trimmed in CI\r\n  category: AudioVideo\r\n',
+        "  target:  # trimmed in CI\r\n    - deb\r\n  category: AudioVideo\r\n  executableName: feishin\r\n",
+    ) + "compression: maximum\r\n"
+
+
+def test_crlf_file_without_final_newline():
+    editor = yaml_config.YamlEditor("appId: x\r\nasar: true")
+    assert editor.set("compression", "store")
+    assert editor.text == "appId: x\r\nasar: true\r\ncompression: store\r\n"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "linux:\n  target: [AppImage, 'deb', \"tar.xz\"]\n",
+        "linux:\n  target:\n    - AppImage\n    - 'deb'\n    - \"tar.xz\"\n",
+        "linux:\n  target:\n  - AppImage\n  # comment between items\n  - deb\n  -   tar.xz\n",
+    ],
+)
+def test_flow_and_block_sequences_read_the_same(text):
+    editor = yaml_config.YamlEditor(text)
+    assert editor.items("linux.target") == ["AppImage", "deb", "tar.xz"]
+    assert not editor.set_items("linux.target", ["AppImage", "deb", "tar.xz"])
+    assert editor.text == text
+
+
+def test_flow_sequence_is_rewritten_in_block_style():
+    editor = yaml_config.YamlEditor("linux:\n  target: [AppImage, deb]\n  category: Audio\n")
+    assert editor.set_items("linux.target", ["deb", "tar.xz"])
+    assert editor.text == "linux:\n  target:\n    - deb\n    - tar.xz\n  category: Audio\n"
+
+
+def test_block_sequence_at_key_indent_keeps_its_indent():
+    editor = yaml_config.YamlEditor("linux:\n  target:\n  - AppImage\n  - deb\n  category: Audio\n")
+    assert editor.replace_item("linux.target", "AppImage", ["tar.xz", "deb"])
+    assert editor.text == "linux:\n  target:\n  - tar.xz\n  - deb\n  category: Audio\n"
+    assert not editor.replace_item("linux.target", "snap", ["zip"])
+
+
+def test_set_replaces_a_block_and_creates_parents():
+    editor = yaml_config.YamlEditor("linux:\n  target:\n    - deb\n  category: Audio\n")
+    assert editor.set("linux.target", "dir")
+    assert editor.set("deb.compression", "xz", create_parents=True)
+    assert not editor.set("rpm.compression", "xz")
+    assert editor.missing == ["rpm"]
+    assert editor.text == "linux:\n  target: dir\n  category: Audio\ndeb:\n  compression: xz\n"
+
+
+@pytest.mark.parametrize(
+    ("value", "rendered"),
+    [
+        ("AppImage", "AppImage"),
+        ("tar.xz", "tar.xz"),
+        ("$HOME/bin", "$HOME/bin"),
+        ("${productName}-${version}.${ext}", "'${productName}-${version}.${ext}'"),
+        ("true", "'true'"),
+        ("No", "'No'"),
+        ("1.0", "'1.0'"),
+        ("42", "'42'"),
+        ("a: b", "'a: b'"),
+        ("it's", "'it''s'"),
+        ("#tag", "'#tag'"),
+        ("", "''"),
+    ],
+)
+def test_render_scalar_quotes_only_when_needed(value, rendered):
+    assert yaml_config.render_scalar(value) == rendered
+    assert yaml_config.unquote(rendered) == value
+
+
+def test_multi_document_streams_are_rejected():
+    with pytest.raises(yaml_config.YamlConfigError):
+        yaml_config.YamlEditor("---\nappId: a\n---\nappId: b\n")
+    assert yaml_config.YamlEditor("---\nappId: a\n").value("appId") == "a"
@@ -0,0 +1,525 @@
+"""Structured, format-preserving edits of a Vite/electron-vite config object.
+
+``ConfigEditor`` locates the object literal a config module exports (directly,
+through a wrapper call such as ``defineConfig({...})``, an arrow function
+returning it, or a ``const config = {...}`` that is exported by name) and
+parses it into a key tree that records the source span of every property.
+Values that are not object literals are kept as opaque text spans, with
+strings, comments, template and regular-expression literals skipped while
+scanning, so braces inside them never confuse the tree.
+
+Edits address properties by dotted path (``renderer.build.sourcemap``) and
+splice only the affected span; everything else in the file keeps its bytes.
+Paths whose parent object does not exist are recorded in ``missing`` rather
+than silently ignored.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<skip>\s+|//[^\n]*|/\*[\s\S]*?\*/)
+    | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+    | (?P<template>`)
+    | (?P<ident>[A-Za-z_$][\w$]*)
+    | (?P<number>\.?\d[\w.]*)
+    | (?P<punct>\.\.\.|=>|[^\s])
+    """,
+    re.VERBOSE,
+)
+_TEMPLATE_BODY_RE = re.compile(r"(?:[^`\\$]|\\[\s\S]|\$(?!\{))*")
+_REGEX_LITERAL_RE = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_IDENT_RE = re.compile(r"[A-Za-z_$][\w$]*")
+
+# A "/" after one of these starts a regular expression rather than a division.
+_REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%~^") | {"=>", ""}
+_REGEX_KEYWORDS = frozenset({"return", "typeof", "case", "in", "of", "new", "void", "throw", "await"})
+_CLOSERS = {"(": ")", "[": "]", "{": "}"}
+
+
+class ConfigParseError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+@dataclass
+class Property:
+    key: str | None
+    start: int
+    key_end: int
+    value_start: int
+    value_end: int
+    # Set when the value is an object literal.
+    child: ObjectNode | None = None
+    comma_end: int | None = None
+
+
+@dataclass
+class ObjectNode:
+    start: int
+    end: int
+    properties: list[Property] = field(default_factory=list)
+
+    def get(self, key: str) -> Property | None:
+        for prop in self.properties:
+            if prop.key == key:
+                return prop
+        return None
+
+
+class _Scanner:
+    def __init__(self, text: str, pos: int = 0) -> None:
+        self.text = text
+        self.pos = pos
+        self.previous = ""
+        self._peeked: Token | None = None
+
+    def next(self) -> Token:
+        if self._peeked is not None:
+            token, self._peeked = self._peeked, None
+            return token
+        while True:
+            match = _TOKEN_RE.match(self.text, self.pos)
+            if not match:
+                return Token("eof", "", self.pos, self.pos)
+            kind = match.lastgroup
+            start = self.pos
+            self.pos = match.end()
+            if kind == "skip":
+                continue
+            if kind == "template":
+                self.pos = self._skip_template(self.pos)
+            elif match.group(0) == "/" and (
+                self.previous in _REGEX_PRECEDERS or self.previous in _REGEX_KEYWORDS
+            ):
+                literal = _REGEX_LITERAL_RE.match(self.text, start)
+                if literal:
+                    kind = "regex"
+                    self.pos = literal.end()
+            token = Token(kind, self.text[start : self.pos], start, self.pos)
+            self.previous = token.value if kind in ("punct", "ident") else kind
+            return token
+
+    def peek(self) -> Token:
+        if self._peeked is None:
+            self._peeked = self.next()
+        return self._peeked
+
+    def _skip_template(self, pos: int) -> int:
+        while True:
+            pos = _TEMPLATE_BODY_RE.match(self.text, pos).end()
+            if not self.text.startswith("${", pos):
+                return min(pos + 1, len(self.text))
+            inner = _Scanner(self.text, pos + 2)
+            inner.skip_until("}")
+            pos = inner.next().end
+
+    def skip_balanced(self, opener: Token) -> Token:
+        """Consume tokens up to and including the closer matching ``opener``."""
+        closer = _CLOSERS[opener.value]
+        while True:
+            token = self.next()
+            if token.kind == "eof":
+                raise ConfigParseError(f"Unbalanced {opener.value!r} at offset {opener.start}")
+            if token.value == closer and token.kind == "punct":
+                return token
+            if token.kind == "punct" and token.value in _CLOSERS:
+                self.skip_balanced(token)
+
+    def skip_until(self, *stops: str) -> int:
+        """Consume an expression up to a top-level ``stops`` token; return its end."""
+        end = self.pos if self._peeked is None else self._peeked.start
+        while True:
+            token = self.peek()
+            if token.kind == "eof" or (token.kind == "punct" and token.value in stops):
+                return end
+            self.next()
+            if token.kind == "punct" and token.value in _CLOSERS:
+                token = self.skip_balanced(token)
+            end = token.end
+
+
+def _parse_object(scanner: _Scanner, opener: Token) -> ObjectNode:
+    node = ObjectNode(opener.start, opener.start)
+    while True:
+        token = scanner.next()
+        if token.kind == "eof":
+            raise ConfigParseError(f"Unterminated object at offset {opener.start}")
+        if token.value == "}":
+            node.end = token.end
+            return node
+        if token.value == ",":
+            continue
+        if token.value == "...":
+            end = scanner.skip_until(",", "}")
+            prop = Property(None, token.start, token.end, token.end, end)
+        else:
+            key_end = token.end
+            if token.value == "[":
+                key = None
+                key_end = scanner.skip_balanced(token).end
+            elif token.kind == "string":
+                key = token.value[1:-1]
+            else:
+                key = token.value
+            prop = _parse_property_value(scanner, key, token.start, key_end)
+        if scanner.peek().value == ",":
+            prop.comma_end = scanner.next().end
+        node.properties.append(prop)
+
+
+def _parse_property_value(scanner: _Scanner, key: str | None, start: int, key_end: int) -> Property:
+    separator = scanner.peek()
+    if separator.value in (",", "}"):
+        # Shorthand property.
+        return Property(key, start, key_end, start, key_end)
+    if separator.value != ":":
+        # Method, getter or setter: skip to the end of its body.
+        end = scanner.skip_until(",", "}")
+        return Property(key, start, key_end, separator.start, end)
+    scanner.next()
+    value = scanner.peek()
+    if value.value == "{":
+        scanner.next()
+        child = _parse_object(scanner, value)
+        if scanner.peek().value in (",", "}"):
+            return Property(key, start, key_end, value.start, child.end, child)
+    end = scanner.skip_until(",", "}")
+    return Property(key, start, key_end, value.start, end)
+
+
+def _find_declaration(text: str, name: str) -> int | None:
+    scanner = _Scanner(text)
+    depth = 0
+    while True:
+        token = scanner.next()
+        if token.kind == "eof":
+            return None
+        if token.kind == "punct" and token.value in "([{":
+            depth += 1
+        elif token.kind == "punct" and token.value in ")]}":
+            depth -= 1
+        elif depth == 0 and token.value in ("const", "let", "var") and scanner.peek().value == name:
+            scanner.next()
+            scanner.skip_until("=")
+            scanner.next()
+            return scanner.peek().start
+
+
+def _resolve_object(text: str, pos: int, seen: frozenset[str] = frozenset()) -> int:
+    """Return the offset of the object literal the expression at ``pos`` yields."""
+    scanner = _Scanner(text, pos)
+    token = scanner.next()
+    if token.value == "{":
+        return token.start
+    if token.value == "(":
+        scanner.skip_balanced(token)
+        if scanner.peek().value == "=>":
+            return _resolve_arrow_body(text, scanner, seen)
+        return _resolve_object(text, token.end, seen)
+    if token.value == "async":
+        return _resolve_object(text, token.end, seen)
+    if token.kind == "ident":
+        follow = scanner.peek()
+        if follow.value == "=>":
+            return _resolve_arrow_body(text, scanner, seen)
+        while follow.value == ".":
+            scanner.next()
+            scanner.next()
+            follow = scanner.peek()
+        if follow.value == "(":
+            # A wrapper call such as defineConfig(...): use its first argument.
+            return _resolve_object(text, scanner.next().end, seen)
+        if token.value not in seen:
+            declaration = _find_declaration(text, token.value)
+            if declaration is not None:
+                return _resolve_object(text, declaration, seen | {token.value})
+    raise ConfigParseError(f"Cannot find a config object literal at offset {token.start}")
+
+
+def _resolve_arrow_body(text: str, scanner: _Scanner, seen: frozenset[str]) -> int:
+    scanner.next()
+    body = scanner.next()
+    if body.value != "{":
+        return _resolve_object(text, body.start, seen)
+    depth = 0
+    while True:
+        token = scanner.next()
+        if token.kind == "eof":
+            break
+        if token.kind == "punct" and token.value in "([{":
+            depth += 1
+        elif token.kind == "punct" and token.value in ")]}":
+            depth -= 1
+        elif depth == 0 and token.value == "return":
+            return _resolve_object(text, token.end, seen)
+    raise ConfigParseError(f"Arrow function at offset {body.start} returns no object")
+
+
+def find_exported_object(text: str) -> int:
+    scanner = _Scanner(text)
+    depth = 0
+    while True:
+        token = scanner.next()
+        if token.kind == "eof":
+            raise ConfigParseError("No 'export default' found")
+        if token.kind == "punct" and token.value in "([{":
+            depth += 1
+        elif token.kind == "punct" and token.value in ")]}":
+            depth -= 1
+        elif depth == 0 and token.value == "export" and scanner.peek().value == "default":
+            return _resolve_object(text, scanner.next().end)
+
+
+def parse_object(text: str, start: int) -> ObjectNode:
+    scanner = _Scanner(text, start)
+    opener = scanner.next()
+    if opener.value != "{":
+        raise ConfigParseError(f"Expected '{{' at offset {start}")
+    return _parse_object(scanner, opener)
+
+
+def _callee(expression: str) -> str:
+    match = re.match(r"[\w$.]+(?=\s*\()", expression)
+    return match.group(0) if match else expression
+
+
+def _line_indent(text: str, pos: int) -> str:
+    line_start = text.rfind("\n", 0, pos) + 1
+    match = re.match(r"[ \t]*", text[line_start:pos])
+    return match.group(0)
+
+
+class ConfigEditor:
+    """Dotted-path editor over the exported config object of ``text``."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.missing: list[str] = []
+        self.changes = 0
+        self._start = find_exported_object(text)
+        self.root = parse_object(text, self._start)
+        self._indent_unit = self._detect_indent_unit()
+
+    def _detect_indent_unit(self) -> str:
+        pairs = [(self.root.start, prop.start) for prop in self.root.properties[:1]]
+        pairs += [
+            (prop.start, prop.child.properties[0].start)
+            for prop in self.root.properties
+            if prop.child and prop.child.properties
+        ]
+        for outer_pos, inner_pos in pairs:
+            outer = _line_indent(self.text, outer_pos)
+            inner = _line_indent(self.text, inner_pos)
+            if len(inner) > len(outer) and inner.startswith(outer):
+                return inner[len(outer) :]
+        return "    "
+
+    def _splice(self, start: int, end: int, replacement: str) -> None:
+        self.text = self.text[:start] + replacement + self.text[end:]
+        self.root = parse_object(self.text, self._start)
+        self.changes += 1
+
+    def _object(self, keys: list[str]) -> ObjectNode | None:
+        node = self.root
+        for key in keys:
+            prop = node.get(key)
+            if prop is None or prop.child is None:
+                return None
+            node = prop.child
+        return node
+
+    def _ensure_object(self, keys: list[str]) -> ObjectNode | None:
+        for depth in range(len(keys)):
+            node = self._object(keys[:depth])
+            prop = node.get(keys[depth])
+            if prop is None:
+                self._insert(node, keys[depth], "{}")
+            elif prop.child is None:
+                # Present but computed (a variable, a call, ...): leave it alone.
+                return None
+        return self._object(keys)
+
+    def get(self, path: str) -> Property | None:
+        *parents, key = path.split(".")
+        node = self._object(parents)
+        return node.get(key) if node else None
+
+    def value(self, path: str) -> str | None:
+        prop = self.get(path)
+        return None if prop is None else self.text[prop.value_start : prop.value_end]
+
+    def exists(self, path: str) -> bool:
+        return self.get(path) is not None
+
+    def set(self, path: str, value: str, create_parents: bool = False) -> bool:
+        """Set ``path`` to the source text ``value``; return whether the text changed.
+
+        A missing parent object is created when ``create_parents`` is set and
+        otherwise recorded in ``missing``.
+        """
+        *parents, key = path.split(".")
+        return self._set(parents, key, value, create_parents)
+
+    def set_key(self, path: str, key: str, value: str, create_parents: bool = False, overwrite: bool = True) -> bool:
+        """Set ``key`` of the object at ``path``; ``key`` may contain dots (``define`` entries)."""
+        return self._set(path.split("."), key, value, create_parents, overwrite)
+
+    def _set(
+        self, parents: list[str], key: str, value: str, create_parents: bool, overwrite: bool = True
+    ) -> bool:
+        node = self._ensure_object(parents) if create_parents else self._object(parents)
+        if node is None:
+            self.missing.append(".".join(parents))
+            return False
+        prop = node.get(key)
+        if prop is not None and not overwrite:
+            return False
+        if prop is not None:
+            if self.text[prop.value_start : prop.value_end] == value:
+                return False
+            self._splice(prop.value_start, prop.value_end, value)
+            return True
+        self._insert(node, key, value)
+        return True
+
+    def setdefault(self, path: str, value: str, create_parents: bool = False) -> bool:
+        if self.exists(path):
+            return False
+        return self.set(path, value, create_parents)
+
+    def rename(self, path: str, new_key: str) -> bool:
+        """Rename the key at ``path`` unless ``new_key`` already exists beside it.
+
+        A missing key is not an error: renames are migrations that may
+        already have happened.
+        """
+        prop = self.get(path)
+        sibling = ".".join([*path.split(".")[:-1], new_key])
+        if prop is None or self.exists(sibling):
+            return False
+        raw_key = self.text[prop.start : prop.key_end]
+        quote = raw_key[0] if raw_key[:1] in ("'", '"') else ""
+        self._splice(prop.start, prop.key_end, f"{quote}{new_key}{quote}")
+        return True
+
+    def _array(self, path: str) -> tuple[Property, list[tuple[int, int]], bool] | None:
+        """The array literal at ``path``: its property, element spans and trailing comma."""
+        prop = self.get(path)
+        raw = self.text[prop.value_start : prop.value_end]
+        if not raw.startswith("[") or not raw.endswith("]"):
+            self.missing.append(f"{path} (not an array literal)")
+            return None
+        scanner = _Scanner(self.text, prop.value_start + 1)
+        elements: list[tuple[int, int]] = []
+        element_start = None
+        last_end = None
+        trailing_comma = False
+        while True:
+            token = scanner.next()
+            if token.end >= prop.value_end:
+                break
+            if element_start is None and token.value != ",":
+                element_start = token.start
+            if token.kind == "punct" and token.value in _CLOSERS:
+                token = scanner.skip_balanced(token)
+            trailing_comma = token.value == ","
+            if trailing_comma:
+                elements.append((element_start, last_end))
+                element_start = None
+            else:
+                last_end = token.end
+        if element_start is not None:
+            elements.append((element_start, last_end))
+        return prop, elements, trailing_comma
+
+    def append(self, path: str, rendered: list[str]) -> bool:
+        """Append source-text elements to the array at ``path``, creating it if needed."""
+        if not self.exists(path):
+            if self._object(path.split(".")[:-1]) is None:
+                self.missing.append(path)
+                return False
+            if not rendered:
+                return False
+            self.set(path, "[]")
+        array = self._array(path)
+        if array is None:
+            return False
+        prop, elements, trailing_comma = array
+        if not rendered:
+            return False
+        if not elements:
+            self._splice(prop.value_start, prop.value_end, self._array_text(prop.start, rendered))
+        elif "\n" in self.text[prop.value_start : prop.value_end]:
+            last_end = elements[-1][1]
+            indent = _line_indent(self.text, elements[-1][0])
+            suffix = "," if trailing_comma else ""
+            insert = "".join(f",\n{indent}{item}" for item in rendered) + suffix
+            self._splice(last_end, last_end + (1 if trailing_comma else 0), insert)
+        else:
+            last_end = elements[-1][1]
+            self._splice(last_end, last_end, "".join(f", {item}" for item in rendered))
+        return True
+
+    def _array_text(self, pos: int, rendered: list[str]) -> str:
+        """An array literal of ``rendered``, one element per line when it is long."""
+        single = "[" + ", ".join(rendered) + "]"
+        if len(single) <= 80 or "\n" not in self.text[self.root.start : self.root.end]:
+            return single
+        outer = _line_indent(self.text, pos)
+        inner = outer + self._indent_unit
+        return "[\n" + "".join(f"{inner}{item},\n" for item in rendered) + f"{outer}]"
+
+    def elements(self, path: str) -> list[str] | None:
+        """Source text of each element of the array literal at ``path``."""
+        if not self.exists(path):
+            return None
+        array = self._array(path)
+        return None if array is None else [self.text[start:end] for start, end in array[1]]
+
+    def ensure_items(self, path: str, items: list[str]) -> bool:
+        """Append the string ``items`` missing from the array at ``path``."""
+        present = self.elements(path) or []
+        quotes = [element[0] for element in present if element[:1] in ("'", '"')]
+        quote = quotes[-1] if quotes else "'"
+        values = {element[1:-1] for element in present if element[:1] in ("'", '"')}
+        return self.append(path, [f"{quote}{item}{quote}" for item in items if item not in values])
+
+    def ensure_calls(self, path: str, calls: list[str]) -> bool:
+        """Append the call expressions in ``calls`` whose callee the array at ``path`` lacks.
+
+        ``plugins: [react()]`` plus ``["bytecodePlugin()"]`` gains the plugin;
+        an existing ``bytecodePlugin({...})`` call is left as it is.
+        """
+        present = {_callee(element) for element in self.elements(path) or []}
+        return self.append(path, [call for call in calls if _callee(call) not in present])
+
+    def _insert(self, node: ObjectNode, key: str, value: str) -> None:
+        key_text = key if _IDENT_RE.fullmatch(key) else f"'{key}'"
+        if not node.properties:
+            if "\n" not in self.text[self.root.start : self.root.end]:
+                self._splice(node.start, node.end, f"{{ {key_text}: {value} }}")
+                return
+            indent = _line_indent(self.text, node.start)
+            self._splice(node.start, node.end, f"{{\n{indent}{self._indent_unit}{key_text}: {value},\n{indent}}}")
+            return
+        last = node.properties[-1]
+        single_line = "\n" not in self.text[node.start : node.end]
+        if single_line:
+            comma = "," if last.comma_end is None else ""
+            self._splice(last.value_end, last.value_end, f"{comma} {key_text}: {value}")
+            return
+        indent = _line_indent(self.text, last.start)
+        if last.comma_end is None:
+            self._splice(last.value_end, last.value_end, f",\n{indent}{key_text}: {value}")
+        else:
+            self._splice(last.comma_end, last.comma_end, f"\n{indent}{key_text}: {value},")
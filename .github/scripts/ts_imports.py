@@ -0,0 +1,303 @@
+"""Lightweight scanner for static ``import`` declarations in TS/TSX sources.
+
+This is not a TypeScript parser. It skips comments, string literals, template
+literals (including nested ``${}`` expressions) and regular-expression
+literals so that only real ``import`` keywords are considered, then parses the
+import clause that follows: default, namespace and named specifiers, aliases,
+``import type`` and inline ``type`` modifiers, spread over any number of lines.
+
+Scanning stops after the last textual occurrence of ``import`` in the file,
+so bodies of typical modules (imports first, code after) are never lexed.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+# Consumes plain code, comments, complete string literals and template
+# literals without substitutions in one C-level match, stopping at anything
+# the scanner has to look at: a template with ``${``, a "/" that does not open
+# a comment, or a possible ``import`` keyword.
+_SKIP_PATTERN = r"""
+    (?:
+        [^'"`/i{EXTRA}]+
+      | i(?!mport\b)
+      | //[^\n]*
+      | /\*[\s\S]*?(?:\*/|\Z)
+      | '(?:[^'\\\n]|\\[\s\S])*'?
+      | "(?:[^"\\\n]|\\[\s\S])*"?
+      | `(?:[^`\\$]|\\[\s\S]|\$(?!\{))*`
+    )*
+"""
+_SKIP_RE = re.compile(_SKIP_PATTERN.replace("{EXTRA}", ""), re.VERBOSE)
+# Inside a ``${...}`` template expression braces matter too, to find its end.
+_SKIP_TEMPLATE_EXPR_RE = re.compile(_SKIP_PATTERN.replace("{EXTRA}", "{}"), re.VERBOSE)
+_TEMPLATE_BODY_RE = re.compile(r"(?:[^`\\$]|\\[\s\S]|\$(?!\{))*")
+_REGEX_LITERAL_RE = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_CLAUSE_TOKEN_RE = re.compile(
+    r"""
+      (?P<skip>\s+|//[^\n]*|/\*[\s\S]*?\*/)
+    | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+    | (?P<ident>[A-Za-z_$][\w$]*)
+    | (?P<punct>[{},*;=(.:])
+    """,
+    re.VERBOSE,
+)
+
+# A "/" after one of these starts a regular expression rather than a division.
+_REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%~^")
+_REGEX_KEYWORDS = frozenset(
+    {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+)
+
+
+@dataclass(frozen=True)
+class ImportSpecifier:
+    imported: str
+    local: str
+    type_only: bool = False
+
+    def render(self) -> str:
+        prefix = "type " if self.type_only else ""
+        if self.imported == self.local:
+            return f"{prefix}{self.imported}"
+        return f"{prefix}{self.imported} as {self.local}"
+
+
+@dataclass(frozen=True)
+class ImportDeclaration:
+    start: int
+    end: int
+    source: str
+    default: str | None = None
+    namespace: str | None = None
+    specifiers: tuple[ImportSpecifier, ...] = ()
+    type_only: bool = False
+
+    @property
+    def named_only(self) -> bool:
+        return bool(self.specifiers) and self.default is None and self.namespace is None
+
+
+def _unquote(literal: str) -> str:
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+def _previous_significant(text: str, pos: int) -> tuple[str, str]:
+    """Return the previous non-space character and the identifier ending there."""
+    idx = pos - 1
+    while idx >= 0 and text[idx].isspace():
+        idx -= 1
+    if idx < 0:
+        return "", ""
+    end = idx + 1
+    while idx >= 0 and (text[idx].isalnum() or text[idx] in "_$"):
+        idx -= 1
+    return text[end - 1], text[idx + 1 : end]
+
+
+class _ClauseTokens:
+    def __init__(self, text: str, pos: int) -> None:
+        self.text = text
+        self.pos = pos
+        self._peeked: tuple[str, str, int] | None = None
+
+    def next(self) -> tuple[str, str, int]:
+        if self._peeked is not None:
+            token, self._peeked = self._peeked, None
+            return token
+        while True:
+            match = _CLAUSE_TOKEN_RE.match(self.text, self.pos)
+            if not match:
+                return "eof", "", self.pos
+            self.pos = match.end()
+            kind = match.lastgroup
+            if kind != "skip":
+                return kind, match.group(0), self.pos
+
+    def peek(self) -> tuple[str, str, int]:
+        if self._peeked is None:
+            self._peeked = self.next()
+        return self._peeked
+
+
+def _parse_specifiers(tokens: _ClauseTokens) -> list[ImportSpecifier] | None:
+    specifiers = []
+    while True:
+        kind, value, _ = tokens.next()
+        if value == "}":
+            return specifiers
+        type_only = False
+        if kind == "ident" and value == "type":
+            follow_kind, follow, _ = tokens.peek()
+            if follow_kind in ("ident", "string") and follow != "as":
+                type_only = True
+                kind, value, _ = tokens.next()
+        if kind not in ("ident", "string"):
+            return None
+        imported = _unquote(value) if kind == "string" else value
+        local = imported
+        kind, value, _ = tokens.next()
+        if value == "as":
+            kind, local, _ = tokens.next()
+            if kind != "ident":
+                return None
+            kind, value, _ = tokens.next()
+        specifiers.append(ImportSpecifier(imported, local, type_only))
+        if value == "}":
+            return specifiers
+        if value != ",":
+            return None
+
+
+def _parse_declaration(text: str, start: int) -> ImportDeclaration | None:
+    tokens = _ClauseTokens(text, start + len("import"))
+    kind, value, end = tokens.next()
+    default = namespace = None
+    specifiers: list[ImportSpecifier] = []
+    type_only = False
+
+    if kind == "string":
+        source = _unquote(value)
+    else:
+        if kind == "ident" and value == "type":
+            follow_kind, follow, _ = tokens.peek()
+            if follow in ("{", "*") or (follow_kind == "ident" and follow != "from"):
+                type_only = True
+                kind, value, end = tokens.next()
+        if kind == "ident" and value != "from":
+            default = value
+            kind, value, end = tokens.next()
+            if value == ",":
+                kind, value, end = tokens.next()
+        if value == "*":
+            if tokens.next()[1] != "as":
+                return None
+            kind, namespace, end = tokens.next()
+            if kind != "ident":
+                return None
+            kind, value, end = tokens.next()
+        elif value == "{":
+            parsed = _parse_specifiers(tokens)
+            if parsed is None:
+                return None
+            specifiers = parsed
+            kind, value, end = tokens.next()
+        if value != "from":
+            # Dynamic import(), import.meta or TS ``import x = require()``.
+            return None
+        kind, value, end = tokens.next()
+        if kind != "string":
+            return None
+        source = _unquote(value)
+
+    follow_kind, follow, follow_end = tokens.peek()
+    if follow in ("with", "assert") and follow_kind == "ident":
+        tokens.next()
+        if tokens.next()[1] == "{":
+            depth = 1
+            while depth:
+                kind, value, end = tokens.next()
+                if kind == "eof":
+                    return None
+                depth += {"{": 1, "}": -1}.get(value, 0)
+            follow_kind, follow, follow_end = tokens.peek()
+    if follow == ";":
+        end = follow_end
+    return ImportDeclaration(start, end, source, default, namespace, tuple(specifiers), type_only)
+
+
+def scan_imports(text: str) -> list[ImportDeclaration]:
+    """Return every static import declaration in ``text``, in source order."""
+    declarations: list[ImportDeclaration] = []
+    stop = text.rfind("import")
+    if stop < 0:
+        return declarations
+    pos = 0
+    template_depths: list[int] = []
+    depth = 0
+    while pos <= stop:
+        pattern = _SKIP_TEMPLATE_EXPR_RE if template_depths else _SKIP_RE
+        pos = pattern.match(text, pos).end()
+        char = text[pos : pos + 1]
+        if not char:
+            break
+        if char == "`":
+            pos = _skip_template(text, pos + 1, template_depths, depth)
+        elif char == "{":
+            depth += 1
+            pos += 1
+        elif char == "}":
+            pos += 1
+            if template_depths and template_depths[-1] == depth:
+                template_depths.pop()
+                pos = _skip_template(text, pos, template_depths, depth)
+            else:
+                depth -= 1
+        elif char == "/":
+            previous, word = _previous_significant(text, pos)
+            literal = None
+            if previous in _REGEX_PRECEDERS or previous == "" or word in _REGEX_KEYWORDS:
+                literal = _REGEX_LITERAL_RE.match(text, pos)
+            pos = literal.end() if literal else pos + 1
+        elif _is_import_keyword(text, pos):
+            declaration = None
+            if _previous_significant(text, pos)[0] != ".":
+                declaration = _parse_declaration(text, pos)
+            pos = declaration.end if declaration else pos + len("import")
+            if declaration:
+                declarations.append(declaration)
+        else:
+            # "import" inside a longer identifier such as "reimport".
+            pos += 1
+    return declarations
+
+
+def ensure_named_import(text: str, source: str, name: str) -> str:
+    """Return ``text`` with ``name`` imported from ``source``.
+
+    The name is added to an existing value import of ``source`` when there is
+    one, otherwise a new declaration goes after the last import.
+    """
+    declarations = scan_imports(text)
+    candidates = [item for item in declarations if item.source == source and not item.type_only]
+    for declaration in candidates:
+        if any(spec.local == name and not spec.type_only for spec in declaration.specifiers):
+            return text
+    for declaration in candidates:
+        if declaration.namespace is None and declaration.specifiers:
+            close = text.rindex("}", declaration.start, declaration.end)
+            head = text[declaration.start : close].rstrip()
+            trailing = text[declaration.start + len(head) : close]
+            if "\n" in trailing:
+                last = head.rstrip(",")
+                indent = re.match(r"[ \t]*", last[last.rfind("\n") + 1 :]).group(0)
+                insert = f"{',' if head == last else ''}\n{indent}{name},"
+            else:
+                insert = f"{'' if head.endswith(',') else ','} {name}"
+            position = declaration.start + len(head)
+            return text[:position] + insert + text[position:]
+    position = declarations[-1].end if declarations else 0
+    quote = '"' if declarations and text[declarations[-1].start : declarations[-1].end].rstrip("; ").endswith('"') else "'"
+    statement = f"import {{ {name} }} from {quote}{source}{quote};"
+    if not declarations:
+        return f"{statement}\n{text}"
+    return f"{text[:position]}\n{statement}{text[position:]}"
+
+
+def _is_import_keyword(text: str, pos: int) -> bool:
+    if not text.startswith("import", pos):
+        return False
+    if pos and (text[pos - 1].isalnum() or text[pos - 1] in "_$"):
+        return False
+    after = text[pos + 6 : pos + 7]
+    return not (after.isalnum() or after in ("_", "$"))
+
+
+def _skip_template(text: str, pos: int, template_depths: list[int], depth: int) -> int:
+    body = _TEMPLATE_BODY_RE.match(text, pos)
+    pos = body.end()
+    if text.startswith("${", pos):
+        template_depths.append(depth)
+        return pos + 2
+    return pos + 1
@@ -1,40 +1,25 @@
 #!/usr/bin/env python3
-import json
 import os
+import posixpath
 import re
-import shutil
-import subprocess
 import sys
-import tempfile
-from urllib.request import urlopen
+from pathlib import Path
+from typing import BinaryIO
 
-PKGBUILD_PATH = "PKGBUILD"
-SRCINFO_PATH = ".SRCINFO"
-REPO = "iceyear/iipython-feishin-electron-bin"
-
-
-def read_text(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as handle:
-        return handle.read()
-
-
-def write_text(path: str, content: str) -> None:
-    with open(path, "w", encoding="utf-8") as handle:
-        handle.write(content)
-
-
-def extract_var(content: str, var_name: str) -> str:
-    match = re.search(rf"^{re.escape(var_name)}=([^\n]+)$", content, re.MULTILINE)
-    if not match:
-        raise RuntimeError(f"Missing {var_name} in PKGBUILD")
-    return match.group(1).strip().strip("\"")
+import deb_archive
+import downloader
+from build_manifest import MANIFEST_NAME
+from http_client import HttpClient, HttpError, github_release
+from pkgbuild import Pkgbuild, update_local_checksums
 
-
-def extract_optional_var(content: str, var_name: str) -> str | None:
-    match = re.search(rf"^{re.escape(var_name)}=([^\n]+)$", content, re.MULTILINE)
-    if not match:
-        return None
-    return match.group(1).strip().strip("\"")
+PKGBUILD_PATH = Path("PKGBUILD")
+SRCINFO_PATH = Path(".SRCINFO")
+REPO = "iceyear/iipython-feishin-electron-bin"
+ELECTRON_VERSION_RE = re.compile(rb"Chrome/[0-9.]* Electron/([0-9]+)")
+SCAN_CHUNK_SIZE = 1 << 20
+# Longer than any "Chrome/x.y.z.w Electron/N" marker, so one straddling a
+# chunk boundary is still seen whole.
+SCAN_OVERLAP = 128
 
 
 def set_env(key: str, value: str) -> None:
@@ -44,35 +29,62 @@ def set_env(key: str, value: str) -> None:
             handle.write(f"{key}={value}\n")
 
 
-def download_file(url: str, dest: str) -> None:
-    with urlopen(url) as resp, open(dest, "wb") as handle:
-        handle.write(resp.read())
+def scan_electron_major(stream: BinaryIO) -> str | None:
+    tail = b""
+    while True:
+        chunk = stream.read(SCAN_CHUNK_SIZE)
+        window = tail + chunk
+        match = ELECTRON_VERSION_RE.search(window)
+        # A match running to the end of the window may continue in the next chunk.
+        if match and (match.end() < len(window) or not chunk):
+            return match.group(1).decode("ascii")
+        if not chunk:
+            return None
+        tail = window[-SCAN_OVERLAP:]
 
 
 def detect_electron_major(asset_path: str, appname: str) -> str:
-    with tempfile.TemporaryDirectory() as workdir:
-        subprocess.run(["ar", "x", asset_path], cwd=workdir, check=True)
-        data_archives = sorted(
-            name for name in os.listdir(workdir) if name.startswith("data.tar.")
-        )
-        if not data_archives:
-            raise RuntimeError("Unable to locate data.tar.* in deb archive")
-        extractor = "bsdtar" if shutil.which("bsdtar") else "tar"
-        subprocess.run([extractor, "-xf", data_archives[0]], cwd=workdir, check=True)
-        binary_path = os.path.join(workdir, "opt", "Feishin", appname)
-        if not os.path.exists(binary_path):
-            app_dir = f"{appname[:1].upper()}{appname[1:]}"
-            binary_path = os.path.join(workdir, "opt", app_dir, appname)
-        if not os.path.exists(binary_path):
-            for root, _, files in os.walk(os.path.join(workdir, "opt")):
-                if appname in files:
-                    binary_path = os.path.join(root, appname)
-                    break
-        output = subprocess.check_output(["strings", binary_path], text=True)
-    match = re.search(r"Chrome/[0-9.]* Electron/([0-9]+)", output)
-    if not match:
-        raise RuntimeError("Unable to detect Electron major version from deb")
-    return match.group(1)
+    """Read the Electron major from the app binary inside the deb, streaming.
+
+    The payload is decompressed on the fly and only scanned up to the first
+    version marker; nothing is extracted to disk.
+    """
+    with open(asset_path, "rb") as handle:
+        for info, reader in deb_archive.iter_data_members(handle):
+            path = deb_archive.normalize_path(info.name)
+            if reader is None or not path.startswith("opt/") or posixpath.basename(path) != appname:
+                continue
+            major = scan_electron_major(reader)
+            if major:
+                return major
+    raise RuntimeError("Unable to detect Electron major version from deb")
+
+
+def manifest_electron_major(client: HttpClient, assets: list[dict], asset_name: str, sha: str) -> str | None:
+    """Electron major from the release's build manifest, if it vouches for the asset."""
+    manifest_asset = next((item for item in assets if item.get("name") == MANIFEST_NAME), None)
+    if not manifest_asset:
+        return None
+    try:
+        manifest = client.get_json(manifest_asset["browser_download_url"])
+    except (HttpError, OSError, ValueError) as exc:
+        print(f"Ignoring {MANIFEST_NAME}: {exc}")
+        return None
+    assets_listed = manifest.get("assets", []) if isinstance(manifest, dict) else None
+    electron = manifest.get("electron", {}) if isinstance(manifest, dict) else None
+    if (
+        not isinstance(assets_listed, list)
+        or not all(isinstance(item, dict) for item in assets_listed)
+        or not isinstance(electron, dict)
+    ):
+        print(f"Ignoring {MANIFEST_NAME}: not a build manifest")
+        return None
+    listed = {item.get("name"): item.get("sha256") for item in assets_listed}
+    major = str(electron.get("major", ""))
+    if listed.get(asset_name) != sha or not major.isdigit():
+        print(f"Ignoring {MANIFEST_NAME}: it does not describe {asset_name}")
+        return None
+    return major
 
 
 def main() -> int:
@@ -81,23 +93,12 @@ def main() -> int:
     override_pkgver = os.environ.get("FEISHIN_PKGVER")
     override_assetver = os.environ.get("FEISHIN_ASSETVER")
 
-    pkgbuild = read_text(PKGBUILD_PATH)
-    current_tag = extract_var(pkgbuild, "_tag")
-    current_upstream_tag = extract_optional_var(pkgbuild, "_upstream_tag") or current_tag
-    current_assetname = extract_optional_var(pkgbuild, "_assetname")
-    current_pkgver = extract_var(pkgbuild, "pkgver")
-    current_assetver = extract_var(pkgbuild, "_assetver")
-    current_electron = extract_var(pkgbuild, "_electronversion")
-    current_appname = extract_var(pkgbuild, "_appname")
-    current_sha = extract_var(pkgbuild, "sha256sums_x86_64").strip("'()").split()[0]
+    pkgbuild = Pkgbuild.load(PKGBUILD_PATH)
+    current_pkgver = pkgbuild.require("pkgver")
+    current_appname = pkgbuild.require("_appname")
 
-    if override_tag:
-        release_url = f"https://api.github.com/repos/{REPO}/releases/tags/{override_tag}"
-    else:
-        release_url = f"https://api.github.com/repos/{REPO}/releases/latest"
-
-    with urlopen(release_url) as resp:
-        data = json.load(resp)
+    client = HttpClient()
+    data = github_release(client, REPO, override_tag)
 
     latest_tag = data["tag_name"]
     assets = data.get("assets", [])
@@ -118,92 +119,33 @@ def main() -> int:
     latest_assetver = override_assetver or asset_name.replace("feishin-", "").split("-linux-")[0]
     latest_pkgver = override_pkgver or latest_tag.replace("-", "_")
     latest_upstream_tag = override_upstream_tag or latest_tag
-    with tempfile.TemporaryDirectory() as workdir:
-        appimage_path = os.path.join(workdir, asset_name)
-        download_file(asset_url, appimage_path)
-        latest_electron = detect_electron_major(appimage_path, current_appname)
-
-    if (
-        latest_tag == current_tag
-        and latest_upstream_tag == current_upstream_tag
-        and latest_sha == current_sha
-        and latest_assetver == current_assetver
-        and latest_electron == current_electron
-        and (current_assetname == asset_name or current_assetname is None)
-    ):
+    latest_electron = manifest_electron_major(client, assets, asset_name, latest_sha)
+    client.close()
+    if latest_electron is None:
+        asset_path = downloader.download(asset_url, digest)
+        latest_electron = detect_electron_major(str(asset_path), current_appname)
+
+    pkgbuild.set("pkgver", latest_pkgver)
+    pkgbuild.set("_tag", latest_tag)
+    pkgbuild.set("_upstream_tag", latest_upstream_tag, after="_tag")
+    pkgbuild.set("_assetver", latest_assetver)
+    pkgbuild.set("_assetname", asset_name, after="_assetver")
+    pkgbuild.set("_electronversion", latest_electron)
+    pkgbuild.set("sha256sums_x86_64", [latest_sha])
+    for name in update_local_checksums(pkgbuild, PKGBUILD_PATH.parent):
+        print(f"Checksum of {name} changed.")
+
+    rendered = pkgbuild.render()
+    srcinfo = Pkgbuild.parse(rendered).srcinfo()
+    current_srcinfo = SRCINFO_PATH.read_text(encoding="utf-8") if SRCINFO_PATH.exists() else ""
+    if rendered == pkgbuild.text and srcinfo == current_srcinfo:
         set_env("PKG_UPDATED", "0")
         set_env("NEW_PKGVER", current_pkgver)
         print("No update available.")
         return 0
 
-    pkgbuild = re.sub(r"^pkgver=.*$", f"pkgver={latest_pkgver}", pkgbuild, flags=re.MULTILINE)
-    pkgbuild = re.sub(r"^_tag=.*$", f"_tag={latest_tag}", pkgbuild, flags=re.MULTILINE)
-    if re.search(r"^_upstream_tag=.*$", pkgbuild, flags=re.MULTILINE):
-        pkgbuild = re.sub(
-            r"^_upstream_tag=.*$",
-            f"_upstream_tag={latest_upstream_tag}",
-            pkgbuild,
-            flags=re.MULTILINE,
-        )
-    else:
-        pkgbuild = pkgbuild.replace(
-            f"_tag={latest_tag}\n",
-            f"_tag={latest_tag}\n_upstream_tag={latest_upstream_tag}\n",
-        )
-    pkgbuild = re.sub(r"^_assetver=.*$", f"_assetver={latest_assetver}", pkgbuild, flags=re.MULTILINE)
-    if re.search(r"^_assetname=.*$", pkgbuild, flags=re.MULTILINE):
-        pkgbuild = re.sub(
-            r"^_assetname=.*$",
-            f"_assetname={asset_name}",
-            pkgbuild,
-            flags=re.MULTILINE,
-        )
-    else:
-        pkgbuild = pkgbuild.replace(
-            f"_assetver={latest_assetver}\n",
-            f"_assetver={latest_assetver}\n_assetname={asset_name}\n",
-        )
-    pkgbuild = re.sub(
-        r"^_electronversion=.*$",
-        f"_electronversion={latest_electron}",
-        pkgbuild,
-        flags=re.MULTILINE,
-    )
-    pkgbuild = re.sub(
-        r"^sha256sums_x86_64=.*$",
-        f"sha256sums_x86_64=('{latest_sha}')",
-        pkgbuild,
-        flags=re.MULTILINE,
-    )
-
-    write_text(PKGBUILD_PATH, pkgbuild)
-
-    srcinfo = read_text(SRCINFO_PATH)
-    srcinfo = re.sub(r"^pkgver = .*$", f"pkgver = {latest_pkgver}", srcinfo, flags=re.MULTILINE)
-    srcinfo = re.sub(
-        r"^provides = feishin=.*$",
-        f"provides = feishin={latest_pkgver}",
-        srcinfo,
-        flags=re.MULTILINE,
-    )
-    srcinfo = re.sub(
-        r"^depends = electron.*$",
-        f"depends = electron{latest_electron}",
-        srcinfo,
-        flags=re.MULTILINE,
-    )
-    source_line = (
-        f"source_x86_64 = iipython-feishin-electron-{latest_pkgver}-x86_64.deb::"
-        f"https://github.com/{REPO}/releases/download/{latest_tag}/{asset_name}"
-    )
-    srcinfo = re.sub(r"^source_x86_64 = .*$", source_line, srcinfo, flags=re.MULTILINE)
-    srcinfo = re.sub(
-        r"^sha256sums_x86_64 = .*$",
-        f"sha256sums_x86_64 = {latest_sha}",
-        srcinfo,
-        flags=re.MULTILINE,
-    )
-    write_text(SRCINFO_PATH, srcinfo)
+    PKGBUILD_PATH.write_text(rendered, encoding="utf-8")
+    SRCINFO_PATH.write_text(srcinfo, encoding="utf-8")
 
     set_env("PKG_UPDATED", "1")
     set_env("NEW_PKGVER", latest_pkgver)
@@ -0,0 +1,371 @@
+"""Format-preserving edits of block-style YAML config files (electron-builder.yml).
+
+``YamlEditor`` indexes the block mappings of a document by indentation and
+addresses keys by dotted path (``linux.target``). An edit rewrites only the
+lines of the key involved, so comments, quoting and the layout of every other
+key keep their bytes. Sequences are read from block (``- item``) or flow
+(``[a, b]``) style and written back in block style at the indentation the
+file already uses.
+
+This covers the subset of YAML that electron-builder configs are written in:
+block mappings and sequences with scalar values. Anchors, multi-document
+streams and multi-line scalars are not interpreted. A key inside them can
+only be read or replaced as a whole.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+_KEY_RE = re.compile(
+    r"""(?P<key>"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s#'"\-?:,\[\]{}&*!|>%@`][^:#]*?|-[^\s:#][^:#]*?)"""
+    r"""\s*:(?:[ \t]+(?P<value>.*?))?[ \t]*$"""
+)
+_PLAIN_RE = re.compile(r"[A-Za-z0-9_./$][\w./$@+*;() -]*")
+_RESERVED_PLAIN = frozenset({"true", "false", "yes", "no", "on", "off", "null", "~"})
+
+
+class YamlConfigError(ValueError):
+    pass
+
+
+@dataclass
+class Entry:
+    key: str
+    line: int
+    indent: int
+    # Inline value without its trailing comment; "" when the value is a block.
+    value: str
+    comment: str
+    # Lines [body_start, body_end) hold the key's block value.
+    body_start: int
+    body_end: int
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def _is_content(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def _split_comment(value: str) -> tuple[str, str]:
+    if value[:1] in ("'", '"'):
+        quote = value[0]
+        pos = 1
+        while pos < len(value):
+            if value[pos] == "\\" and quote == '"':
+                pos += 2
+                continue
+            if value[pos] == quote:
+                if quote == "'" and value[pos + 1 : pos + 2] == "'":
+                    pos += 2
+                    continue
+                break
+            pos += 1
+        rest = value[pos + 1 :]
+        match = re.search(r"\s+#", rest)
+        return (value[: pos + 1 + match.start()], rest[match.start() :]) if match else (value, "")
+    match = re.search(r"\s+#", value)
+    return (value[: match.start()], value[match.start() :]) if match else (value, "")
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].encode("latin-1", "backslashreplace").decode("unicode_escape")
+    return value
+
+
+def render_scalar(value: str) -> str:
+    """``value`` as a plain scalar when YAML reads it back unchanged, else single-quoted."""
+    if _PLAIN_RE.fullmatch(value) and value.lower() not in _RESERVED_PLAIN and not value.endswith(" "):
+        if not re.fullmatch(r"[-+]?(?:\d[\d_]*)?\.?\d*(?:[eE][-+]?\d+)?", value):
+            return value
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _flow_items(value: str) -> list[str] | None:
+    if not (value.startswith("[") and value.endswith("]")):
+        return None
+    inner = value[1:-1].strip()
+    return [unquote(item.strip()) for item in re.findall(r"""'(?:[^']|'')*'|"(?:[^"\\]|\\.)*"|[^,]+""", inner)]
+
+
+class YamlEditor:
+    """Dotted-path editor over the block mappings of ``text``."""
+
+    def __init__(self, text: str) -> None:
+        self.lines = text.splitlines(keepends=True)
+        self.missing: list[str] = []
+        self.changes = 0
+        if any(line.rstrip("\r\n") == "---" for line in self.lines[1:]):
+            raise YamlConfigError("multi-document YAML is not supported")
+        self._indent_unit = self._detect_indent_unit()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    def _detect_indent_unit(self) -> int:
+        for entry in self._entries(0, len(self.lines), 0):
+            first = next((i for i in range(entry.body_start, entry.body_end) if _is_content(self.lines[i])), None)
+            if first is not None and _indent(self.lines[first]) > entry.indent:
+                return _indent(self.lines[first]) - entry.indent
+        return 2
+
+    def _body_end(self, start: int, indent: int) -> int:
+        end = start
+        for index in range(start, len(self.lines)):
+            line = self.lines[index]
+            if not _is_content(line):
+                continue
+            line_indent = _indent(line)
+            stripped = line.lstrip(" ")
+            # A block sequence may sit at its key's own indentation.
+            if line_indent < indent or (
+                line_indent == indent and not (stripped.startswith("- ") or stripped.rstrip() == "-")
+            ):
+                break
+            end = index + 1
+        return end
+
+    def _entries(self, start: int, end: int, indent: int) -> list[Entry]:
+        entries = []
+        index = start
+        while index < end:
+            line = self.lines[index]
+            if not _is_content(line) or _indent(line) != indent:
+                index += 1
+                continue
+            match = _KEY_RE.fullmatch(line.strip(" \r\n"))
+            if not match:
+                index += 1
+                continue
+            value, comment = _split_comment(match.group("value") or "")
+            if value.startswith("#"):
+                value, comment = "", value
+            body_end = self._body_end(index + 1, indent)
+            entries.append(Entry(unquote(match.group("key")), index, indent, value, comment, index + 1, body_end))
+            index = max(body_end, index + 1)
+        return entries
+
+    def _child_indent(self, entry: Entry) -> int | None:
+        for index in range(entry.body_start, entry.body_end):
+            if _is_content(self.lines[index]):
+                return _indent(self.lines[index])
+        return None
+
+    def _find(self, keys: list[str]) -> Entry | None:
+        start, end, indent = 0, len(self.lines), 0
+        entry = None
+        for key in keys:
+            entry = next((item for item in self._entries(start, end, indent) if item.key == key), None)
+            if entry is None:
+                return None
+            child_indent = self._child_indent(entry)
+            start, end, indent = entry.body_start, entry.body_end, child_indent if child_indent is not None else -1
+        return entry
+
+    def get(self, path: str) -> Entry | None:
+        return self._find(path.split("."))
+
+    def exists(self, path: str) -> bool:
+        return self.get(path) is not None
+
+    def value(self, path: str) -> str | None:
+        """The scalar at ``path``, unquoted; None when missing or not a scalar."""
+        entry = self.get(path)
+        if entry is None or not entry.value or entry.value.startswith(("[", "{")):
+            return None
+        return unquote(entry.value)
+
+    def items(self, path: str) -> list[str] | None:
+        """The sequence at ``path``; mapping items are reduced to their ``target`` value."""
+        entry = self.get(path)
+        if entry is None:
+            return None
+        if entry.value:
+            return _flow_items(entry.value)
+        blocks = self._item_blocks(entry)
+        return None if blocks is None else [value for value, _, _ in blocks]
+
+    def _item_blocks(self, entry: Entry) -> list[tuple[str, int, int]] | None:
+        """``(value, start, end)`` of each item of the block sequence under ``entry``.
+
+        An item's lines run up to the next item, so the other keys of a
+        mapping item belong to it. Comments at the items' indentation go with
+        the item below them, deeper-indented ones with the item above.
+        """
+        item_indent = self._child_indent(entry)
+        starts = []
+        for index in range(entry.body_start, entry.body_end):
+            line = self.lines[index]
+            if not _is_content(line) or _indent(line) != item_indent:
+                continue
+            if not line.lstrip(" ").startswith("-"):
+                return None
+            starts.append(index)
+        value_end = self._value_end(entry)
+        firsts = starts[:1]
+        for previous, start in zip(starts, starts[1:]):
+            while (
+                start - 1 > previous
+                and self.lines[start - 1].strip().startswith("#")
+                and _indent(self.lines[start - 1]) == item_indent
+            ):
+                start -= 1
+            firsts.append(start)
+        return [
+            (self._item_value(line, limit), first, end)
+            for line, limit, first, end in zip(
+                starts, starts[1:] + [value_end], firsts, firsts[1:] + [value_end]
+            )
+        ]
+
+    def _item_value(self, start: int, end: int) -> str:
+        line = self.lines[start]
+        item, _ = _split_comment(line.strip(" \r\n")[1:].strip())
+        match = _KEY_RE.fullmatch(item)
+        if match and match.group("value") is not None:
+            if unquote(match.group("key")) != "target":
+                # Other keys of a mapping item may follow on later lines.
+                nested = self._entries(start + 1, end, _indent(line) + 2)
+                target = next((sub for sub in nested if sub.key == "target"), None)
+                item = target.value if target else item
+            else:
+                item = match.group("value")
+        return unquote(_split_comment(item)[0])
+
+    def _value_end(self, entry: Entry) -> int:
+        end = entry.body_end
+        # Comments indented under the key after its last item belong to the value.
+        while (
+            end < len(self.lines)
+            and self.lines[end].strip().startswith("#")
+            and _indent(self.lines[end]) > entry.indent
+        ):
+            end += 1
+        return end
+
+    def _replace(self, entry: Entry, lines: list[str]) -> bool:
+        end = self._value_end(entry)
+        if self.lines[entry.line : end] == lines:
+            return False
+        self.lines[entry.line : end] = lines
+        self.changes += 1
+        return True
+
+    def _newline(self) -> str:
+        return "\r\n" if self.lines and self.lines[0].endswith("\r\n") else "\n"
+
+    def _key_line(self, entry: Entry, value: str) -> str:
+        line = self.lines[entry.line]
+        raw_key = _KEY_RE.fullmatch(line.strip(" \r\n")).group("key")
+        separator = f" {value}" if value else ""
+        return f"{' ' * entry.indent}{raw_key}:{separator}{entry.comment}{self._newline()}"
+
+    def _sequence_lines(self, indent: int, items: list[str]) -> list[str]:
+        return [f"{' ' * indent}- {render_scalar(item)}{self._newline()}" for item in items]
+
+    def _insert(self, keys: list[str], lines_for: Callable[[int, str], list[str]], create_parents: bool) -> bool:
+        *parents, key = keys
+        depth = len(parents)
+        while depth and self._find(parents[:depth]) is None:
+            depth -= 1
+        if depth < len(parents) and not create_parents:
+            self.missing.append(".".join(parents))
+            return False
+        if depth:
+            parent = self._find(parents[:depth])
+            if parent.value:
+                # Present with an inline value: leave it alone.
+                self.missing.append(".".join(parents))
+                return False
+            position = self._value_end(parent)
+            indent = self._child_indent(parent)
+            if indent is None or indent <= parent.indent:
+                indent = parent.indent + self._indent_unit
+        else:
+            position = max((index + 1 for index, line in enumerate(self.lines) if _is_content(line)), default=0)
+            # Indented comments after the last key belong to its value.
+            while (
+                position < len(self.lines)
+                and self.lines[position].strip().startswith("#")
+                and _indent(self.lines[position]) > 0
+            ):
+                position += 1
+            indent = 0
+        if position and not self.lines[position - 1].endswith("\n"):
+            self.lines[position - 1] += self._newline()
+        new_lines = []
+        for name in parents[depth:]:
+            new_lines.append(f"{' ' * indent}{render_scalar(name)}:{self._newline()}")
+            indent += self._indent_unit
+        new_lines.extend(lines_for(indent, key))
+        self.lines[position:position] = new_lines
+        self.changes += 1
+        return True
+
+    def set(self, path: str, value: str, create_parents: bool = False) -> bool:
+        """Set ``path`` to the scalar ``value``, replacing any block under it."""
+        keys = path.split(".")
+        entry = self._find(keys)
+        rendered = render_scalar(value)
+        if entry is not None:
+            if entry.value == rendered or (entry.value and unquote(entry.value) == value):
+                return False
+            return self._replace(entry, [self._key_line(entry, rendered)])
+        return self._insert(
+            keys, lambda indent, key: [f"{' ' * indent}{render_scalar(key)}: {rendered}{self._newline()}"], create_parents
+        )
+
+    def set_items(self, path: str, items: list[str], create_parents: bool = False) -> bool:
+        """Make ``path`` the block sequence ``items``; unchanged when it already is.
+
+        Items of an existing block sequence that are kept keep their lines,
+        so a mapping item (``- target: AppImage`` with its ``arch``) survives.
+        """
+        keys = path.split(".")
+        entry = self._find(keys)
+        if entry is not None:
+            if self.items(path) == items:
+                return False
+            item_indent = self._child_indent(entry) if not entry.value else None
+            if item_indent is None or item_indent < entry.indent:
+                item_indent = entry.indent + self._indent_unit
+            blocks = self._item_blocks(entry) if not entry.value else None
+            if not blocks:
+                return self._replace(entry, [self._key_line(entry, ""), *self._sequence_lines(item_indent, items)])
+            # Items that stay keep their lines: mapping items keep their other keys.
+            kept: dict[str, list[str]] = {}
+            for value, start, end in blocks:
+                block = self.lines[start:end]
+                if not block[-1].endswith("\n"):
+                    block[-1] += self._newline()
+                kept.setdefault(value, block)
+            lines = [self._key_line(entry, ""), *self.lines[entry.body_start : blocks[0][1]]]
+            for item in items:
+                lines.extend(kept.get(item) or self._sequence_lines(item_indent, [item]))
+            return self._replace(entry, lines)
+        return self._insert(
+            keys,
+            lambda indent, key: [
+                f"{' ' * indent}{render_scalar(key)}:{self._newline()}",
+                *self._sequence_lines(indent + self._indent_unit, items),
+            ],
+            create_parents,
+        )
+
+    def replace_item(self, path: str, old: str, new: list[str]) -> bool:
+        """Replace the sequence item ``old`` at ``path`` by ``new``; a no-op when ``old`` is absent."""
+        items = self.items(path)
+        if items is None or old not in items:
+            return False
+        index = items.index(old)
+        replaced = items[:index] + [item for item in new if item not in items] + items[index + 1 :]
+        return self.set_items(path, replaced)
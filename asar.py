@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""Read and patch Electron asar archives without extracting them.
+
+An asar archive is a Chromium pickle holding the header size, a pickle
+holding the JSON header (the file tree with each file's size, offset and
+integrity hashes), then the file contents back to back. ``patch`` rewrites
+the archive in two streaming passes: the first scans only the entries the
+caller selected for the target bytes and works out their new sizes and
+hashes, the second writes the new header and copies every entry's bytes
+from the original archive, substituting only the entries that matched.
+No temporary tree is unpacked and the only file written is the output.
+
+``patch --order`` also lays out the entries named in an ordering file (one
+archive path per line, in first-access order) contiguously at the front of
+the archive, so a cold start reads them sequentially. ``order`` produces that
+file either from a recorded strace log of the app starting (``strace -f -e
+trace=openat,pread64,close,clone,clone3,fork,vfork``) or, without a trace,
+from the static import graph of the bundles under ``out/``.
+
+Usage:
+  python asar.py list app.asar
+  python asar.py order app.asar [--trace strace.log] -o app.asar.order
+  python asar.py patch app.asar out.asar --include 'out/*' \\
+      --replace process.resourcesPath "'/usr/lib/feishin'" --order app.asar.order
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Sequence
+
+CHUNK_SIZE = 1 << 20
+# Electron verifies integrity per block of this size.
+INTEGRITY_BLOCK_SIZE = 4 << 20
+
+
+class AsarError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Entry:
+    path: str
+    node: dict
+    # Absolute offset of the contents in the archive file.
+    offset: int
+    size: int
+
+
+@dataclass
+class Archive:
+    path: Path
+    header: dict
+    data_offset: int
+
+    @classmethod
+    def open(cls, path: Path) -> Archive:
+        with open(path, "rb") as handle:
+            header, data_offset = read_header(handle, str(path))
+        return cls(Path(path), header, data_offset)
+
+    def files(self) -> Iterator[Entry]:
+        """Yield every file stored in the archive body, in header order."""
+        for path, node in walk(self.header):
+            if "offset" in node and not node.get("unpacked"):
+                yield Entry(path, node, self.data_offset + int(node["offset"]), int(node["size"]))
+
+
+def read_header(handle: BinaryIO, name: str = "archive") -> tuple[dict, int]:
+    """Read the header from the start of ``handle``; return it and the data offset.
+
+    Reads exactly the header bytes, so ``handle`` may be a forward-only
+    stream (e.g. a tar member) positioned at the start of the archive.
+    """
+    prefix = handle.read(16)
+    if len(prefix) < 16:
+        raise AsarError(f"{name}: too short for an asar header")
+    size_payload, header_size, header_payload, json_size = struct.unpack("<4I", prefix)
+    if size_payload != 4 or header_payload + 4 > header_size or json_size > header_payload - 4:
+        raise AsarError(f"{name}: not an asar archive")
+    raw = handle.read(header_size - 8)[:json_size]
+    try:
+        header = json.loads(raw.decode("utf-8"))
+    except ValueError as exc:
+        raise AsarError(f"{name}: invalid header JSON: {exc}") from exc
+    return header, 8 + header_size
+
+
+def walk(header: dict, prefix: str = "") -> Iterator[tuple[str, dict]]:
+    """Yield ``(path, node)`` for every file and link below ``header``."""
+    for name, node in header.get("files", {}).items():
+        path = f"{prefix}{name}"
+        if "files" in node:
+            yield from walk(node, f"{path}/")
+        else:
+            yield path, node
+
+
+def integrity(data: bytes) -> dict:
+    # Like @electron/asar, the trailing (possibly empty) block is always hashed.
+    blocks = [
+        hashlib.sha256(data[start : start + INTEGRITY_BLOCK_SIZE]).hexdigest()
+        for start in range(0, len(data) + 1, INTEGRITY_BLOCK_SIZE)
+    ]
+    return {
+        "algorithm": "SHA256",
+        "hash": hashlib.sha256(data).hexdigest(),
+        "blockSize": INTEGRITY_BLOCK_SIZE,
+        "blocks": blocks,
+    }
+
+
+def encode_header(header: dict) -> bytes:
+    """Return the two pickles that precede the file contents."""
+    raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    padding = -len(raw) % 4
+    header_pickle = struct.pack("<2I", 4 + len(raw) + padding, len(raw)) + raw + b"\0" * padding
+    return struct.pack("<2I", 4, len(header_pickle)) + header_pickle
+
+
+def _contains(handle: BinaryIO, entry: Entry, needles: tuple[bytes, ...]) -> bool:
+    overlap = max(len(needle) for needle in needles) - 1
+    handle.seek(entry.offset)
+    remaining = entry.size
+    tail = b""
+    while remaining:
+        chunk = handle.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise AsarError(f"{entry.path}: archive is truncated")
+        remaining -= len(chunk)
+        window = tail + chunk
+        if any(needle in window for needle in needles):
+            return True
+        tail = window[-overlap:] if overlap else b""
+    return False
+
+
+def _read(handle: BinaryIO, entry: Entry) -> bytes:
+    handle.seek(entry.offset)
+    data = handle.read(entry.size)
+    if len(data) != entry.size:
+        raise AsarError(f"{entry.path}: archive is truncated")
+    return data
+
+
+def _replace(data: bytes, replacements: list[tuple[bytes, bytes]]) -> bytes:
+    for old, new in replacements:
+        data = data.replace(old, new)
+    return data
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, offset: int, size: int) -> None:
+    src.seek(offset)
+    dst.flush()
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while size:
+                copied = copy_file_range(src.fileno(), dst.fileno(), size, offset, dst.tell())
+                if not copied:
+                    raise AsarError("archive is truncated")
+                dst.seek(copied, os.SEEK_CUR)
+                offset += copied
+                size -= copied
+            return
+        except OSError:
+            # Cross-device or unsupported filesystem: fall back to a plain copy.
+            src.seek(offset)
+    while size:
+        chunk = src.read(min(CHUNK_SIZE, size))
+        if not chunk:
+            raise AsarError("archive is truncated")
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+def contiguous_reads(spans: Iterable[tuple[int, int]]) -> int:
+    """Count the separate reads needed to fetch ``(offset, size)`` spans in order."""
+    reads = 0
+    position = None
+    for offset, size in spans:
+        if offset != position:
+            reads += 1
+        position = offset + size
+    return reads
+
+
+def read_order(path: Path) -> list[str]:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+_PID_RE = re.compile(r"^(?:\[pid\s+(?P<bracketed>\d+)\]|(?P<pid>\d+))\s+")
+_OPEN_RE = re.compile(r'\bopen(?:at)?\((?:[^,"]+,\s*)?"(?P<path>[^"]+)".*\)\s*=\s*(?P<fd>\d+)')
+_CLOSE_RE = re.compile(r"\bclose\((?P<fd>\d+)\)\s*=\s*0")
+_PREAD_START_RE = re.compile(r"\bpread(?:64)?\((?P<fd>\d+),")
+_PREAD_END_RE = re.compile(r",\s*(?P<count>\d+),\s*(?P<offset>\d+)\)\s*=\s*(?P<ret>\d+)(?:\s*<[\d.]+>)?\s*$")
+_CLONE_RE = re.compile(r"\b(?:clone3?|v?fork)\(|<\.\.\. (?:clone3?|v?fork) resumed>")
+_CLONE_END_RE = re.compile(r"\)\s*=\s*(?P<child>\d+)(?:\s*<[\d.]+>)?\s*$")
+
+
+def _line_pid(line: str) -> str:
+    match = _PID_RE.match(line)
+    return (match.group("bracketed") or match.group("pid")) if match else ""
+
+
+def _clones(trace: list[str]) -> Iterator[tuple[int, str, str, bool]]:
+    """``(line index, parent, child, shares descriptors)`` of each clone/fork in ``trace``."""
+    pending: dict[str, str] = {}
+    for index, line in enumerate(trace):
+        if not _CLONE_RE.search(line):
+            continue
+        pid = _line_pid(line)
+        if "<unfinished" in line:
+            pending[pid] = line
+            continue
+        end = _CLONE_END_RE.search(line)
+        if end:
+            call = pending.pop(pid, "") + line if "resumed>" in line else line
+            yield index, pid, end.group("child"), "CLONE_FILES" in call
+
+
+def order_from_trace(archive: Archive, trace: Iterable[str]) -> list[str]:
+    """First-access order of archive entries in an strace (or fs-trace) log.
+
+    Reads are attributed through ``pread`` offsets on descriptors opened on
+    the archive; lines naming ``<archive>/<entry>`` paths count directly.
+    strace -f prefixes lines with thread ids, so descriptors are keyed by
+    descriptor table: the clone lines of the trace tell which threads share
+    one (``CLONE_FILES``) and which processes got a copy at fork time.
+    Without them every id is taken to have a table of its own.
+    """
+    trace = list(trace)
+    entries = sorted(archive.files(), key=lambda entry: entry.offset)
+    starts = [entry.offset for entry in entries]
+    known = {entry.path for entry in entries}
+    name = archive.path.name
+    path_re = re.compile(re.escape(name) + r"/(?P<entry>[^\"'\s,)]+)")
+    clones = {index: (parent, child, shared) for index, parent, child, shared in _clones(trace)}
+    shares_with = {child: parent for parent, child, shared in clones.values() if shared}
+
+    def table(pid: str) -> str:
+        while pid in shares_with:
+            pid = shares_with[pid]
+        return pid
+
+    archive_fds: set[tuple[str, str]] = set()
+    pending: dict[str, str] = {}
+    order: dict[str, None] = {}
+
+    for index, line in enumerate(trace):
+        if index in clones:
+            parent, child, shared = clones[index]
+            if not shared:
+                # fork(): the child starts with a copy of the parent's descriptors.
+                inherited = {fd for owner, fd in archive_fds if owner == table(parent)}
+                archive_fds.update((table(child), fd) for fd in inherited)
+            continue
+        pid = _line_pid(line)
+        opened = _OPEN_RE.search(line)
+        if opened and posixpath.basename(opened.group("path")) == name:
+            archive_fds.add((table(pid), opened.group("fd")))
+            continue
+        closed = _CLOSE_RE.search(line)
+        if closed:
+            archive_fds.discard((table(pid), closed.group("fd")))
+            continue
+        start = _PREAD_START_RE.search(line)
+        if start and "<unfinished" in line:
+            pending[pid] = start.group("fd")
+            continue
+        fd = start.group("fd") if start else pending.pop(pid, None) if "resumed>" in line else None
+        end = _PREAD_END_RE.search(line)
+        if fd is not None and end and (table(pid), fd) in archive_fds:
+            offset = int(end.group("offset"))
+            stop = offset + int(end.group("ret"))
+            idx = max(bisect_right(starts, offset) - 1, 0)
+            while idx < len(entries) and entries[idx].offset < stop:
+                entry = entries[idx]
+                if entry.offset + entry.size > offset or entry.offset == offset:
+                    order.setdefault(entry.path, None)
+                idx += 1
+            continue
+        for match in path_re.finditer(line):
+            if match.group("entry") in known:
+                order.setdefault(match.group("entry"), None)
+    return list(order)
+
+
+_SPECIFIER_RE = re.compile(
+    rb"""(?:\brequire\s*\(\s*|\bimport\s*\(\s*|\bfrom\s*|\bimport\s*)(["'])(?P<spec>[^"'\n]+)\1"""
+)
+_HTML_REF_RE = re.compile(rb"""<(?:script|link)\b[^>]*?\b(?:src|href)\s*=\s*(["'])(?P<spec>[^"']+)\1""")
+_RESOLVE_SUFFIXES = ("", ".js", ".cjs", ".mjs", ".json", "/index.js")
+_SCANNED_SUFFIXES = (".js", ".cjs", ".mjs", ".html")
+# Loaded by path at runtime rather than imported, so they are extra roots.
+STATIC_ROOTS = ("out/preload/*.js", "out/renderer/*.html")
+
+
+def order_from_imports(archive: Archive) -> list[str]:
+    """Approximate first-access order from the static import graph.
+
+    Starts at package.json and its ``main`` entry, then the preload scripts
+    and renderer pages, following relative and node_modules specifiers found
+    by ``require``/``import`` patterns and HTML script/link tags, depth first
+    in source order, as Node evaluates them.
+    """
+    entries = {entry.path: entry for entry in archive.files()}
+    order: dict[str, None] = {}
+
+    with open(archive.path, "rb") as handle:
+
+        def dependencies(path: str) -> list[str]:
+            if not path.endswith(_SCANNED_SUFFIXES):
+                return []
+            data = _read(handle, entries[path])
+            pattern = _HTML_REF_RE if path.endswith(".html") else _SPECIFIER_RE
+            resolved = []
+            for match in pattern.finditer(data):
+                spec = match.group("spec").decode("utf-8", "replace").split("?", 1)[0]
+                resolved.extend(_resolve(handle, entries, path, spec))
+            return resolved
+
+        roots = []
+        if "package.json" in entries:
+            roots.append("package.json")
+            manifest = json.loads(_read(handle, entries["package.json"]))
+            roots.extend(_resolve(handle, entries, "package.json", "./" + manifest.get("main", "index.js")))
+        for pattern in STATIC_ROOTS:
+            roots.extend(sorted(path for path in entries if fnmatch.fnmatchcase(path, pattern)))
+
+        stack = [iter(roots)]
+        while stack:
+            path = next(stack[-1], None)
+            if path is None:
+                stack.pop()
+                continue
+            if path in order:
+                continue
+            order[path] = None
+            stack.append(iter(dependencies(path)))
+    return list(order)
+
+
+def _resolve(handle: BinaryIO, entries: dict[str, Entry], importer: str, spec: str) -> list[str]:
+    """Archive files Node reads to resolve ``spec``: a package.json, then the module."""
+    if spec.startswith(("./", "../", "/")):
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec.lstrip("/")))
+        found = _with_suffix(entries, base)
+        return [found] if found else []
+    if spec.startswith("node:") or "://" in spec:
+        return []
+    parts = spec.split("/")
+    package = "/".join(parts[:2] if spec.startswith("@") else parts[:1])
+    subpath = spec[len(package) :].lstrip("/")
+    directory = posixpath.dirname(importer)
+    while True:
+        root = posixpath.join(directory, "node_modules", package) if directory else f"node_modules/{package}"
+        manifest_path = f"{root}/package.json"
+        manifest = [manifest_path] if manifest_path in entries else []
+        if subpath:
+            found = _with_suffix(entries, posixpath.join(root, subpath))
+        elif manifest:
+            try:
+                main = json.loads(_read(handle, entries[manifest_path])).get("main") or "index.js"
+            except ValueError:
+                main = "index.js"
+            found = _with_suffix(entries, posixpath.normpath(posixpath.join(root, main)))
+        else:
+            found = _with_suffix(entries, f"{root}/index.js")
+        if found:
+            return [*manifest, found]
+        if not directory:
+            return []
+        directory = posixpath.dirname(directory)
+
+
+def _with_suffix(entries: dict[str, Entry], base: str) -> str | None:
+    for suffix in _RESOLVE_SUFFIXES:
+        if base + suffix in entries:
+            return base + suffix
+    return None
+
+
+@dataclass
+class PatchResult:
+    entries: int = 0
+    scanned: int = 0
+    changed: list[str] = field(default_factory=list)
+    bytes_written: int = 0
+    # Entries of the ordering file present in the archive, and the reads
+    # needed to fetch them in that order before and after the relayout.
+    ordered: int = 0
+    reads_before: int = 0
+    reads_after: int = 0
+
+
+def patch(
+    source: Path,
+    dest: Path,
+    replacements: list[tuple[bytes, bytes]],
+    include: tuple[str, ...] = (),
+    order: Sequence[str] = (),
+) -> PatchResult:
+    """Write ``source`` to ``dest`` with ``replacements`` applied to matching entries.
+
+    Only entries whose archive path matches one of the ``include`` globs (all
+    entries when empty) are scanned. Entries listed in ``order`` are written
+    first, in that order; the rest follow in header order. ``dest`` may equal
+    ``source``; the new archive is written next to it and moved into place.
+    """
+    archive = Archive.open(source)
+    header = copy.deepcopy(archive.header)
+    entries = list(Archive(archive.path, header, archive.data_offset).files())
+    needles = tuple(old for old, _ in replacements if old)
+    result = PatchResult(entries=len(entries))
+
+    rank: dict[str, int] = {}
+    for path in order:
+        rank.setdefault(path, len(rank))
+    entries.sort(key=lambda entry: rank.get(entry.path, len(rank)))
+    first_access = [entry for entry in entries if entry.path in rank]
+    result.ordered = len(first_access)
+    result.reads_before = contiguous_reads((entry.offset, entry.size) for entry in first_access)
+
+    with open(source, "rb") as src:
+        # Pass 1: find the entries that change and their new sizes.
+        changed: set[str] = set()
+        for entry in entries:
+            if not needles or (include and not any(fnmatch.fnmatchcase(entry.path, g) for g in include)):
+                continue
+            result.scanned += 1
+            if not _contains(src, entry, needles):
+                continue
+            data = _replace(_read(src, entry), replacements)
+            changed.add(entry.path)
+            entry.node["size"] = len(data)
+            if "integrity" in entry.node:
+                entry.node["integrity"] = integrity(data)
+        result.changed = sorted(changed)
+
+        offset = 0
+        for entry in entries:
+            entry.node["offset"] = str(offset)
+            offset += int(entry.node["size"])
+        result.reads_after = contiguous_reads(
+            (int(entry.node["offset"]), int(entry.node["size"])) for entry in first_access
+        )
+
+        # Pass 2: header, then contents, coalescing runs of untouched entries.
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{dest.name}.", dir=dest.parent)
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                dst.write(encode_header(header))
+                run_start = run_size = 0
+                for entry in entries:
+                    if entry.path in changed:
+                        _copy_range(src, dst, run_start, run_size)
+                        run_size = 0
+                        dst.write(_replace(_read(src, entry), replacements))
+                    elif run_size and run_start + run_size == entry.offset:
+                        run_size += entry.size
+                    else:
+                        _copy_range(src, dst, run_start, run_size)
+                        run_start, run_size = entry.offset, entry.size
+                _copy_range(src, dst, run_start, run_size)
+                result.bytes_written = dst.tell()
+            shutil.copymode(source, tmp_name)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+    return result
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect and patch Electron asar archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List the files in an archive")
+    list_parser.add_argument("archive", type=Path)
+
+    patch_parser = commands.add_parser("patch", help="Replace bytes inside archive entries")
+    patch_parser.add_argument("source", type=Path)
+    patch_parser.add_argument("dest", type=Path)
+    patch_parser.add_argument(
+        "--replace",
+        nargs=2,
+        action="append",
+        default=[],
+        metavar=("OLD", "NEW"),
+        help="Replace OLD with NEW in matching entries (repeatable)",
+    )
+    patch_parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Only scan entries whose archive path matches GLOB (repeatable)",
+    )
+    patch_parser.add_argument(
+        "--order",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Ordering file; its entries are laid out first, contiguously",
+    )
+
+    order_parser = commands.add_parser("order", help="Write an entry ordering file")
+    order_parser.add_argument("archive", type=Path, help="Archive the trace was recorded against")
+    order_parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="strace/fs-trace log of a cold start (default: static import graph of out/)",
+    )
+    order_parser.add_argument("-o", "--output", type=Path, default=None, help="Write here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    try:
+        if args.command == "list":
+            archive = Archive.open(args.archive)
+            for path, node in walk(archive.header):
+                if "link" in node:
+                    print(f"{path} -> {node['link']}")
+                else:
+                    suffix = " (unpacked)" if node.get("unpacked") else ""
+                    print(f"{path}\t{node.get('size', 0)}{suffix}")
+            return 0
+
+        if args.command == "order":
+            archive = Archive.open(args.archive)
+            if args.trace:
+                with open(args.trace, encoding="utf-8", errors="replace") as trace:
+                    order = order_from_trace(archive, trace)
+            else:
+                order = order_from_imports(archive)
+            text = "".join(f"{path}\n" for path in order)
+            if args.output:
+                args.output.write_text(text, encoding="utf-8")
+            else:
+                sys.stdout.write(text)
+            entries = {entry.path: entry for entry in archive.files()}
+            reads = contiguous_reads((entries[path].offset, entries[path].size) for path in order)
+            print(
+                f"{len(order)} entries ordered; {reads} contiguous read(s) in the current layout, "
+                f"{min(len(order), 1)} when laid out in this order",
+                file=sys.stderr,
+            )
+            return 0
+
+        replacements = [(old.encode(), new.encode()) for old, new in args.replace]
+        order = read_order(args.order) if args.order else ()
+        result = patch(args.source, args.dest, replacements, tuple(args.include), order)
+    except (OSError, ValueError) as exc:
+        print(f"asar: {exc}", file=sys.stderr)
+        return 1
+    for path in result.changed:
+        print(f"patched: {path}")
+    print(
+        f"{len(result.changed)} of {result.scanned} scanned entries patched "
+        f"({result.entries} in archive, {result.bytes_written} bytes written)"
+    )
+    if order:
+        print(
+            f"{result.ordered} of {len(order)} ordered entries laid out first; "
+            f"startup reads: {result.reads_before} -> {result.reads_after}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())